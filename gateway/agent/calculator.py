@@ -0,0 +1,302 @@
+"""
+계산기 엔진 — AST 화이트리스트 검증 + 크기 사전 검사 + 서브프로세스 실행
+
+기존 calculate 도구: eval + 문자열 차단 목록
+  → factorial(10**6), 9**9**9 같은 식이 워커 코어를 몇 분씩 점유
+  → 도구는 이벤트 루프와 같은 프로세스에서 실행되므로 GIL을 잡고 서버 전체가 멈춤
+
+변경:
+  1. 파싱한 AST를 순회하며 허용된 노드/함수/상수만 통과 (속성 접근, 이름 조회, 람다 등 불가)
+  2. 같은 순회에서 각 부분식의 크기 상한(log2 |값|)을 계산
+     → 거듭제곱/팩토리얼/곱셈 결과가 MAX_INT_BITS를 넘을 수 있으면 실행 전에 거부 (수 µs)
+     (is_float는 "반드시 실수"일 때만 — min/max처럼 인자 하나를 그대로 돌려주는 함수는
+      정수 인자가 하나라도 있으면 정수로, round/floor/ceil은 인자 크기 그대로 정수로 취급)
+  3. 검증된 AST를 code 객체로 컴파일해 LRU 캐시 (같은 식은 파싱/검증 생략)
+  4. 실제 계산은 spawn 프로세스 풀에서 실행, 시간 초과 시 풀을 강제 종료 후 재생성
+     (크기 검사가 놓친 경우를 위한 최후 방어선)
+
+사용법:
+    result = await calculator.evaluate("2 ** 10 + sqrt(144)")
+"""
+import ast
+import asyncio
+import math
+import multiprocessing
+from functools import lru_cache
+from multiprocessing.pool import Pool
+from types import CodeType
+
+from core.config import settings
+from core.logger import get_logger
+
+logger = get_logger("calculator")
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_NODES = 200
+# 정수 결과 크기 상한 (약 3000자리) — int → str 변환 제한(4300자리)보다 작게
+MAX_INT_BITS = 10_000
+# 실수는 이 이상이면 OverflowError로 즉시 실패하므로 크기 상한으로 사용
+FLOAT_BITS = 1024.0
+
+
+class CalculatorError(ValueError):
+    """허용되지 않는 식 / 너무 큰 계산 / 시간 초과"""
+
+
+# 허용 함수: {이름: (함수, 결과가 실수인지)}
+FUNCTIONS = {
+    "abs": (abs, False),
+    "round": (round, False),
+    "min": (min, False),
+    "max": (max, False),
+    "sum": (sum, False),
+    "pow": (pow, False),
+    "sqrt": (math.sqrt, True),
+    "sin": (math.sin, True),
+    "cos": (math.cos, True),
+    "tan": (math.tan, True),
+    "log": (math.log, True),
+    "log10": (math.log10, True),
+    "ceil": (math.ceil, False),
+    "floor": (math.floor, False),
+    "factorial": (math.factorial, False),
+}
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+# eval에 넘길 이름 공간 (검증을 통과한 code 객체만 실행)
+NAMESPACE = {name: fn for name, (fn, _) in FUNCTIONS.items()} | CONSTANTS
+
+BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+
+class _Bound:
+    """
+    부분식 크기 상한 — bits: log2(|값|)의 상한 (|값| ≤ 1이면 0)
+
+    is_float: 결과가 반드시 실수 (정수일 수도 있으면 False — 정수 쪽 검사가 더 엄격함)
+    """
+
+    __slots__ = ("bits", "is_float")
+
+    def __init__(self, bits: float, is_float: bool):
+        self.bits = bits
+        self.is_float = is_float
+        if bits > MAX_INT_BITS:
+            raise CalculatorError(f"결과가 너무 큽니다 (약 2^{bits:.0f} 초과 가능)")
+
+
+def _arith(bits: float, is_float: bool) -> _Bound:
+    """산술 결과 — 실수가 섞이면 정수도 실수로 변환되고, FLOAT_BITS를 넘으면 OverflowError"""
+    return _Bound(min(bits, FLOAT_BITS) if is_float else bits, is_float)
+
+
+# log(x) — 실수 인자는 1보다 작을 수 있음: 가장 작은 양의 실수(2^-1074)에서 |ln x| ≈ 745, |log10 x| ≈ 324
+_LOG_FLOOR = {"log": 745.2, "log10": 323.7}
+_LOG_SCALE = {"log": math.log(2), "log10": math.log10(2)}
+
+
+def _float_function_bound(name: str, args: list[_Bound]) -> _Bound:
+    """실수 함수 결과 크기 — floor/ceil/round로 정수가 되었을 때 팩토리얼 등에 쓰이므로 실제 크기로"""
+    if name == "sqrt":
+        return _Bound(args[0].bits / 2, True)
+    if name in ("sin", "cos"):
+        return _Bound(0, True)
+    if name in _LOG_FLOOR and len(args) == 1:
+        magnitude = args[0].bits * _LOG_SCALE[name]
+        if args[0].is_float:
+            magnitude = max(magnitude, _LOG_FLOOR[name])
+        return _Bound(max(0.0, math.log2(magnitude)) if magnitude > 0 else 0.0, True)
+    return _Bound(FLOAT_BITS, True)         # tan, 밑이 있는 log (밑이 1에 가까우면 커짐)
+
+
+def _pow_bound(base: _Bound, exponent: _Bound) -> _Bound:
+    if max(base.bits, exponent.bits) > FLOAT_BITS and (base.is_float or exponent.is_float):
+        # 실수로 표현할 수 없는 크기 — is_float 판정이 틀렸어도 정수 거듭제곱으로 새지 않도록
+        raise CalculatorError("거듭제곱 인자가 너무 큽니다")
+    is_float = base.is_float or exponent.is_float
+    if base.bits == 0:                      # |밑| ≤ 1 → 결과도 1 이하
+        return _Bound(0, is_float)
+    if is_float:
+        return _Bound(FLOAT_BITS, True)     # 넘치면 OverflowError로 즉시 실패
+    if exponent.bits > 64:
+        raise CalculatorError("지수가 너무 큽니다")
+    return _Bound(base.bits * 2 ** exponent.bits, False)
+
+
+def _check(node: ast.AST) -> _Bound:
+    """허용 노드인지 검사하면서 크기 상한 계산 (재귀)"""
+    if isinstance(node, ast.Expression):
+        return _check(node.body)
+
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise CalculatorError(f"허용되지 않는 값입니다: {value!r}")
+        if not math.isfinite(value):
+            return _Bound(FLOAT_BITS, True)
+        return _Bound(max(0.0, math.log2(abs(value))) if value else 0.0, isinstance(value, float))
+
+    if isinstance(node, ast.Name):
+        if node.id not in CONSTANTS:
+            raise CalculatorError(f"허용되지 않는 이름입니다: {node.id}")
+        return _Bound(2, True)
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, UNARY_OPERATORS):
+        return _check(node.operand)
+
+    if isinstance(node, ast.BinOp) and isinstance(node.op, BINARY_OPERATORS):
+        left, right = _check(node.left), _check(node.right)
+        is_float = left.is_float or right.is_float
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            return _arith(max(left.bits, right.bits) + 1, is_float)
+        if isinstance(node.op, ast.Mult):
+            return _arith(left.bits + right.bits, is_float)
+        if isinstance(node.op, ast.Div):
+            return _Bound(FLOAT_BITS, True)
+        if isinstance(node.op, ast.FloorDiv):
+            return _arith(FLOAT_BITS if is_float else left.bits, is_float)
+        if isinstance(node.op, ast.Mod):
+            return _arith(right.bits, is_float)
+        return _pow_bound(left, right)
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        # sum/min/max 인자용 — 원소를 그대로 돌려줄 수 있으므로 모두 실수일 때만 실수
+        bounds = [_check(element) for element in node.elts]
+        return _Bound(
+            max((b.bits for b in bounds), default=0) + math.log2(len(bounds) or 1),
+            bool(bounds) and all(b.is_float for b in bounds),
+        )
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise CalculatorError(f"허용되지 않는 함수입니다: {ast.unparse(node.func)}")
+        if node.keywords:
+            raise CalculatorError("키워드 인자는 사용할 수 없습니다")
+        name = node.func.id
+        args = [_check(arg) for arg in node.args]
+        if not args:
+            raise CalculatorError(f"{name}()에 인자가 필요합니다")
+
+        if FUNCTIONS[name][1]:
+            return _float_function_bound(name, args)
+        if name == "factorial":
+            # log2(n!) ≤ n·log2(n)
+            if args[0].bits > 32:
+                raise CalculatorError("팩토리얼 인자가 너무 큽니다")
+            n = 2 ** args[0].bits
+            return _Bound(n * math.log2(max(n, 2)), False)
+        if name == "pow":
+            if len(args) == 3:                    # 모듈러 거듭제곱 — 결과 < 모듈러
+                return _Bound(args[2].bits, any(a.is_float for a in args))
+            return _pow_bound(*args[:2])
+        if name == "sum":
+            return _arith(max(a.bits for a in args) + math.log2(len(args) + 1), any(a.is_float for a in args))
+        if name in ("round", "ceil", "floor"):
+            # 인자가 1개면 실수도 정수로 (round(1e300)은 약 2^997의 정수) — 반올림으로 1비트 여유
+            # round(x, n)은 x와 같은 타입
+            is_float = name == "round" and len(args) > 1 and args[0].is_float
+            return _Bound(args[0].bits + 1, is_float)
+        # abs / min / max — 인자 중 하나를 그대로 돌려주므로 크기는 가장 큰 인자, 모두 실수일 때만 실수
+        return _Bound(max(a.bits for a in args), all(a.is_float for a in args))
+
+    raise CalculatorError(f"허용되지 않는 구문입니다: {type(node).__name__}")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> CodeType:
+    """
+    식 검증 + 컴파일 (LRU 캐시)
+
+    Raises:
+        CalculatorError: 문법 오류, 허용되지 않는 구문/이름/함수, 결과가 너무 커질 수 있는 식
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculatorError(f"식이 너무 깁니다 (최대 {MAX_EXPRESSION_LENGTH}자)")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except (SyntaxError, RecursionError, MemoryError) as e:
+        raise CalculatorError(f"식을 해석할 수 없습니다: {e}") from None
+
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise CalculatorError(f"식이 너무 복잡합니다 (최대 {MAX_NODES}개 노드)")
+    _check(tree)
+    return compile(tree, "<calculator>", "eval")
+
+
+def evaluate_sync(expression: str) -> int | float:
+    """검증된 식을 현재 프로세스에서 계산 (프로세스 풀 워커에서 실행)"""
+    return eval(compile_expression(expression), {"__builtins__": {}}, NAMESPACE)
+
+
+class CalculatorPool:
+    """
+    spawn 프로세스 풀 — 시간 초과 시 풀 전체를 종료하고 재생성
+
+    (fork는 로그 출력 스레드 등 부모의 스레드 상태를 복제하므로 사용하지 않음)
+    start() 전(테스트/스크립트)에는 현재 프로세스에서 바로 계산
+    """
+
+    def __init__(self, processes: int, timeout_seconds: float):
+        self.processes = processes
+        self.timeout_seconds = timeout_seconds
+        self._pool: Pool | None = None
+        self._pending: set[asyncio.Future] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def start(self) -> None:
+        self._pool = multiprocessing.get_context("spawn").Pool(self.processes)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def _restart(self) -> None:
+        """실행 중인 계산을 모두 중단 — 같은 풀에서 기다리던 요청도 실패 처리"""
+        self.close()
+        for future in self._pending:
+            if not future.done():
+                future.set_exception(CalculatorError("계산 프로세스가 재시작되었습니다"))
+        self._pending.clear()
+        self.start()
+
+    async def evaluate(self, expression: str) -> int | float:
+        # 검증은 부모 프로세스에서 (거부되는 식은 프로세스 간 통신 없이 즉시 실패)
+        compile_expression(expression)
+        if not self.running:
+            return evaluate_sync(expression)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.add(future)
+
+        def resolve(value):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(value))
+
+        def reject(error):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_exception(error))
+
+        self._pool.apply_async(evaluate_sync, (expression,), callback=resolve, error_callback=reject)
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.error(
+                f"계산 시간 초과 ({self.timeout_seconds}s) — 프로세스 풀 재시작",
+                extra={"extra_data": {"expression": expression[:100]}},
+            )
+            self._restart()
+            raise CalculatorError(f"계산 시간이 초과되었습니다 ({self.timeout_seconds}초)") from None
+        finally:
+            self._pending.discard(future)
+
+
+# 싱글톤 인스턴스 — lifespan에서 start()/close()
+calculator = CalculatorPool(
+    processes=settings.calculator_processes,
+    timeout_seconds=settings.calculator_timeout_seconds,
+)
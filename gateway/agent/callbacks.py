@@ -0,0 +1,155 @@
+"""
+Agent 계측 콜백 — 노드/LLM/도구 단위 소요 시간 수집
+
+LangGraph 실행 config의 callbacks로 전달하면, 서브그래프와 노드 안의
+ChatOllama / tool 호출까지 contextvar로 전파되어 함께 계측됩니다.
+
+수집 항목:
+- node: 그래프 노드별 실행 시간 (서브그래프 내부 노드 포함)
+- llm: LLM 호출 전체 시간, 첫 토큰까지 시간(TTFT)
+- llm_prompt_eval / llm_eval: Ollama 응답 메타데이터의 프롬프트 평가/생성 시간
+- tool: 도구별 실행 시간
+
+사용법:
+    timing = GraphTimingCallback()
+    final_state = await agent.ainvoke(state, config={"callbacks": [timing]})
+    timing.flush(intent=final_state["intent"], model=final_state["model"])
+    response.headers["Server-Timing"] = timing.server_timing()
+"""
+import time
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+
+from core.metrics import metrics_store
+
+# LangGraph 내부 실행 단위(__start__, ChannelWrite 등)에 붙는 태그
+HIDDEN_TAG = "langsmith:hidden"
+
+
+def _ns_to_ms(value) -> float:
+    return value / 1_000_000 if value else 0.0
+
+
+class GraphTimingCallback(BaseCallbackHandler):
+    """
+    요청 1건의 그래프 실행 계측 (요청마다 새 인스턴스 생성)
+
+    - 콜백 중에는 측정값을 버퍼에만 쌓고, flush()에서 최종 intent/model
+      라벨과 함께 metrics_store에 기록 (분류 전 노드도 같은 intent로 집계)
+    - run_inline: 이벤트 루프 스레드에서 바로 호출 (executor 스레드 전환 없음)
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._started_at = time.perf_counter()
+        self._node_starts: dict[UUID, tuple[str, float]] = {}
+        self._llm_runs: dict[UUID, dict] = {}
+        self._tool_starts: dict[UUID, tuple[str, float]] = {}
+
+        self.node_timings: list[tuple[str, float]] = []   # [(node, ms), ...]
+        self.llm_calls: list[dict] = []
+        self.tool_timings: list[tuple[str, float]] = []   # [(tool, ms), ...]
+
+    # ── 노드 ──
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None,
+                       tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        # 노드 실행 단위만 계측 (그래프 자체, 내부 hidden 실행 제외)
+        if name and name == (metadata or {}).get("langgraph_node") and HIDDEN_TAG not in (tags or []):
+            self._node_starts[run_id] = (name, time.perf_counter())
+
+    def _end_node(self, run_id):
+        started = self._node_starts.pop(run_id, None)
+        if started:
+            name, start = started
+            self.node_timings.append((name, (time.perf_counter() - start) * 1000))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    # ── LLM ──
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or kwargs.get("invocation_params", {}).get("model", "")
+        self._llm_runs[run_id] = {
+            "node": metadata.get("langgraph_node", ""),
+            "model": model,
+            "start": time.perf_counter(),
+            "first_token": None,
+        }
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._llm_runs.get(run_id)
+        if run and run["first_token"] is None and token:
+            run["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._llm_runs.pop(run_id, None)
+        if not run:
+            return
+        end = time.perf_counter()
+
+        # Ollama 응답 메타데이터 (duration은 나노초 단위)
+        info = {}
+        if response.generations and response.generations[0]:
+            info = response.generations[0][0].generation_info or {}
+
+        self.llm_calls.append({
+            "node": run["node"],
+            "model": info.get("model") or run["model"],
+            "duration_ms": (end - run["start"]) * 1000,
+            "ttft_ms": (run["first_token"] - run["start"]) * 1000 if run["first_token"] else None,
+            "prompt_tokens": info.get("prompt_eval_count") or 0,
+            "prompt_eval_ms": _ns_to_ms(info.get("prompt_eval_duration")),
+            "eval_tokens": info.get("eval_count") or 0,
+            "eval_ms": _ns_to_ms(info.get("eval_duration")),
+        })
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._llm_runs.pop(run_id, None)
+
+    # ── 도구 ──
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._tool_starts[run_id] = (name, time.perf_counter())
+
+    def _end_tool(self, run_id):
+        started = self._tool_starts.pop(run_id, None)
+        if started:
+            name, start = started
+            self.tool_timings.append((name, (time.perf_counter() - start) * 1000))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id)
+
+    # ── 집계 ──
+
+    def flush(self, intent: str, model: str) -> None:
+        """버퍼에 쌓인 측정값을 intent/model 라벨로 metrics_store에 기록"""
+        for node, ms in self.node_timings:
+            metrics_store.record_stage("node", node, intent, model, ms)
+        for tool_name, ms in self.tool_timings:
+            metrics_store.record_stage("tool", tool_name, intent, model, ms)
+        for call in self.llm_calls:
+            metrics_store.record_llm_call(intent=intent, **call)
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing 헤더 값 — 노드별 합계(재시도 포함) + 전체 그래프 시간
+        예: "input_guard;dur=0.3, classifier;dur=812.4, ..., graph;dur=5321.0"
+        """
+        totals: dict[str, float] = {}
+        for node, ms in self.node_timings:
+            totals[node] = totals.get(node, 0.0) + ms
+        totals["graph"] = (time.perf_counter() - self._started_at) * 1000
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in totals.items())
@@ -0,0 +1,64 @@
+"""
+모델 캐스케이드 — 경량 모델 먼저, 검증에 실패하면 큰 모델로 승격
+
+기존: INTENT_MODEL_MAP이 search / analysis / creative를 항상 qwen2.5:7b로 보냄
+      (상당수는 llama3.2:3b로도 충분히 답할 수 있는 질문)
+
+변경 (CASCADE_ENABLED=true):
+  1. classifier: CASCADE_INTENTS는 model_simple로 시작 (cascade_stage="small")
+  2. output_guard: 경량 모델 응답을 저비용 검증(verify_answer) → 점수가 의도별 기준
+     (CASCADE_ESCALATION_THRESHOLD) 미만이거나 재시도 판정이면 "escalate"
+  3. retry_policy: 같은 재실행 범위(종합만 / 에이전트 / 응답)를 model_complex로 다시 실행
+     (재시도 횟수, 재시도 토큰 예산과는 별개)
+     MODEL_ROUTING_ENABLED면 승격 모델도 model_router.choose()로 선택 — 큰 모델이 과부하라
+     경량 모델이 선택되면 승격하지 않고 경량 모델 응답을 그대로 판정 (escalation_model)
+  4. 판정 결과를 metrics_store에 기록 — 승격률, 절약한 모델 실행 시간, 큰 모델 토큰
+
+비용은 비용 장부(cost_ledger)의 응답 단계 항목으로 계산 (Ollama total_duration, 토큰 수)
+마감 시간이 임박한 요청은 캐스케이드 없이 기존 경량 모델 전략(agent/deadline.py)을 따름
+"""
+from agent.model_router import model_router
+from agent.state import AgentState
+from core.config import settings
+from core.metrics import metrics_store
+
+# 모델에 따라 비용이 달라지는 응답 단계 (분류/검색어 최적화/분해는 항상 경량 모델)
+CASCADE_STEPS = {"llm_node", "result_synthesizer", "synthesizer", "researcher"}
+
+
+def cascade_eligible(intent: str) -> bool:
+    return settings.cascade_enabled and intent in settings.cascade_intents
+
+
+def escalation_threshold(intent: str) -> float:
+    return settings.cascade_escalation_threshold.get(intent, 1.0)
+
+
+def escalation_model(intent: str) -> str:
+    """승격할 모델 — 적응형 라우팅이 경량 모델을 고르면 "" (같은 모델로 다시 생성하는 것은 승격이 아님)"""
+    if not settings.model_routing_enabled:
+        return settings.model_complex
+    model, _ = model_router.choose(intent)
+    return "" if model == settings.model_simple else model
+
+
+def answer_cost(state: AgentState, model: str) -> tuple[float, int]:
+    """model로 실행한 응답 단계의 (모델 실행 시간 ms, 토큰 수) 합계"""
+    duration_ms, tokens = 0.0, 0
+    for entry in state.get("cost_ledger") or []:
+        if entry["step"] in CASCADE_STEPS and entry["model"] == model:
+            duration_ms += entry.get("duration_ms", 0.0)
+            tokens += entry["prompt_tokens"] + entry["completion_tokens"]
+    return duration_ms, tokens
+
+
+def record_small_outcome(state: AgentState, outcome: str) -> None:
+    """경량 모델 응답 판정 — kept(그대로 사용) / escalated(큰 모델로 승격)"""
+    duration_ms, tokens = answer_cost(state, settings.model_simple)
+    metrics_store.record_cascade(state.get("intent", "general"), outcome, duration_ms, tokens)
+
+
+def record_large_answer(state: AgentState) -> None:
+    """승격 후 큰 모델 응답 (절약량 추정의 기준값)"""
+    duration_ms, tokens = answer_cost(state, state.get("model") or settings.model_complex)
+    metrics_store.record_cascade(state.get("intent", "general"), "large", duration_ms, tokens)
@@ -0,0 +1,96 @@
+"""
+요청 마감 시간(deadline) — 라우터에서 정해 AgentState로 그래프 전체에 전달
+
+기존: nginx proxy_read_timeout(300s) 외에는 전체 요청 시간 상한이 없음
+      output_guard → classifier 재시도, creative_agent ↔ tools 루프가 각자 한도까지 실행
+
+변경:
+  - 라우터가 역할별 기본값(REQUEST_DEADLINE_SECONDS_BY_ROLE)과 X-Request-Timeout 헤더 중
+    짧은 쪽으로 state["deadline"] (time.monotonic() 기준 시각) 설정
+  - 노드는 남은 시간을 확인해 저비용 전략 선택 (남은 시간 < DEADLINE_LOW_SECONDS)
+      분해 생략, 두 번째 검색 생략, model_simple 사용, 도구 미장착, 재시도 안 함
+  - LLM 호출은 run_within()으로 남은 시간만큼만 대기 → 초과 시 DeadlineExceeded
+    → 노드는 지금까지의 결과(partial_answer)로 응답하고 deadline_exceeded 표시
+    → output_guard는 재시도 없이 통과/ fallback은 부분 답변 반환
+
+deadline이 없는 state(테스트, 스크립트)는 시간 제한 없음
+"""
+import asyncio
+import math
+import time
+from typing import Awaitable, TypeVar
+
+from agent.state import AgentState
+from core.config import settings
+
+T = TypeVar("T")
+
+# 부분 답변에 포함할 수집 결과 최대 길이
+PARTIAL_MAX_CHARS = 3000
+PARTIAL_PREFIX = "시간 제한으로 답변을 끝까지 완성하지 못했습니다. 지금까지 수집한 내용입니다.\n\n"
+
+
+class DeadlineExceeded(Exception):
+    """요청 마감 시간 초과"""
+
+
+def request_timeout_seconds(role: str, requested: float | None = None) -> float:
+    """역할별 상한과 클라이언트 요청값(X-Request-Timeout) 중 짧은 쪽"""
+    limit = settings.request_deadline_seconds_by_role.get(role, settings.request_deadline_default_seconds)
+    return min(limit, requested) if requested else limit
+
+
+def make_deadline(seconds: float) -> float:
+    return time.monotonic() + seconds
+
+
+def remaining(state: AgentState) -> float:
+    """남은 시간 (초) — deadline이 없으면 무한대"""
+    deadline = state.get("deadline")
+    if not deadline:
+        return math.inf
+    return deadline - time.monotonic()
+
+
+def is_short(state: AgentState) -> bool:
+    """저비용 전략을 써야 할 만큼 시간이 부족한지"""
+    return bool(state.get("deadline_exceeded")) or remaining(state) < settings.deadline_low_seconds
+
+
+def pick_model(state: AgentState) -> str:
+    """시간이 부족하면 경량 모델"""
+    return settings.model_simple if is_short(state) else state["model"]
+
+
+async def run_within(state: AgentState, awaitable: Awaitable[T]) -> T:
+    """
+    남은 시간 안에만 대기 — 초과 시 작업을 취소하고 DeadlineExceeded
+
+    (취소는 진행 중인 Ollama HTTP 요청까지 전파됨)
+    """
+    left = remaining(state)
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded
+    try:
+        return await asyncio.wait_for(awaitable, timeout=None if math.isinf(left) else left)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded from None
+
+
+def partial_answer(state: AgentState) -> str:
+    """
+    마감 시간 초과 시 돌려줄 가장 나은 부분 답변
+
+    1. 이미 생성된 응답 (재시도 전 답변 등)
+    2. 검색/조사 결과 원문 (종합 단계 전에 시간 초과)
+    3. 없으면 빈 문자열 → fallback 안내 메시지
+    """
+    response = (state.get("response") or "").strip()
+    if response:
+        return response
+    results = [r for r in state.get("search_results") or [] if r and "찾지 못했습니다" not in r]
+    if results:
+        return PARTIAL_PREFIX + "\n\n".join(results)[:PARTIAL_MAX_CHARS]
+    return ""
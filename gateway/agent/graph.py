@@ -13,11 +13,15 @@ After:  10+ 노드, 5+ 조건부 분기, 2개 서브그래프
                                               └── general_agent (llm 직접 호출)
                                                     ↓
                                               output_guard ──pass──→ END
-                                              ├── retry → classifier (재시도)
+                                              ├── retry / escalate → retry_policy (실패 유형별로 필요한 부분만)
+                                              │            ├── resynthesize (캐시된 검색/조사 결과로 종합만)
+                                              │            ├── search_agent / analysis_agent (결과가 없을 때)
+                                              │            ├── creative_agent / general_agent
+                                              │            │   (escalate: 경량 모델 응답을 model_complex로 다시 — agent/cascade.py)
+                                              │            └── fallback (토큰 예산 초과)
                                               └── fallback → END
 """
 from langgraph.graph import StateGraph, START, END
-from langgraph.prebuilt import ToolNode, tools_condition
 
 from agent.state import AgentState
 from agent.nodes.input_guard import input_guard_node
@@ -25,9 +29,10 @@ from agent.nodes.classifier import classifier_node
 from agent.nodes.llm_node import llm_node
 from agent.nodes.output_guard import output_guard_node
 from agent.nodes.fallback_node import fallback_node
-from agent.tool import ALL_TOOLS
-from agent.subgraphs.search_subgraph import create_search_subgraph
-from agent.subgraphs.analysis_subgraph import create_analysis_subgraph
+from agent.tool_executor import tool_executor_node
+from agent.retry_policy import retry_policy_node, retry_router
+from agent.subgraphs.search_subgraph import create_search_subgraph, result_synthesizer_node
+from agent.subgraphs.analysis_subgraph import create_analysis_subgraph, synthesizer_node
 
 
 # ── 서브그래프 인스턴스 생성 (싱글톤) ──
@@ -44,8 +49,13 @@ async def search_agent_node(state: AgentState) -> dict:
         "response": result.get("response", ""),
         "search_results": result.get("search_results", []),
         "sub_queries": result.get("sub_queries", []),
+        "model": result.get("model", state["model"]),
         "prompt_tokens": result.get("prompt_tokens", 0),
-        "completion_tokens": result.get("completion_tokens", 0)
+        "completion_tokens": result.get("completion_tokens", 0),
+        "deadline_exceeded": result.get("deadline_exceeded", False),
+        "guard_rejected": result.get("guard_rejected", False),
+        # 서브그래프 결과의 장부에는 입력 state의 항목도 들어 있으므로 새 항목만
+        "cost_ledger": result.get("cost_ledger", [])[len(state.get("cost_ledger") or []):],
     }
 
 
@@ -57,11 +67,23 @@ async def analysis_agent_node(state: AgentState) -> dict:
         "response": result.get("response", ""),
         "search_results": result.get("search_results", []),
         "sub_queries": result.get("sub_queries", []),
+        "model": result.get("model", state["model"]),
         "prompt_tokens": result.get("prompt_tokens", 0),
-        "completion_tokens": result.get("completion_tokens", 0)
+        "completion_tokens": result.get("completion_tokens", 0),
+        "deadline_exceeded": result.get("deadline_exceeded", False),
+        "guard_rejected": result.get("guard_rejected", False),
+        # 서브그래프 결과의 장부에는 입력 state의 항목도 들어 있으므로 새 항목만
+        "cost_ledger": result.get("cost_ledger", [])[len(state.get("cost_ledger") or []):],
     }
 
 
+async def resynthesize_node(state: AgentState) -> dict:
+    """재시도 — 캐시된 search_results / sub_queries로 서브그래프의 마지막 종합 단계만 실행"""
+    if state.get("intent") == "analysis":
+        return await synthesizer_node(state)
+    return await result_synthesizer_node(state)
+
+
 async def blocked_response_node(state: AgentState) -> dict:
     """차단된 입력에 대한 응답 생성"""
     return {
@@ -102,8 +124,8 @@ def output_quality_router(state: AgentState) -> str:
     
     if quality == "pass":
         return END
-    elif quality == "retry":
-        return "classifier"   # 재시도: 다시 분류부터
+    elif quality in ("retry", "escalate"):
+        return "retry_policy"   # 재시도 / 캐스케이드 승격: 실패 유형별로 다시 실행할 부분 결정
     else:  # fallback
         return "fallback"
 
@@ -138,12 +160,16 @@ def create_graph():
 
     graph.add_node("creative_agent", llm_node)               # Tool Calling 지원
     graph.add_node("general_agent", llm_node)                # 직접 응답
-    graph.add_node("tools", ToolNode(ALL_TOOLS))             # 도구 실행기
+    graph.add_node("tools", tool_executor_node)              # 도구 실행기 (동시 실행 + 시간 제한)
     
     # Output 검증
     graph.add_node("output_guard", output_guard_node)
     graph.add_node("fallback", fallback_node)
     
+    # 재시도 정책
+    graph.add_node("retry_policy", retry_policy_node)
+    graph.add_node("resynthesize", resynthesize_node)
+    
     # ═══ 엣지 연결 ═══
     
     # 1. START → Input Guard
@@ -174,7 +200,12 @@ def create_graph():
     
     # 8. Output Guard → (통과 / 재시도 / Fallback)
     graph.add_conditional_edges("output_guard", output_quality_router,
-        ["classifier", "fallback", END])
+        ["retry_policy", "fallback", END])
+    
+    # 8-1. 재시도 정책 → (종합만 / 에이전트 재실행 / 응답 재생성 / Fallback)
+    graph.add_conditional_edges("retry_policy", retry_router,
+        ["resynthesize", "search_agent", "analysis_agent", "creative_agent", "general_agent", "fallback"])
+    graph.add_edge("resynthesize", "output_guard")
     
     # 9. Fallback → END
     graph.add_edge("fallback", END)
@@ -0,0 +1,195 @@
+"""
+적응형 모델 라우팅 — 모델별 최근 지연/오류율/동시 실행 수로 의도별 모델 선택
+
+기존: classifier_node가 INTENT_MODEL_MAP을 그대로 사용
+  → qwen2.5:7b 앞에 20초짜리 대기열이 쌓여 있어도 search/analysis/creative는 계속 7b로
+
+변경 (MODEL_ROUTING_ENABLED=true):
+  1. ModelStatsCallback이 모든 LLM 호출의 시작/종료를 기록 (그래프 config의 callbacks)
+     - 최근 MODEL_STATS_WINDOW_SECONDS 동안의 호출 지연(대기열 포함)과 오류 여부
+     - 지금 실행 중인 호출 수 (in_flight)
+  2. 후보 = INTENT_MODEL_MAP의 기본 모델 + MODEL_ROUTING_FALLBACKS[intent] (선호 순서)
+  3. 선호 순서대로 건강한 첫 모델 선택 — 건강하지 않음:
+     - slo:       p95 지연 > MODEL_LATENCY_SLO_MS[model]
+     - errors:    오류율 > MODEL_MAX_ERROR_RATE
+     - saturated: in_flight ≥ MODEL_MAX_IN_FLIGHT[model]
+     (표본이 MODEL_STATS_MIN_SAMPLES 미만이면 지연/오류율은 판단하지 않음)
+  4. 모두 건강하지 않으면 예상 대기(p95 × (in_flight + 1))가 가장 짧은 모델
+  5. 결정(intent, model, reason)과 모델별 상태를 metrics_store에 기록
+
+통계는 워커 프로세스별 (각 워커가 자기가 보낸 호출로 판단)
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agent.nodes.intent_schema import INTENT_MODEL_MAP
+from core.config import settings
+from core.metrics import metrics_store
+
+# 종료 이벤트 없이 남은 호출을 실행 중으로 보지 않는 시간 (초)
+STALE_RUN_SECONDS = 600.0
+
+
+class ModelStats:
+    """모델 1개의 최근 호출 통계"""
+
+    def __init__(self, window_seconds: float, max_samples: int = 1000):
+        self.window_seconds = window_seconds
+        self.samples: deque[tuple[float, float, bool]] = deque(maxlen=max_samples)  # (종료 시각, ms, 성공)
+        self.running: dict[object, float] = {}       # {run 키: 시작 시각}
+
+    def _prune(self, now: float) -> None:
+        while self.samples and now - self.samples[0][0] > self.window_seconds:
+            self.samples.popleft()
+        for key in [k for k, started in self.running.items() if now - started > STALE_RUN_SECONDS]:
+            del self.running[key]
+
+    def snapshot(self, now: float) -> dict:
+        """{"samples", "p95_ms", "error_rate", "in_flight"} — 표본이 없으면 p95_ms / error_rate는 0"""
+        self._prune(now)
+        latencies = sorted(ms for _, ms, _ in self.samples)
+        errors = sum(1 for _, _, ok in self.samples if not ok)
+        p95 = latencies[min(len(latencies) - 1, math.ceil(len(latencies) * 0.95) - 1)] if latencies else 0.0
+        return {
+            "samples": len(latencies),
+            "p95_ms": round(p95, 1),
+            "error_rate": round(errors / len(latencies), 3) if latencies else 0.0,
+            "in_flight": len(self.running),
+        }
+
+
+class ModelRouter:
+    """모델별 통계 보관 + 의도별 모델 선택 (clock은 테스트용)"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._stats: dict[str, ModelStats] = {}
+
+    def stats(self, model: str) -> ModelStats:
+        if model not in self._stats:
+            self._stats[model] = ModelStats(settings.model_stats_window_seconds)
+        return self._stats[model]
+
+    # ── 호출 기록 ──
+
+    def started(self, key, model: str) -> None:
+        self.stats(model).running[key] = self.clock()
+
+    def finished(self, key, model: str, ok: bool) -> None:
+        stats = self.stats(model)
+        started = stats.running.pop(key, None)
+        if started is not None:
+            now = self.clock()
+            stats.samples.append((now, (now - started) * 1000, ok))
+
+    def abandoned(self, key, model: str) -> None:
+        """취소된 호출 (마감 시간, 생성 조기 중단) — 모델 상태와 무관하므로 표본에서 제외"""
+        self.stats(model).running.pop(key, None)
+
+    @asynccontextmanager
+    async def track(self, model: str):
+        """콜백을 거치지 않는 호출용 — async with model_router.track(model): ..."""
+        key = object()
+        self.started(key, model)
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            self.abandoned(key, model)
+            raise
+        except Exception:
+            self.finished(key, model, ok=False)
+            raise
+        else:
+            self.finished(key, model, ok=True)
+
+    # ── 선택 ──
+
+    def candidates(self, intent: str) -> list[str]:
+        primary = INTENT_MODEL_MAP.get(intent, settings.model_complex)
+        models = [primary]
+        for model in settings.model_routing_fallbacks.get(intent, []):
+            if model not in models:
+                models.append(model)
+        return models
+
+    def unhealthy_reason(self, model: str, snapshot: dict) -> str:
+        """건강하면 "" / slo / errors / saturated"""
+        max_in_flight = settings.model_max_in_flight.get(model)
+        if max_in_flight is not None and snapshot["in_flight"] >= max_in_flight:
+            return "saturated"
+        if snapshot["samples"] < settings.model_stats_min_samples:
+            return ""
+        if snapshot["error_rate"] > settings.model_max_error_rate:
+            return "errors"
+        slo = settings.model_latency_slo_ms.get(model, settings.model_latency_slo_default_ms)
+        if snapshot["p95_ms"] > slo:
+            return "slo"
+        return ""
+
+    def choose(self, intent: str) -> tuple[str, str]:
+        """
+        (모델, 사유)
+
+        사유: preferred (기본 모델이 건강함) / degraded_{slo|errors|saturated} (기본 모델을 피함)
+              / least_loaded (후보가 모두 건강하지 않음)
+        """
+        now = self.clock()
+        models = self.candidates(intent)
+        snapshots = {model: self.stats(model).snapshot(now) for model in models}
+        for model, snapshot in snapshots.items():
+            metrics_store.model_health[model] = snapshot
+
+        primary_reason = self.unhealthy_reason(models[0], snapshots[models[0]])
+        if not primary_reason:
+            model, reason = models[0], "preferred"
+        else:
+            healthy = [m for m in models[1:] if not self.unhealthy_reason(m, snapshots[m])]
+            if healthy:
+                model, reason = healthy[0], f"degraded_{primary_reason}"
+            else:
+                model = min(models, key=lambda m: snapshots[m]["p95_ms"] * (snapshots[m]["in_flight"] + 1))
+                reason = "least_loaded"
+
+        metrics_store.record_model_route(intent, model, reason)
+        return model, reason
+
+
+class ModelStatsCallback(BaseCallbackHandler):
+    """모든 LLM 호출을 ModelRouter에 기록 (GraphTimingCallback과 함께 그래프 config에 전달)"""
+
+    run_inline = True
+
+    def __init__(self, router: ModelRouter):
+        self.router = router
+        self._models: dict[UUID, str] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or kwargs.get("invocation_params", {}).get("model", "")
+        if model:
+            self._models[run_id] = model
+            self.router.started(run_id, model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model = self._models.pop(run_id, None)
+        if model:
+            self.router.finished(run_id, model, ok=True)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        model = self._models.pop(run_id, None)
+        if not model:
+            return
+        if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            self.router.abandoned(run_id, model)
+        else:
+            self.router.finished(run_id, model, ok=False)
+
+
+# 싱글톤 인스턴스 (워커 프로세스별)
+model_router = ModelRouter()
+model_stats_callback = ModelStatsCallback(model_router)
@@ -5,18 +5,26 @@ LLM 기반 Intent Classifier 노드
 변경: LLM Structured Output으로 의도를 4가지(search/analysis/creative/general)로 분류
       → 의도에 따라 적절한 모델과 복잡도를 자동 결정
 """
-import json
-from langchain_ollama import ChatOllama
+import time
 from langchain_core.messages import SystemMessage, HumanMessage
 from agent.state import AgentState
+from agent.cascade import cascade_eligible
+from agent.deadline import is_short, run_within
+from agent.intent_batcher import intent_batcher
+from agent.model_router import model_router
+from agent.retry_policy import ledger_entry
+from agent.structured_llm import classification_schema, internal_llm, num_predict_cap, parse_json_output
 from agent.nodes.intent_schema import (
     IntentClassification,
     INTENT_MODEL_MAP,
     INTENT_COMPLEXITY_MAP,
+    response_format,
 )
 from core.config import settings
+from core.metrics import metrics_store
 
 # 분류기 전용 시스템 프롬프트 — 경량 모델이 빠르게 분류할 수 있도록 간결하게
+# (응답 형식 줄은 CLASSIFIER_REASONING에 따라 response_format()으로 붙임)
 CLASSIFIER_SYSTEM_PROMPT = """당신은 사용자 질문의 의도를 분류하는 분류기입니다.
 반드시 아래 JSON 형식으로만 답변하세요. 다른 텍스트를 포함하지 마세요.
 
@@ -27,7 +35,7 @@ CLASSIFIER_SYSTEM_PROMPT = """당신은 사용자 질문의 의도를 분류하
 - "general": 인사, 간단한 지식 질문, 잡담
 
 응답 형식 (JSON만):
-{"intent": "분류값", "confidence": 0.0~1.0, "reasoning": "근거"}"""
+"""
 
 
 async def classifier_node(state: AgentState) -> dict:
@@ -36,52 +44,70 @@ async def classifier_node(state: AgentState) -> dict:
     
     흐름:
     1. 경량 모델(llama3.2:3b)로 빠르게 의도 분류
+       (CLASSIFIER_BATCH_ENABLED면 동시 요청과 묶어서 — 배치에서 얻지 못하면 단건 호출)
     2. JSON 파싱 → IntentClassification 검증
     3. 확신도 < 0.7이면 general로 폴백
     4. 의도 → 모델/복잡도 매핑 결과를 state에 기록
+       (캐스케이드 대상 의도는 경량 모델로 먼저 — output_guard가 승격 여부 판단)
+       (모델 라우팅이 켜져 있으면 모델별 최근 지연/부하로 후보 중 선택 — agent/model_router.py)
     """
     query = state["query"]
+    ledger = []
+    started = time.perf_counter()
+    mode = "single"
     
     try:
-        # 경량 모델로 빠르게 분류 — 응답 시간 최소화
-        classifier_llm = ChatOllama(
-            model=settings.model_simple,  # llama3.2:3b
-            base_url=settings.ollama_url,
-            temperature=0.0,  # 결정론적 분류
-        )
-        
-        messages = [
-            SystemMessage(content=CLASSIFIER_SYSTEM_PROMPT),
-            HumanMessage(content=f"다음 질문을 분류하세요: {query}"),
-        ]
-        
-        response = await classifier_llm.ainvoke(messages)
-        raw_text = response.content.strip()
-        
-        # JSON 파싱 시도 — LLM이 ```json 블록으로 감쌀 수 있으므로 정리
-        if "```" in raw_text:
-            raw_text = raw_text.split("```")[1]
-            if raw_text.startswith("json"):
-                raw_text = raw_text[4:]
-            raw_text = raw_text.strip()
-        
-        parsed = json.loads(raw_text)
-        classification = IntentClassification(**parsed)
+        classification = None
+        if settings.classifier_batch_enabled:
+            classification, batch_response, batch_size = await run_within(state, intent_batcher.classify(query))
+            if classification is not None:
+                mode = "batched"
+                ledger = ledger_entry(state, "classifier", settings.model_simple, batch_response, share=batch_size)
+            else:
+                mode = "fallback"
+
+        if classification is None:
+            # 경량 모델로 빠르게 분류 — 스키마 제약 출력 + 생성 토큰 상한 (agent/structured_llm.py)
+            classifier_llm = internal_llm(
+                classification_schema(settings.classifier_reasoning), num_predict_cap("classifier"),
+            )
+            
+            messages = [
+                SystemMessage(content=CLASSIFIER_SYSTEM_PROMPT + response_format(settings.classifier_reasoning)),
+                HumanMessage(content=f"다음 질문을 분류하세요: {query}"),
+            ]
+            
+            response = await run_within(state, classifier_llm.ainvoke(messages))
+            ledger = ledger_entry(state, "classifier", settings.model_simple, response)
+            # JSON 파싱 → 검증 (실패하면 None, 파싱 실패율/토큰 수 기록)
+            classification = parse_json_output(
+                "classifier", response, lambda parsed: IntentClassification(**parsed),
+            )
         
-        # 확신도가 낮으면 general로 폴백
-        intent = classification.intent
-        confidence = classification.confidence
-        if confidence < 0.7:
-            intent = "general"
+        # 파싱 실패 / 확신도가 낮으면 general로 폴백
+        intent, confidence = "general", 0.0
+        if classification is not None:
+            confidence = classification.confidence
+            if confidence >= 0.7:
+                intent = classification.intent
         
-    except (json.JSONDecodeError, Exception):
-        # 파싱 실패 시 안전하게 general로 폴백
+    except Exception:
+        # 호출 실패 / 마감 시간 초과 시 안전하게 general로 폴백
         intent = "general"
         confidence = 0.0
-        classification = None
+    metrics_store.record_classification(mode, (time.perf_counter() - started) * 1000)
     
     # 의도 → 모델/복잡도 매핑
     model = INTENT_MODEL_MAP.get(intent, settings.model_complex)
+    cascade_stage = ""
+    if is_short(state):
+        model = settings.model_simple   # 남은 시간이 부족하면 경량 모델
+    elif cascade_eligible(intent):
+        # 캐스케이드가 적응형 라우팅보다 우선 — 경량 모델로 시작하고, 승격할 때 라우팅으로 모델 선택
+        model = settings.model_simple
+        cascade_stage = "small"
+    elif settings.model_routing_enabled:
+        model, _ = model_router.choose(intent)
     complexity = INTENT_COMPLEXITY_MAP.get(intent, "simple")
     
     return {
@@ -89,4 +115,6 @@ async def classifier_node(state: AgentState) -> dict:
         "confidence": confidence,
         "complexity": complexity,
         "model": model,
+        "cascade_stage": cascade_stage,
+        "cost_ledger": ledger,
     }
\ No newline at end of file
@@ -5,6 +5,7 @@ Fallback 응답 노드
 사용자에게 친화적인 메시지와 함께 문제 상황을 안내합니다.
 """
 from agent.state import AgentState
+from agent.deadline import partial_answer, remaining
 
 
 async def fallback_node(state: AgentState) -> dict:
@@ -17,9 +18,15 @@ async def fallback_node(state: AgentState) -> dict:
     동작:
     - 의도(intent)에 맞는 안내 메시지 반환
     - 에러가 아닌 '도움 안내' 톤으로 작성
+    - 마감 시간 초과로 온 경우 수집한 결과가 있으면 그것을 부분 답변으로 반환
     """
     intent = state.get("intent", "general")
     query = state["query"]
+
+    if state.get("deadline_exceeded") or remaining(state) <= 0:
+        partial = partial_answer(state)
+        if partial:
+            return {"response": partial, "deadline_exceeded": True}
     
     fallback_messages = {
         "search": (
@@ -24,7 +24,8 @@ class IntentClassification(BaseModel):
         description="분류 확신도 (0.0 ~ 1.0). 0.7 미만이면 general로 폴백"
     )
     reasoning: str = Field(
-        description="왜 이 의도로 분류했는지 간단한 근거 (한국어)"
+        default="",
+        description="왜 이 의도로 분류했는지 간단한 근거 (한국어, CLASSIFIER_REASONING=false면 생성하지 않음)"
     )
 
 
@@ -43,3 +44,24 @@ INTENT_COMPLEXITY_MAP = {
     "creative": "complex",
     "general": "simple",
 }
+
+
+def response_format(include_reasoning: bool, batch: bool = False) -> str:
+    """분류기 프롬프트의 응답 형식 줄 (reasoning 포함 여부에 맞춰)"""
+    fields = '"intent": "분류값", "confidence": 0.0~1.0'
+    if include_reasoning:
+        fields += ', "reasoning": "근거"'
+    if batch:
+        return f'{{"results": [{{"id": 질문번호, {fields}}}, ...]}}'
+    return f"{{{fields}}}"
+
+
+def strip_code_fence(text: str) -> str:
+    """LLM이 JSON을 ```json 블록으로 감싼 경우 본문만"""
+    text = text.strip()
+    if "```" in text:
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+        text = text.strip()
+    return text
@@ -8,6 +8,10 @@ from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage
 from agent.state import AgentState
 from agent.tool import ALL_TOOLS
+from agent.tool_executor import budget_exhausted
+from agent.deadline import DeadlineExceeded, is_short, partial_answer, pick_model, run_within
+from agent.retry_policy import ledger_entry, with_retry_hint
+from agent.stream_guard import generate_guarded
 from core.config import settings
 
 # 시스템 프롬프트: 의도별로 약간의 행동 차이를 가짐
@@ -43,33 +47,43 @@ async def llm_node(state: AgentState) -> dict:
     1. 의도(intent)에 맞는 시스템 프롬프트 선택
     2. bind_tools로 전체 도구를 LLM에 장착
     3. LLM이 도구 호출 여부를 자율 판단
-    4. tool_calls가 있으면 → graph의 ToolNode로 분기됨
+    4. tool_calls가 있으면 → graph의 도구 실행기(tool_executor)로 분기됨
     5. tool_calls가 없으면 → output_guard로 이동
     """
     intent = state.get("intent", "general")
     
-    # 1. Ollama 객체 생성
+    # 1. Ollama 객체 생성 (마감 시간이 임박하면 경량 모델)
+    model = pick_model(state)
     llm = ChatOllama(
-        model=state["model"],
+        model=model,
         base_url=settings.ollama_url,
     )
     
-    # 2. LLM에게 모든 도구를 장착 (bind)
-    llm_with_tools = llm.bind_tools(ALL_TOOLS)
+    # 2. LLM에게 모든 도구를 장착 (bind) — 도구 예산을 다 썼거나 시간이 부족하면 도구 없이 답변
+    no_tools = budget_exhausted(state) or is_short(state)
+    llm_with_tools = llm if no_tools else llm.bind_tools(ALL_TOOLS)
     
     # 3. 의도에 맞는 시스템 프롬프트 주입
-    system_prompt = SYSTEM_PROMPTS.get(intent, DEFAULT_SYSTEM_PROMPT)
+    system_prompt = with_retry_hint(state, SYSTEM_PROMPTS.get(intent, DEFAULT_SYSTEM_PROMPT))
     messages = state["messages"]
     if not any(hasattr(m, "type") and m.type == "system" for m in messages):
         messages = [SystemMessage(content=system_prompt)] + list(messages)
     
-    # 4. LLM 호출
-    response = await llm_with_tools.ainvoke(messages)
+    # 4. LLM 호출 (남은 시간 안에서만, 앞부분이 거절이면 생성 중단)
+    try:
+        response = await run_within(state, generate_guarded(state, llm_with_tools, messages, "llm_node"))
+    except DeadlineExceeded:
+        return {"response": partial_answer(state), "deadline_exceeded": True, "model": model}
+    if response is None:
+        return {"response": "", "guard_rejected": True, "model": model}
     
     # 5. 상태 업데이트
     return {
         "messages": [response],
+        "model": model,
+        "guard_rejected": False,
         "response": response.content if isinstance(response.content, str) else "",
         "prompt_tokens": response.usage_metadata.get("input_tokens", 0) if response.usage_metadata else 0,
         "completion_tokens": response.usage_metadata.get("output_tokens", 0) if response.usage_metadata else 0,
+        "cost_ledger": ledger_entry(state, "llm_node", model, response),
     }
\ No newline at end of file
@@ -4,8 +4,15 @@ Output Guard 노드 — 출력 품질 검증
 LLM 응답이 사용자에게 전달되기 전에 품질을 검증합니다.
 빈 응답, 너무 짧은 응답, 검색 의도인데 정보가 없는 경우 등을 감지하여
 재시도하거나 Fallback으로 분기합니다.
+
+모델 캐스케이드(agent/cascade.py)가 켜져 있으면 경량 모델 응답을 verify_answer()로
+채점해 의도별 기준 미만이면 큰 모델로 승격(escalate)합니다.
 """
+import re
+
 from agent.state import AgentState
+from agent.cascade import escalation_model, escalation_threshold, record_large_answer, record_small_outcome
+from agent.deadline import is_short
 
 # 재시도 최대 횟수
 MAX_RETRY_COUNT = 2
@@ -24,19 +31,88 @@ LOW_QUALITY_INDICATORS = [
     "I'm sorry",
 ]
 
+# 캐스케이드 검증 — 의도별로 "충분한 답변"으로 보는 길이 (문자 수)
+EXPECTED_ANSWER_CHARS = {"search": 150, "analysis": 400, "creative": 200}
+# 확신 없는 답변 표현 (개당 감점, 최대 3개)
+HEDGE_PHRASES = ["잘 모르", "확실하지 않", "추측", "아마도"]
+# 경량 모델이 한국어 답변에 한자를 섞는 경우 (품질 저하 신호)
+_HANJA = re.compile(r"[\u4e00-\u9fff]")
+
+
+def verify_answer(state: AgentState) -> float:
+    """
+    캐스케이드용 저비용 검증 — 경량 모델 응답의 점수 (0.0 ~ 1.0)
+
+    LLM 호출 없는 휴리스틱:
+    - 길이: 의도별 기대 길이 대비 비율 (초과분은 1.0)
+    - 짧은 거절성 응답 ×0.3, 확신 없는 표현 개당 -0.15, 한자 비율 5% 초과 -0.5
+    """
+    response = (state.get("response") or "").strip()
+    if not response:
+        return 0.0
+    intent = state.get("intent", "general")
+
+    score = min(1.0, len(response) / EXPECTED_ANSWER_CHARS.get(intent, 100))
+    response_lower = response.lower()
+    if len(response) < 200 and any(i.lower() in response_lower for i in LOW_QUALITY_INDICATORS):
+        score *= 0.3
+    hedges = sum(1 for phrase in HEDGE_PHRASES if phrase in response)
+    score -= 0.15 * min(hedges, 3)
+    if len(_HANJA.findall(response)) / len(response) > 0.05:
+        score -= 0.5
+    return max(0.0, min(1.0, score))
+
 
 async def output_guard_node(state: AgentState) -> dict:
     """
     출력 품질 검증 노드
     
     검증 로직:
+    0. 생성 중 점진적 검증(stream_guard)에서 거절로 판정되어 중단됐는지 체크
     1. 응답이 비어있거나 너무 짧은지 체크
     2. 검색 의도(search)인데 유용한 정보가 없는 경우 체크
     3. 재시도 횟수가 MAX_RETRY_COUNT 이상이면 Fallback으로 분기
+    4. 마감 시간이 임박했으면 재시도하지 않음 (응답이 있으면 통과, 없으면 Fallback)
+    5. 캐스케이드 경량 모델 응답이면 재시도 대신 승격, 통과여도 점수가 기준 미만이면 승격
+       (승격할 모델은 적응형 라우팅으로 선택 — 큰 모델이 과부하면 승격하지 않음)
     
     Returns:
-        output_quality: "pass" | "retry" | "fallback"
+        output_quality: "pass" | "retry" | "escalate" | "fallback"
+        failure_reason: retry 사유 ("empty" | "low_quality") — 재시도 방식은 retry_policy가 결정
     """
+    # 마감 시간 임박/초과 → 재시도(분류부터 다시 실행)할 시간 없음 — 승격도 하지 않음
+    if is_short(state):
+        response = state.get("response", "")
+        return {
+            "output_quality": "pass" if response and response.strip() else "fallback",
+            "retry_count": state.get("retry_count", 0),
+        }
+
+    verdict = _judge(state)
+    stage = state.get("cascade_stage")
+    if stage == "small":
+        quality = verdict["output_quality"]
+        intent = state.get("intent", "general")
+        if quality == "retry" or (quality == "pass" and verify_answer(state) < escalation_threshold(intent)):
+            target = escalation_model(intent)
+            if target:
+                # 재시도 횟수는 그대로 — 승격은 재시도 예산과 별개
+                record_small_outcome(state, "escalated")
+                return {
+                    "output_quality": "escalate",
+                    "retry_count": state.get("retry_count", 0),
+                    "failure_reason": verdict.get("failure_reason", "low_quality"),
+                    "model": target,
+                }
+        if quality == "pass":
+            record_small_outcome(state, "kept")
+    elif stage == "escalated" and verdict["output_quality"] == "pass":
+        record_large_answer(state)
+    return verdict
+
+
+def _judge(state: AgentState) -> dict:
+    """통과 / 재시도 / Fallback 판정 (캐스케이드와 무관한 기본 검증)"""
     response = state.get("response", "")
     intent = state.get("intent", "general")
     retry_count = state.get("retry_count", 0)
@@ -48,11 +124,20 @@ async def output_guard_node(state: AgentState) -> dict:
             "retry_count": retry_count,
         }
     
+    # 생성 중 앞부분이 거절로 판정되어 중단됨 (agent/stream_guard.py)
+    if state.get("guard_rejected"):
+        return {
+            "output_quality": "retry",
+            "retry_count": retry_count + 1,
+            "failure_reason": "low_quality",
+        }
+    
     # 빈 응답 또는 너무 짧은 응답
     if not response or len(response.strip()) < MIN_RESPONSE_LENGTH:
         return {
             "output_quality": "retry",
             "retry_count": retry_count + 1,
+            "failure_reason": "empty",
         }
     
     # 검색 의도인데 실질 정보가 없는 경우
@@ -68,6 +153,7 @@ async def output_guard_node(state: AgentState) -> dict:
             return {
                 "output_quality": "retry",
                 "retry_count": retry_count + 1,
+                "failure_reason": "low_quality",
             }
     
     # 검증 통과
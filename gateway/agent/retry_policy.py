@@ -0,0 +1,168 @@
+"""
+재시도 정책 — 실패 유형별로 다시 실행할 부분만 선택
+
+기존: output_guard가 retry를 내리면 항상 classifier로 돌아감
+  → search_agent의 짧은 답변 하나 때문에 재분류 + 검색어 최적화 + DuckDuckGo 검색 2번 + 종합을 전부 반복
+  → 요청 p99의 가장 큰 원인
+
+변경: retry_policy_node가 실패 사유(failure_reason)와 의도, 지금까지의 결과로 방식 결정
+  - resynthesize: 캐시된 search_results / sub_queries로 마지막 종합 단계만 다시 실행
+                  (search / analysis, 수집 결과가 있을 때)
+  - rerun_agent:  수집 결과 자체가 없을 때만 해당 에이전트 서브그래프를 다시 실행 (재분류 없음)
+  - respond:      creative / general — 응답 노드만 다시 실행
+  - fallback:     토큰 예산 초과
+  모든 방식에 실패 사유별 프롬프트 보정(retry_hint)을 붙이고, 두 번째 재시도부터는
+  경량 모델을 model_complex로 올림
+  실패한 시도가 messages에 남긴 AI 응답 / 도구 호출 결과는 RemoveMessage로 삭제
+  (llm_node가 거절된 답변으로 끝나는 대화 기록을 이어서 생성하지 않도록)
+
+모델 캐스케이드 승격(output_quality="escalate", agent/cascade.py)도 같은 방식 선택을 쓰되
+처음부터 model_complex로 실행하고, 재시도 토큰 예산 / 재시도 메트릭에는 포함하지 않음
+
+비용 장부 (state["cost_ledger"]):
+  LLM을 호출하는 노드마다 ledger_entry()로 토큰 사용량/모델 실행 시간을 남김 (attempt = 당시 retry_count)
+  재시도(attempt ≥ 1)에 쓴 토큰 + 이번 재시도 예상 비용이 RETRY_TOKEN_BUDGET을 넘으면 fallback
+  예상 비용 = 다시 실행할 단계들이 직전에 쓴 토큰 (장부에 없으면 RETRY_DEFAULT_ESTIMATE_TOKENS)
+"""
+from langchain_core.messages import RemoveMessage
+
+from agent.state import AgentState
+from core.config import settings
+from core.metrics import metrics_store
+
+# 방식별로 다시 실행되는 단계 (비용 장부의 step 이름)
+SYNTHESIS_STEPS = {"search": ("result_synthesizer",), "analysis": ("synthesizer",)}
+AGENT_STEPS = {
+    "search": ("query_refiner", "result_synthesizer"),
+    "analysis": ("decomposer", "researcher", "synthesizer"),
+}
+RESPOND_STEPS = ("llm_node",)
+
+# 실패 사유별 프롬프트 보정
+RETRY_HINTS = {
+    "empty": "이전 답변이 비어 있거나 너무 짧았습니다. 질문에 대해 구체적이고 완결된 답변을 작성하세요.",
+    "low_quality": (
+        "이전 답변이 '모른다'는 내용뿐이었습니다. 주어진 자료에 있는 정보를 최대한 활용해 답변하고, "
+        "부족한 부분만 짧게 언급하세요."
+    ),
+}
+
+
+def ledger_entry(state: AgentState, step: str, model: str, response, share: int = 1) -> list[dict]:
+    """
+    LLM 응답 1건의 비용 장부 항목 (노드 반환값의 cost_ledger에 그대로 사용)
+
+    duration_ms: Ollama 응답 메타데이터의 total_duration (모델 실행 시간, 네트워크 제외)
+    share: 여러 요청이 호출 1건을 나눠 쓴 경우 요청 수 (배치 분류 — 비용을 균등 배분)
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    metadata = getattr(response, "response_metadata", None) or {}
+    return [{
+        "step": step,
+        "model": model,
+        "attempt": state.get("retry_count") or 0,
+        "prompt_tokens": usage.get("input_tokens", 0) // share,
+        "completion_tokens": usage.get("output_tokens", 0) // share,
+        "duration_ms": (metadata.get("total_duration") or 0) / 1_000_000 / share,
+    }]
+
+
+def with_retry_hint(state: AgentState, system_prompt: str) -> str:
+    """재시도 중이면 시스템 프롬프트에 실패 사유별 보정 지시 추가"""
+    hint = state.get("retry_hint")
+    if hint and state.get("retry_count"):
+        return f"{system_prompt}\n\n[재시도] {hint}"
+    return system_prompt
+
+
+def _tokens(entry: dict) -> int:
+    return entry["prompt_tokens"] + entry["completion_tokens"]
+
+
+def retry_tokens_spent(ledger: list[dict]) -> int:
+    """재시도에 쓴 토큰 합계"""
+    return sum(_tokens(e) for e in ledger if e["attempt"] > 0)
+
+
+def estimate_tokens(ledger: list[dict], steps: tuple[str, ...]) -> int:
+    """steps를 다시 실행할 때 예상 토큰 — 각 단계가 가장 최근 시도에서 쓴 토큰 합계"""
+    latest: dict[str, int] = {}
+    for entry in ledger:
+        if entry["step"] in steps:
+            latest[entry["step"]] = max(latest.get(entry["step"], 0), entry["attempt"])
+    total = sum(
+        _tokens(entry) for entry in ledger
+        if entry["step"] in latest and entry["attempt"] == latest[entry["step"]]
+    )
+    return total or settings.retry_default_estimate_tokens
+
+
+def _has_results(state: AgentState) -> bool:
+    return any(r and "찾지 못했습니다" not in r for r in state.get("search_results") or [])
+
+
+def discard_attempt(state: AgentState) -> list[RemoveMessage]:
+    """마지막 사용자 메시지 이후에 쌓인 메시지(직전 시도의 AI 응답, 도구 호출/결과) 삭제 목록"""
+    messages = state.get("messages") or []
+    last_human = max((i for i, m in enumerate(messages) if m.type == "human"), default=len(messages))
+    return [RemoveMessage(id=m.id) for m in messages[last_human + 1:] if m.id]
+
+
+def plan_retry(state: AgentState) -> tuple[str, tuple[str, ...]]:
+    """(재시도 방식, 다시 실행될 단계) — 예산 확인 전"""
+    intent = state.get("intent", "general")
+    if intent in SYNTHESIS_STEPS:
+        if _has_results(state):
+            return "resynthesize", SYNTHESIS_STEPS[intent]
+        return "rerun_agent", AGENT_STEPS[intent]
+    return "respond", RESPOND_STEPS
+
+
+async def retry_policy_node(state: AgentState) -> dict:
+    """output_guard가 retry / escalate로 판정한 뒤 실행 — 재시도 방식, 모델, 프롬프트 보정 결정"""
+    intent = state.get("intent", "general")
+    retry_count = state.get("retry_count") or 1
+    ledger = state.get("cost_ledger") or []
+
+    action, steps = plan_retry(state)
+    if state.get("output_quality") == "escalate":
+        # 캐스케이드 승격 — 경량 모델 응답을 버리고 같은 범위를 큰 모델로 (output_guard가 고른 모델)
+        model = state.get("model")
+        return {
+            "retry_action": action,
+            "retry_hint": "",
+            "response": "",
+            "messages": discard_attempt(state),
+            "model": model if model and model != settings.model_simple else settings.model_complex,
+            "cascade_stage": "escalated",
+        }
+
+    spent = retry_tokens_spent(ledger)
+    if spent + estimate_tokens(ledger, steps) > settings.retry_token_budget:
+        action = "fallback"
+    metrics_store.record_retry(intent, action)
+
+    update = {
+        "retry_action": action,
+        "retry_hint": RETRY_HINTS.get(state.get("failure_reason") or "empty", RETRY_HINTS["empty"]),
+        # 실패한 응답이 partial_answer / 다음 판정 / 다시 실행하는 llm_node의 입력에 섞이지 않도록
+        "response": "",
+        "messages": discard_attempt(state),
+    }
+    # 두 번째 재시도부터는 더 큰 모델로
+    if retry_count >= 2 and state.get("model") != settings.model_complex:
+        update["model"] = settings.model_complex
+    return update
+
+
+def retry_router(state: AgentState) -> str:
+    """재시도 방식 → 다시 실행할 노드"""
+    action = state.get("retry_action")
+    intent = state.get("intent", "general")
+    if action == "resynthesize":
+        return "resynthesize"
+    if action == "rerun_agent":
+        return f"{intent}_agent"
+    if action == "respond":
+        return "creative_agent" if intent == "creative" else "general_agent"
+    return "fallback"
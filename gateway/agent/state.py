@@ -4,6 +4,7 @@ Agent State — LangGraph 상태 정의
 Before: 6개 필드 (messages, query, complexity, model, response, tokens)
 After:  13개 필드 — 의도 분류, 보안, 재시도, 서브그래프 지원 필드 추가
 """
+import operator
 from typing import TypedDict, Literal, Annotated
 from langgraph.graph.message import add_messages
 
@@ -27,14 +28,31 @@ class AgentState(TypedDict):
     block_reason: str            # 차단 사유
 
     # ─── Output Quality & Retry ───
-    output_quality: Literal["pass", "retry", "fallback"]  # Output Guard 판정
+    output_quality: Literal["pass", "retry", "escalate", "fallback"]  # Output Guard 판정
     retry_count: int             # 재시도 횟수
+    failure_reason: Literal["", "empty", "low_quality"]   # retry 판정 사유
+    retry_action: Literal["", "resynthesize", "rerun_agent", "respond", "fallback"]  # 재시도 방식 (agent/retry_policy.py)
+    retry_hint: str              # 재시도 시 시스템 프롬프트에 덧붙일 지시
+    guard_rejected: bool         # 응답 앞부분이 거절로 판정되어 생성을 중단했는지 (agent/stream_guard.py)
+    cascade_stage: Literal["", "small", "escalated"]  # 모델 캐스케이드 단계 (agent/cascade.py, "" = 미적용)
 
     # ─── 서브그래프 공유 데이터 ───
     sub_queries: list[str]       # 분해된 하위 질문들
     search_results: list[str]    # 검색/조사 결과 리스트
 
+    # ─── 도구 실행 예산 (agent/tool_executor.py) ───
+    tool_calls: int              # 지금까지 실행한 도구 호출 수
+    tool_time_ms: float          # 도구 턴별 벽시계 시간 합계 (동시 실행이면 가장 느린 호출 기준)
+
+    # ─── 요청 마감 시간 (agent/deadline.py) ───
+    deadline: float              # time.monotonic() 기준 마감 시각 (0 = 제한 없음)
+    deadline_exceeded: bool      # 마감 시간 초과로 부분 답변을 반환했는지
+
     # ─── LLM 응답 ───
     response: str                # LLM 최종 응답
     prompt_tokens: int           # 입력 토큰 수
-    completion_tokens: int       # 출력 토큰 수
\ No newline at end of file
+    completion_tokens: int       # 출력 토큰 수
+
+    # ─── 비용 장부 (agent/retry_policy.py) ───
+    # LLM 호출마다 {"step", "model", "attempt", "prompt_tokens", "completion_tokens", "duration_ms"} 추가 (누적)
+    cost_ledger: Annotated[list[dict], operator.add]
\ No newline at end of file
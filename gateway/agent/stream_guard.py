@@ -0,0 +1,181 @@
+"""
+점진적 출력 검증 — 생성 중인 응답의 앞부분만 보고 거절/저품질 시작을 조기 판정
+
+기존: output_guard_node가 생성이 끝난 뒤의 response만 검사
+  → "죄송합니다, 정보가 없습니다" 같은 답변도 끝까지 생성한 뒤에야 감지
+  → 스트리밍에서는 그 토큰이 이미 클라이언트에 전송됨
+
+변경:
+  1. 응답 노드(llm_node, 검색/분석 종합)는 astream으로 생성하면서 StreamGuard에 토큰 전달
+     - 앞부분이 거절 문장과 일치 → 생성 중단(Ollama 요청 취소), guard_rejected=True
+       → output_guard가 바로 retry/fallback 경로로 보냄 (failure_reason=low_quality)
+     - 거절로 시작할 수 없는 앞부분이거나 STREAM_GUARD_WINDOW_CHARS를 넘으면 통과
+  2. /api/chat/stream은 같은 StreamGuard로 응답 노드의 토큰을 판정 전까지 보류
+     → 거절로 판정된 시작은 클라이언트에 전송되지 않음 (통과 시 보류분을 한꺼번에 전송)
+
+노드와 라우터가 같은 규칙(토큰 순서대로 같은 판정)을 쓰므로 두 쪽의 판정이 일치
+검증 대상 의도: STREAM_GUARD_INTENTS (기본 search / analysis)
+
+모델 캐스케이드(agent/cascade.py)의 경량 모델 응답은 output_guard가 판정할 때까지 전부 보류
+(CascadeHoldback) — 승격되면 버리고 큰 모델 응답만 전송 (이미 보낸 토큰은 되돌릴 수 없으므로)
+"""
+import re
+from contextlib import aclosing
+
+from langchain_core.messages import AIMessage, message_chunk_to_message
+
+from core.config import settings
+from core.metrics import metrics_store
+
+PASS = "pass"
+REJECT = "reject"
+
+# 최종 응답을 만드는 노드 (스트리밍 이벤트의 metadata["langgraph_node"])
+ANSWER_NODES = {"general_agent", "creative_agent", "result_synthesizer", "synthesizer", "resynthesize"}
+
+# 거절/저품질 응답의 시작
+REFUSAL_START = re.compile(
+    r"^(?:"
+    r"(?:죄송합니다|죄송하지만|유감스럽게도|안타깝게도)[\s,.!]*[^.!?\n]{0,30}?"
+    r"(?:알 수 없|정보가 없|정보를 찾을 수 없|찾을 수 없|답변(?:을|해)? ?(?:드릴|할) 수 없|제공(?:해 드릴|할) 수 없)"
+    r"|(?:알 수 없습니다|정보가 없습니다|답변할 수 없습니다|답변을 드릴 수 없습니다)"
+    r"|(?:I'm sorry|I am sorry|Sorry,|I cannot|I can't|As an AI)"
+    r")",
+    re.IGNORECASE,
+)
+# 이 중 하나로 시작하지 않으면 거절 문장일 수 없음 → 보류 없이 바로 통과
+REFUSAL_CANDIDATES = (
+    "죄송", "유감", "안타깝", "알 수", "정보가", "답변할", "답변을",
+    "i'm", "i am", "i can", "sorry", "as an",
+)
+_CANDIDATE_CHARS = max(len(c) for c in REFUSAL_CANDIDATES)
+
+
+class StreamGuard:
+    """
+    토큰을 받아 앞부분이 거절로 시작하는지 판정 (응답 1건마다 새 인스턴스)
+
+    feed()가 None이면 판정 전 — 스트리밍은 held()의 토큰을 보류
+    """
+
+    def __init__(self, window: int | None = None):
+        self.window = window or settings.stream_guard_window_chars
+        self.verdict: str | None = None
+        self._parts: list[str] = []
+
+    def _text(self) -> str:
+        return "".join(self._parts).lstrip()
+
+    def feed(self, token: str) -> str | None:
+        if self.verdict is not None:
+            return self.verdict
+        self._parts.append(token)
+        text = self._text()
+        if REFUSAL_START.match(text):
+            self.verdict = REJECT
+        elif len(text) >= self.window:
+            self.verdict = PASS
+        elif len(text) >= _CANDIDATE_CHARS and not text.lower().startswith(REFUSAL_CANDIDATES):
+            self.verdict = PASS
+        return self.verdict
+
+    def finish(self) -> str:
+        """생성 종료 — window보다 짧게 끝난 응답도 판정"""
+        if self.verdict is None:
+            self.verdict = REJECT if REFUSAL_START.match(self._text()) else PASS
+        return self.verdict
+
+    def held(self) -> str:
+        """판정 전까지 보류한 텍스트"""
+        return "".join(self._parts)
+
+
+class StreamHoldback:
+    """
+    스트리밍 엔드포인트용 — 응답 노드의 LLM 실행(run_id)별로 앞부분 판정 전까지 토큰 보류
+
+    token()/end()가 돌려준 문자열만 클라이언트에 전송 (빈 문자열이면 보류 또는 버림)
+    """
+
+    def __init__(self):
+        self._guards: dict[str, StreamGuard] = {}
+
+    def token(self, run_id: str, node: str | None, intent: str | None, content: str) -> str:
+        if node not in ANSWER_NODES or not guard_enabled(intent):
+            return content
+        guard = self._guards.setdefault(run_id, StreamGuard())
+        if guard.verdict is None:
+            # 판정이 나는 순간 보류분을 한꺼번에 전송 (거절이면 전송 안 함)
+            return guard.held() if guard.feed(content) == PASS else ""
+        return content if guard.verdict == PASS else ""
+
+    def end(self, run_id: str) -> str:
+        """LLM 실행 종료 — window보다 짧게 끝난 응답은 여기서 판정 후 보류분 전송"""
+        guard = self._guards.pop(run_id, None)
+        if guard and guard.verdict is None and guard.finish() == PASS:
+            return guard.held()
+        return ""
+
+
+class CascadeHoldback:
+    """
+    스트리밍 엔드포인트용 — cascade_stage="small"인 동안 응답 노드 토큰을 output_guard 판정까지 보류
+
+    classified(): classifier 결과로 단계 설정
+    token(): 전송할 문자열 (보류 중이면 "")
+    judged(): output_guard 결과 — pass면 보류분 전송, 그 외(escalate / retry / fallback)는 버림
+    """
+
+    def __init__(self):
+        self.stage = ""
+        self._held: list[str] = []
+
+    def classified(self, stage: str | None) -> None:
+        self.stage = stage or ""
+
+    def token(self, node: str | None, content: str) -> str:
+        if self.stage != "small" or node not in ANSWER_NODES:
+            return content
+        self._held.append(content)
+        return ""
+
+    def judged(self, output_quality: str | None) -> str:
+        held, self._held = "".join(self._held), []
+        if self.stage != "small":
+            return ""
+        if output_quality == "pass":
+            self.stage = ""
+            return held
+        if output_quality == "escalate":
+            self.stage = "escalated"        # 큰 모델 응답은 보류 없이 전송
+        elif output_quality == "fallback":
+            self.stage = ""
+        return ""                           # retry는 경량 모델로 다시 생성 → 계속 보류
+
+
+def guard_enabled(intent: str | None) -> bool:
+    return intent in settings.stream_guard_intents
+
+
+async def generate_guarded(state, llm, messages, step: str) -> AIMessage | None:
+    """
+    스트리밍으로 생성하면서 앞부분 검증 — 거절로 시작하면 생성을 중단하고 None
+
+    완료되면 청크를 합친 AIMessage (tool_calls, usage_metadata 포함)
+    """
+    guard = StreamGuard() if guard_enabled(state.get("intent")) else None
+    merged = None
+    stream = llm.astream(messages)
+    # aclosing: 중단 시 스트림을 바로 닫아 진행 중인 Ollama 요청까지 취소
+    async with aclosing(stream):
+        async for chunk in stream:
+            merged = chunk if merged is None else merged + chunk
+            if guard and guard.feed(chunk.content if isinstance(chunk.content, str) else "") == REJECT:
+                break
+
+    if guard:
+        verdict = guard.finish()
+        metrics_store.record_stream_guard(step, verdict)
+        if verdict == REJECT:
+            return None
+    return message_chunk_to_message(merged) if merged is not None else AIMessage(content="")
@@ -0,0 +1,224 @@
+"""
+내부 LLM 호출용 스키마 제약 JSON 출력 — 분류기 / 질문 분해기
+
+기존: 자유 형식으로 생성 → ``` 제거 → json.loads, 실패하면 general / [query]로 폴백
+  → 형식이 깨질 때마다 품질 저하나 재시도로 이어짐
+  → IntentClassification.reasoning처럼 버리는 설명까지 생성 (분류기 지연의 대부분이 생성 토큰)
+
+변경:
+  1. Ollama /api/chat의 format에 JSON 스키마 전달 → 디코딩 단계에서 스키마에 맞는 토큰만 생성
+     (langchain-ollama 0.1.3의 ChatOllama는 format에 "json"만 받으므로 httpx로 직접 호출)
+  2. 호출마다 num_predict 상한 (INTERNAL_NUM_PREDICT) — 잘리면 파싱 실패로 집계
+  3. CLASSIFIER_REASONING=false면 스키마/프롬프트에서 reasoning 제외
+  4. 단계별 호출 수, 파싱 실패 수, 입력/생성 토큰, 생성 시간을 metrics_store에 기록
+
+StructuredChatOllama는 BaseChatModel이므로 ChatOllama와 같은 모양의 AIMessage를 반환하고
+(content, usage_metadata, response_metadata) 비용 장부와 호출하는 노드 코드는 그대로 사용
+LangChain 콜백도 그대로 실행 — GraphTimingCallback(LLM 시간/토큰)과 ModelStatsCallback(모델 통계)에 집계
+
+STRUCTURED_OUTPUT_ENABLED=false면 기존 ChatOllama (format="json" + num_predict 상한)
+"""
+import json
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_ollama import ChatOllama
+
+from agent.nodes.intent_schema import IntentClassification, strip_code_fence
+from core.config import settings
+from core.metrics import metrics_store
+
+# LangChain 메시지 타입 → Ollama role
+_ROLES = {"system": "system", "human": "user", "ai": "assistant", "tool": "tool"}
+
+
+def classification_schema(include_reasoning: bool) -> dict:
+    """IntentClassification의 JSON 스키마 (reasoning 제외 가능)"""
+    schema = IntentClassification.model_json_schema()
+    if not include_reasoning:
+        schema["properties"].pop("reasoning", None)
+    schema["required"] = list(schema["properties"])
+    return schema
+
+
+def batch_classification_schema(include_reasoning: bool) -> dict:
+    """배치 분류 — {"results": [{"id", ...분류 결과}, ...]} (최상위는 객체로)"""
+    item = classification_schema(include_reasoning)
+    item["properties"] = {"id": {"type": "integer"}, **item["properties"]}
+    item["required"] = ["id", *item["required"]]
+    return {
+        "type": "object",
+        "properties": {"results": {"type": "array", "items": item}},
+        "required": ["results"],
+    }
+
+
+SUB_QUERIES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "sub_queries": {"type": "array", "items": {"type": "string"}, "minItems": 1, "maxItems": 4},
+    },
+    "required": ["sub_queries"],
+}
+
+
+def num_predict_cap(step: str, items: int = 1) -> int:
+    """생성 토큰 상한 — 분류는 결과 개수만큼, reasoning을 포함하면 항목마다 추가"""
+    cap = settings.internal_num_predict.get(step, 256) * items
+    if step == "classifier" and settings.classifier_reasoning:
+        cap += settings.classifier_reasoning_tokens * items
+    return cap
+
+
+class OllamaJsonClient:
+    """Ollama /api/chat 비스트리밍 호출 — 공유 커넥션 풀 (비동기 / 동기 클라이언트 각각)"""
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._sync_client: httpx.Client | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # 첫 사용 시 생성, 종료는 lifespan에서 aclose()
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=10),
+            )
+        return self._client
+
+    @property
+    def sync_client(self) -> httpx.Client:
+        # 동기 호출(invoke)용 — 그래프는 비동기로 실행되므로 스크립트/디버깅에서만 생성됨
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+            )
+        return self._sync_client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    async def chat(self, model: str, messages: list[BaseMessage], schema: dict, num_predict: int) -> AIMessage:
+        """
+        Raises:
+            httpx.HTTPError: 연결 실패, 4xx/5xx 응답 (스키마를 지원하지 않는 구버전 Ollama 포함)
+        """
+        response = await self.client.post("/api/chat", json=_payload(model, messages, schema, num_predict))
+        response.raise_for_status()
+        return _message(response.json())
+
+    def chat_sync(self, model: str, messages: list[BaseMessage], schema: dict, num_predict: int) -> AIMessage:
+        """chat()의 동기 버전 (같은 요청 / 같은 예외)"""
+        response = self.sync_client.post("/api/chat", json=_payload(model, messages, schema, num_predict))
+        response.raise_for_status()
+        return _message(response.json())
+
+
+def _payload(model: str, messages: list[BaseMessage], schema: dict, num_predict: int) -> dict:
+    """/api/chat 요청 본문 — format에 JSON 스키마, 비스트리밍"""
+    return {
+        "model": model,
+        "messages": [{"role": _ROLES.get(m.type, "user"), "content": m.content} for m in messages],
+        "stream": False,
+        "format": schema,
+        "options": {"temperature": 0.0, "num_predict": num_predict},
+    }
+
+
+def _message(data: dict) -> AIMessage:
+    """/api/chat 응답 → ChatOllama와 같은 모양의 AIMessage"""
+    prompt_tokens = data.get("prompt_eval_count") or 0
+    eval_tokens = data.get("eval_count") or 0
+    return AIMessage(
+        content=data.get("message", {}).get("content", ""),
+        usage_metadata={
+            "input_tokens": prompt_tokens,
+            "output_tokens": eval_tokens,
+            "total_tokens": prompt_tokens + eval_tokens,
+        },
+        response_metadata={k: v for k, v in data.items() if k != "message"},
+    )
+
+
+class StructuredChatOllama(BaseChatModel):
+    """
+    모델 / 스키마 / 생성 상한을 묶은 ChatOllama 대용 (ainvoke / invoke 모두 지원)
+
+    generation_info에 Ollama 응답 메타데이터(model, *_count, *_duration)를 담아
+    콜백의 on_llm_end가 ChatOllama와 같은 값을 읽도록
+    """
+
+    model: str
+    json_schema: dict
+    num_predict: int
+
+    @property
+    def _llm_type(self) -> str:
+        return "ollama-structured"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return _chat_result(ollama_json.chat_sync(self.model, messages, self.json_schema, self.num_predict))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return _chat_result(await ollama_json.chat(self.model, messages, self.json_schema, self.num_predict))
+
+
+def _chat_result(message: AIMessage) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(
+        message=message, generation_info=dict(message.response_metadata),
+    )])
+
+
+def internal_llm(schema: dict, num_predict: int, model: str | None = None):
+    """내부 호출용 LLM — 스키마 제약 출력 또는 (비활성화 시) JSON 모드 ChatOllama"""
+    model = model or settings.model_simple
+    if settings.structured_output_enabled:
+        return StructuredChatOllama(model=model, json_schema=schema, num_predict=num_predict)
+    return ChatOllama(
+        model=model,
+        base_url=settings.ollama_url,
+        temperature=0.0,
+        format="json",
+        num_predict=num_predict,
+    )
+
+
+def parse_json_output(step: str, response, parse):
+    """
+    내부 호출 응답 → parse(JSON 값) 결과 (JSON이 아니거나 parse가 실패하면 None)
+
+    파싱 성공 여부와 토큰 사용량을 단계별로 기록 — 생성이 num_predict 상한에서 잘렸으면 truncated
+    (스키마 제약 출력이 아닌 경로는 ```json 블록으로 감쌀 수 있으므로 정리 후 파싱)
+    """
+    try:
+        result = parse(json.loads(strip_code_fence(response.content)))
+    except Exception:
+        result = None
+
+    usage = getattr(response, "usage_metadata", None) or {}
+    metadata = getattr(response, "response_metadata", None) or {}
+    metrics_store.record_internal_llm(
+        step,
+        parsed=result is not None,
+        truncated=metadata.get("done_reason") == "length",
+        prompt_tokens=usage.get("input_tokens", 0),
+        eval_tokens=usage.get("output_tokens", 0),
+        eval_ms=(metadata.get("eval_duration") or 0) / 1_000_000,
+    )
+    return result
+
+
+# 싱글톤 인스턴스 — lifespan 종료 시 aclose()
+ollama_json = OllamaJsonClient(settings.ollama_url, timeout=settings.internal_llm_timeout_seconds)
@@ -5,13 +5,19 @@
 1. decomposer: 복잡한 질문을 하위 질문들로 분해
 2. researcher: 각 하위 질문을 개별 조사
 3. synthesizer: 조사 결과를 종합 분석하여 최종 답변 생성
+
+마감 시간이 임박하면 분해를 생략하고 경량 모델 사용, 조사 도중 시간이 다 되면
+그때까지의 조사 결과로 종합(또는 부분 답변 반환)
 """
 from langgraph.graph import StateGraph, START, END
 from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage
 from agent.state import AgentState
+from agent.deadline import DeadlineExceeded, is_short, partial_answer, pick_model, run_within
+from agent.retry_policy import ledger_entry, with_retry_hint
+from agent.stream_guard import generate_guarded
+from agent.structured_llm import SUB_QUERIES_SCHEMA, internal_llm, num_predict_cap, parse_json_output
 from core.config import settings
-import json
 
 
 async def decomposer_node(state: AgentState) -> dict:
@@ -23,13 +29,13 @@ async def decomposer_node(state: AgentState) -> dict:
       → ["A의 장점은?", "A의 단점은?", "B의 장점은?", "B의 단점은?"]
     """
     query = state["query"]
+    if is_short(state):
+        return {"sub_queries": [query]}     # 시간 부족 → 분해 생략
     
+    ledger = []
     try:
-        llm = ChatOllama(
-            model=settings.model_simple,
-            base_url=settings.ollama_url,
-            temperature=0.0,
-        )
+        # 스키마 제약 출력 + 생성 토큰 상한 (agent/structured_llm.py)
+        llm = internal_llm(SUB_QUERIES_SCHEMA, num_predict_cap("decomposer"))
         
         messages = [
             SystemMessage(content=(
@@ -37,37 +43,38 @@ async def decomposer_node(state: AgentState) -> dict:
                 "규칙:\n"
                 "1. 주어진 질문을 2~4개의 하위 질문으로 분해하세요\n"
                 "2. 각 하위 질문은 독립적으로 답변 가능해야 합니다\n"
-                "3. JSON 배열 형식으로만 출력하세요\n"
+                "3. JSON 형식으로만 출력하세요\n"
                 "4. 한국어로 작성하세요\n"
                 "5. 단순한 질문이면 원본 질문 하나만 배열에 넣으세요\n\n"
-                '출력 형식: ["하위질문1", "하위질문2", ...]'
+                '출력 형식: {"sub_queries": ["하위질문1", "하위질문2", ...]}'
             )),
             HumanMessage(content=query),
         ]
         
-        response = await llm.ainvoke(messages)
-        raw_text = response.content.strip()
-        
-        # JSON 배열 파싱
-        if "```" in raw_text:
-            raw_text = raw_text.split("```")[1]
-            if raw_text.startswith("json"):
-                raw_text = raw_text[4:]
-            raw_text = raw_text.strip()
-        
-        sub_queries = json.loads(raw_text)
-        
-        if not isinstance(sub_queries, list) or len(sub_queries) == 0:
-            sub_queries = [query]
+        response = await run_within(state, llm.ainvoke(messages))
+        ledger = ledger_entry(state, "decomposer", settings.model_simple, response)
+        # JSON 파싱 (실패하면 None, 파싱 실패율/토큰 수 기록)
+        sub_queries = parse_json_output("decomposer", response, _sub_queries) or [query]
             
     except Exception:
         sub_queries = [query]
     
     return {
         "sub_queries": sub_queries,
+        "cost_ledger": ledger,
     }
 
 
+def _sub_queries(parsed) -> list[str] | None:
+    """{"sub_queries": [...]} 또는 배열 그대로 → 비어 있지 않은 하위 질문 목록 (최대 4개)"""
+    if isinstance(parsed, dict):
+        parsed = parsed.get("sub_queries")
+    if not isinstance(parsed, list):
+        return None
+    sub_queries = [q.strip() for q in parsed if isinstance(q, str) and q.strip()]
+    return sub_queries[:4] or None
+
+
 async def researcher_node(state: AgentState) -> dict:
     """
     개별 조사 노드
@@ -77,14 +84,17 @@ async def researcher_node(state: AgentState) -> dict:
     """
     sub_queries = state.get("sub_queries", [state["query"]])
     
+    model = pick_model(state)
     llm = ChatOllama(
-        model=state["model"],
+        model=model,
         base_url=settings.ollama_url,
     )
     
     research_results = []
     total_prompt = 0
     total_completion = 0
+    deadline_exceeded = False
+    ledger = []
     
     for i, sq in enumerate(sub_queries, 1):
         messages = [
@@ -96,7 +106,12 @@ async def researcher_node(state: AgentState) -> dict:
             HumanMessage(content=sq),
         ]
         
-        response = await llm.ainvoke(messages)
+        try:
+            response = await run_within(state, llm.ainvoke(messages))
+        except DeadlineExceeded:
+            deadline_exceeded = True    # 지금까지의 조사 결과만 사용
+            break
+        ledger += ledger_entry(state, "researcher", model, response)
         content = response.content if isinstance(response.content, str) else ""
         research_results.append(f"[분석 {i}: {sq}]\n{content}")
         
@@ -106,8 +121,11 @@ async def researcher_node(state: AgentState) -> dict:
     
     return {
         "search_results": research_results,  # search_results 필드를 재활용
+        "model": model,
         "prompt_tokens": total_prompt,
         "completion_tokens": total_completion,
+        "deadline_exceeded": deadline_exceeded,
+        "cost_ledger": ledger,
     }
 
 
@@ -120,15 +138,16 @@ async def synthesizer_node(state: AgentState) -> dict:
     query = state["query"]
     research_results = state.get("search_results", [])
     
+    model = pick_model(state)
     llm = ChatOllama(
-        model=state["model"],
+        model=model,
         base_url=settings.ollama_url,
     )
     
     context = "\n\n".join(research_results)
     
     messages = [
-        SystemMessage(content=(
+        SystemMessage(content=with_retry_hint(state, (
             "당신은 종합 분석 전문가입니다.\n"
             "반드시 한국어로만 답변하세요.\n\n"
             "규칙:\n"
@@ -136,23 +155,31 @@ async def synthesizer_node(state: AgentState) -> dict:
             "2. 구조: 핵심 요약 → 상세 분석 → 결론/시사점\n"
             "3. 중복 내용은 통합하고, 서로 다른 관점은 비교 대조하세요\n"
             "4. 논리적이고 읽기 쉬운 구조로 작성하세요"
-        )),
+        ))),
         HumanMessage(content=(
             f"원래 질문: {query}\n\n"
             f"개별 분석 결과:\n{context}"
         )),
     ]
     
-    response = await llm.ainvoke(messages)
+    try:
+        response = await run_within(state, generate_guarded(state, llm, messages, "synthesizer"))
+    except DeadlineExceeded:
+        return {"response": partial_answer(state), "deadline_exceeded": True, "model": model}
+    if response is None:
+        return {"response": "", "guard_rejected": True, "model": model}
     
     prev_prompt = state.get("prompt_tokens", 0)
     prev_completion = state.get("completion_tokens", 0)
     
     return {
         "messages": [response],
+        "model": model,
+        "guard_rejected": False,
         "response": response.content if isinstance(response.content, str) else "",
         "prompt_tokens": prev_prompt + (response.usage_metadata.get("input_tokens", 0) if response.usage_metadata else 0),
         "completion_tokens": prev_completion + (response.usage_metadata.get("output_tokens", 0) if response.usage_metadata else 0),
+        "cost_ledger": ledger_entry(state, "synthesizer", model, response),
     }
 
 
@@ -5,11 +5,17 @@
 1. query_refiner: 검색어를 최적화
 2. web_search: 최적화된 검색어로 검색 수행
 3. result_synthesizer: 검색 결과를 종합하여 정리
+
+마감 시간이 임박하면 검색어 최적화와 원본 질문 재검색을 생략하고 경량 모델로 종합
 """
+import asyncio
 from langgraph.graph import StateGraph, START, END
 from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage
 from agent.state import AgentState
+from agent.deadline import DeadlineExceeded, is_short, partial_answer, pick_model, run_within
+from agent.retry_policy import ledger_entry, with_retry_hint
+from agent.stream_guard import generate_guarded
 from agent.tool import search_web
 from core.config import settings
 
@@ -17,7 +23,10 @@ from core.config import settings
 async def query_refiner_node(state: AgentState) -> dict:
     """사용자의 자연어 질문을 검색에 최적화된 키워드로 변환"""
     query = state["query"]
+    if is_short(state):
+        return {"sub_queries": [query]}     # 시간 부족 → 원본 질문으로 바로 검색
     
+    ledger = []
     try:
         llm = ChatOllama(
             model=settings.model_simple,
@@ -38,7 +47,8 @@ async def query_refiner_node(state: AgentState) -> dict:
             HumanMessage(content=query),
         ]
         
-        response = await llm.ainvoke(messages)
+        response = await run_within(state, llm.ainvoke(messages))
+        ledger = ledger_entry(state, "query_refiner", settings.model_simple, response)
         refined_query = response.content.strip()
         
         if not refined_query or len(refined_query) < 2:
@@ -49,6 +59,7 @@ async def query_refiner_node(state: AgentState) -> dict:
     
     return {
         "sub_queries": [refined_query],
+        "cost_ledger": ledger,
     }
 
 
@@ -57,17 +68,23 @@ async def web_search_node(state: AgentState) -> dict:
     sub_queries = state.get("sub_queries", [state["query"]])
     original_query = state["query"]
     
-    all_results = []
-    
-    for sq in sub_queries:
-        result = search_web.invoke({"query": sq})
-        if result and "검색 결과가 없습니다" not in result:
-            all_results.append(f"[검색어: {sq}]\n{result}")
-    
-    if sub_queries and sub_queries[0] != original_query:
-        result = search_web.invoke({"query": original_query})
-        if result and "검색 결과가 없습니다" not in result:
-            all_results.append(f"[원본 검색: {original_query}]\n{result}")
+    searches = [(f"[검색어: {sq}]", sq) for sq in sub_queries]
+    if sub_queries and sub_queries[0] != original_query and not is_short(state):
+        searches.append((f"[원본 검색: {original_query}]", original_query))
+
+    # 검색어별 검색을 동시에 실행 (전체 시간 = 가장 느린 검색)
+    try:
+        results = await run_within(
+            state, asyncio.gather(*(search_web.ainvoke({"query": q}) for _, q in searches)),
+        )
+    except DeadlineExceeded:
+        return {"search_results": ["검색 결과를 찾지 못했습니다."], "deadline_exceeded": True}
+
+    all_results = [
+        f"{label}\n{result}"
+        for (label, _), result in zip(searches, results)
+        if result and "검색 결과가 없습니다" not in result
+    ]
     
     search_results = all_results if all_results else ["검색 결과를 찾지 못했습니다."]
     
@@ -81,15 +98,16 @@ async def result_synthesizer_node(state: AgentState) -> dict:
     query = state["query"]
     search_results = state.get("search_results", [])
     
+    model = pick_model(state)
     llm = ChatOllama(
-        model=state["model"],
+        model=model,
         base_url=settings.ollama_url,
     )
     
     context = "\n\n".join(search_results)
     
     messages = [
-        SystemMessage(content=(
+        SystemMessage(content=with_retry_hint(state, (
             "당신은 검색 결과를 종합 분석하는 전문 에이전트입니다.\n"
             "반드시 한국어로만 답변하세요.\n\n"
             "규칙:\n"
@@ -97,20 +115,30 @@ async def result_synthesizer_node(state: AgentState) -> dict:
             "2. 출처가 다른 정보를 교차 검증하여 정확도를 높이세요\n"
             "3. 정보가 부족하면 솔직히 말하되, 있는 정보는 최대한 활용하세요\n"
             "4. 구조화된 답변을 제공하세요 (핵심 요약 → 상세 설명)"
-        )),
+        ))),
         HumanMessage(content=(
             f"사용자 질문: {query}\n\n"
             f"검색 결과:\n{context}"
         )),
     ]
     
-    response = await llm.ainvoke(messages)
+    try:
+        response = await run_within(state, generate_guarded(state, llm, messages, "result_synthesizer"))
+    except DeadlineExceeded:
+        # 종합 전에 시간 초과 → 검색 결과 원문을 부분 답변으로
+        return {"response": partial_answer(state), "deadline_exceeded": True, "model": model}
+    if response is None:
+        # "정보가 없습니다"로 시작 → 생성 중단, output_guard가 재시도
+        return {"response": "", "guard_rejected": True, "model": model}
     
     return {
         "messages": [response],
+        "model": model,
+        "guard_rejected": False,
         "response": response.content if isinstance(response.content, str) else "",
         "prompt_tokens": response.usage_metadata.get("input_tokens", 0) if response.usage_metadata else 0,
         "completion_tokens": response.usage_metadata.get("output_tokens", 0) if response.usage_metadata else 0,
+        "cost_ledger": ledger_entry(state, "result_synthesizer", model, response),
     }
 
 
@@ -0,0 +1,111 @@
+"""
+도구 실행기 — creative_agent 한 턴의 도구 호출을 동시에 실행
+
+기존: ToolNode(ALL_TOOLS)
+  → 모델이 한 턴에 여러 도구를 호출해도 하나씩 순서대로 실행 (search + url = 합계 시간)
+  → 도구가 멈추면 요청 전체가 멈춤 (시간 제한 없음)
+
+변경:
+  1. 한 턴의 tool_calls를 asyncio.gather로 동시 실행 → 턴 시간 = 가장 느린 호출
+  2. 도구별 시간 제한 (TOOL_TIMEOUT_SECONDS) — 초과 시 오류 ToolMessage로 응답하고 계속 진행
+  3. 요청 1건의 도구 예산 (TOOL_BUDGET_SECONDS, TOOL_MAX_CALLS)
+     - 시간 제한 = min(도구별 제한, 남은 예산)
+     - 예산을 다 쓰면 실행하지 않고(skipped) 안내 메시지 반환
+       → llm_node도 도구를 장착하지 않으므로 모델이 바로 답변
+     - 요청 마감 시간(agent/deadline.py)이 더 가까우면 그 시간까지만
+  4. 도구별 결과(ok / error / timeout / skipped)와 소요 시간을 metrics_store에 기록
+     (도구 실행 시간 자체는 GraphTimingCallback의 tool 단계에도 기록됨)
+"""
+import asyncio
+import time
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from agent import deadline
+from agent.state import AgentState
+from agent.tool import ALL_TOOLS
+from core.config import settings
+from core.logger import get_logger
+from core.metrics import metrics_store
+
+logger = get_logger("tool_executor")
+
+TOOLS_BY_NAME = {t.name: t for t in ALL_TOOLS}
+
+
+def tool_timeout(name: str) -> float:
+    return settings.tool_timeout_seconds.get(name, settings.tool_default_timeout_seconds)
+
+
+def budget_exhausted(state: AgentState) -> bool:
+    """요청의 도구 예산(시간/호출 수)을 모두 썼는지"""
+    # 설정되지 않은 state 필드는 LangGraph가 None으로 채움
+    return (
+        (state.get("tool_calls") or 0) >= settings.tool_max_calls
+        or (state.get("tool_time_ms") or 0.0) >= settings.tool_budget_seconds * 1000
+    )
+
+
+async def _run_tool(call: dict, timeout: float, config: RunnableConfig) -> tuple[str, str]:
+    """도구 1개 실행 → (결과 문자열, outcome)"""
+    tool = TOOLS_BY_NAME.get(call["name"])
+    if tool is None:
+        return f"알 수 없는 도구입니다: {call['name']}", "error"
+    try:
+        result = await asyncio.wait_for(tool.ainvoke(call["args"], config), timeout=timeout)
+        return str(result), "ok"
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"도구 시간 초과: {call['name']} ({timeout:.1f}s)",
+            extra={"extra_data": {"args": str(call["args"])[:200]}},
+        )
+        return f"도구 실행 시간이 초과되었습니다 ({timeout:.1f}초). 이 결과 없이 답변하세요.", "timeout"
+    except Exception as e:
+        return f"도구 실행 중 오류가 발생했습니다: {e}", "error"
+
+
+async def tool_executor_node(state: AgentState, config: RunnableConfig) -> dict:
+    """
+    마지막 AI 메시지의 tool_calls를 동시에 실행하고 ToolMessage로 응답
+
+    config는 그대로 도구에 전달 — GraphTimingCallback의 도구 계측 유지
+    """
+    calls = state["messages"][-1].tool_calls
+    used_calls = state.get("tool_calls") or 0
+    used_ms = state.get("tool_time_ms") or 0.0
+    remaining = min(settings.tool_budget_seconds - used_ms / 1000, deadline.remaining(state))
+
+    # 호출 수 예산 안에 드는 것만 실행, 나머지는 skipped
+    allowed = max(0, min(len(calls), settings.tool_max_calls - used_calls))
+    if remaining <= 0:
+        allowed = 0
+
+    async def run(call: dict) -> tuple[str, str, float]:
+        start = time.perf_counter()
+        content, outcome = await _run_tool(call, min(tool_timeout(call["name"]), remaining), config)
+        return content, outcome, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run(call) for call in calls[:allowed]))
+    turn_ms = (time.perf_counter() - start) * 1000
+
+    messages = []
+    for i, call in enumerate(calls):
+        if i < allowed:
+            content, outcome, duration_ms = results[i]
+        else:
+            content, outcome, duration_ms = "도구 실행 예산을 모두 사용했습니다. 지금까지의 정보로 답변하세요.", "skipped", 0.0
+        metrics_store.record_tool_call(call["name"], outcome, duration_ms)
+        messages.append(ToolMessage(
+            content=content,
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="success" if outcome == "ok" else "error",
+        ))
+
+    return {
+        "messages": messages,
+        "tool_calls": used_calls + allowed,
+        "tool_time_ms": used_ms + turn_ms,
+    }
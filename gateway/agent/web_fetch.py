@@ -0,0 +1,219 @@
+"""
+URL 본문 가져오기 — summarize_url 도구용 비동기 fetcher
+
+기존: 호출마다 동기 httpx.Client 생성 → 본문 전체를 메모리에 받은 뒤
+      정규식 4번으로 전체 HTML을 처리하고 나서 2000자로 자름
+      → 수 MB 페이지에서 수백 ms CPU + 이벤트 루프 블로킹
+
+변경:
+  1. 공유 AsyncClient (커넥션 풀, keep-alive) — lifespan 종료 시 aclose()
+  2. 스트리밍 다운로드 — 청크 단위로 디코딩해 추출기에 전달, 최대 바이트 수 제한
+  3. 점진적 HTML → 텍스트 추출기 (html.parser) — 필요한 글자 수가 모이면 다운로드 중단
+  4. 본문 캐시 (프로세스별 LRU)
+     - 신선 기간(URL_CACHE_FRESH_SECONDS) 안에는 네트워크 요청 없음
+     - 이후에는 ETag / Last-Modified로 조건부 요청 → 304면 캐시된 텍스트 재사용
+     - Cache-Control: no-store 응답은 캐시하지 않음
+"""
+import codecs
+import re
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+
+import httpx
+
+from core.config import settings
+from core.logger import get_logger
+
+logger = get_logger("web_fetch")
+
+USER_AGENT = "Mozilla/5.0 (compatible; LLMGateway/1.0)"
+# 텍스트로 취급하지 않는 태그 (내용 전체 무시)
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+# 앞뒤로 공백을 넣는 블록 태그 (단어가 붙지 않도록)
+BLOCK_TAGS = {"p", "div", "br", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "section", "article"}
+_WHITESPACE = re.compile(r"\s+")
+# text/* 외에 그대로 읽을 텍스트 형식 (JSON, JSON-LD, JS 등 — 추출 없이 max_chars까지)
+PLAIN_TEXT_TYPES = ("application/json", "+json", "application/javascript", "application/x-ndjson",
+                    "application/yaml", "application/x-yaml", "application/csv")
+
+
+class TextExtractor(HTMLParser):
+    """
+    점진적 HTML → 텍스트 추출기
+
+    feed()로 청크를 계속 넣다가 done이 True가 되면 중단하면 됨
+    (전체 문서를 만들지 않고, 모인 텍스트만 limit 글자까지 보관)
+    """
+
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.parts: list[str] = []
+        self.length = 0
+        self._skip_depth = 0
+
+    @property
+    def done(self) -> bool:
+        return self.length >= self.limit
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self._append(" ")
+
+    def handle_data(self, data):
+        if not self._skip_depth and not self.done:
+            self._append(data)
+
+    def _append(self, text: str) -> None:
+        text = _WHITESPACE.sub(" ", text)
+        # 공백이 연속되지 않도록 (청크 경계 포함)
+        if text.startswith(" ") and (not self.parts or self.parts[-1].endswith(" ")):
+            text = text[1:]
+        if text:
+            self.parts.append(text)
+            self.length += len(text)
+
+    def text(self) -> str:
+        return "".join(self.parts).strip()[: self.limit]
+
+
+class _CacheEntry:
+    __slots__ = ("text", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, text: str, etag: str | None, last_modified: str | None):
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.monotonic()
+
+
+class UrlFetcher:
+    """공유 커넥션 풀 + 본문 캐시"""
+
+    def __init__(self, max_bytes: int, max_chars: int, cache_size: int, fresh_seconds: float, timeout: float):
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.cache_size = cache_size
+        self.fresh_seconds = fresh_seconds
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._cache: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "truncated": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # 첫 사용 시 생성 (테스트/스크립트에서도 동작), 종료는 lifespan에서 aclose()
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=10),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _remember(self, url: str, entry: _CacheEntry) -> None:
+        self._cache[url] = entry
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def fetch_text(self, url: str) -> str:
+        """
+        URL의 본문 텍스트 (최대 max_chars 글자)
+
+        Raises:
+            httpx.HTTPStatusError: 4xx/5xx 응답
+            httpx.HTTPError: 연결 실패, 시간 초과 등
+        """
+        cached = self._cache.get(url)
+        if cached and time.monotonic() - cached.fetched_at < self.fresh_seconds:
+            self.stats["hits"] += 1
+            self._cache.move_to_end(url)
+            return cached.text
+
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        async with self.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached:
+                self.stats["revalidated"] += 1
+                cached.fetched_at = time.monotonic()
+                self._cache.move_to_end(url)
+                return cached.text
+            response.raise_for_status()
+            self.stats["misses"] += 1
+            text = await self._read_text(response)
+
+        if "no-store" not in response.headers.get("cache-control", ""):
+            self._remember(url, _CacheEntry(
+                text, response.headers.get("etag"), response.headers.get("last-modified"),
+            ))
+        return text
+
+    async def _read_text(self, response: httpx.Response) -> str:
+        """스트리밍으로 읽으며 추출 — 글자 수가 차거나 max_bytes에 도달하면 중단"""
+        content_type = response.headers.get("content-type", "text/html").lower()
+        is_html = "html" in content_type or "xml" in content_type
+        is_text = content_type.startswith("text/") or any(t in content_type for t in PLAIN_TEXT_TYPES)
+        if not is_html and not is_text:
+            return ""
+
+        decoder = codecs.getincrementaldecoder(response.charset_encoding or "utf-8")(errors="replace")
+        extractor = TextExtractor(self.max_chars)
+        plain: list[str] = []
+        plain_length = 0
+        received = 0
+
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            decoded = decoder.decode(chunk)
+            if is_html:
+                extractor.feed(decoded)
+                if extractor.done:
+                    break
+            else:
+                plain.append(decoded)
+                plain_length += len(decoded)
+                if plain_length >= self.max_chars:
+                    break
+            if received >= self.max_bytes:
+                self.stats["truncated"] += 1
+                logger.info(
+                    f"URL 본문 크기 제한 도달 ({self.max_bytes} bytes)",
+                    extra={"extra_data": {"url": str(response.url)}},
+                )
+                break
+
+        if is_html:
+            if not extractor.done:
+                extractor.close()       # 버퍼에 남은 마지막 텍스트 처리
+            return extractor.text()
+        return _WHITESPACE.sub(" ", "".join(plain)).strip()[: self.max_chars]
+
+
+# 싱글톤 인스턴스 — lifespan 종료 시 aclose()
+url_fetcher = UrlFetcher(
+    max_bytes=settings.url_fetch_max_bytes,
+    max_chars=settings.url_fetch_max_chars,
+    cache_size=settings.url_cache_size,
+    fresh_seconds=settings.url_cache_fresh_seconds,
+    timeout=settings.url_fetch_timeout_seconds,
+)
@@ -0,0 +1,30 @@
+"""Add truncated flag to messages
+
+Revision ID: 8d1f4b7e3a62
+Revises: 5a9e0d6c2f83
+Create Date: 2026-10-19 14:02:11.284503
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d1f4b7e3a62'
+down_revision: Union[str, None] = '5a9e0d6c2f83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # server_default로 기존 행은 false — 테이블 재작성 없이 추가 (PostgreSQL 11+)
+    op.add_column(
+        'messages',
+        sa.Column('truncated', sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('messages', 'truncated')
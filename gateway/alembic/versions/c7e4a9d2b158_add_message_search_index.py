@@ -0,0 +1,51 @@
+"""Add full-text search index on messages
+
+Revision ID: c7e4a9d2b158
+Revises: 3f2b8c1d9a47
+Create Date: 2026-10-19 10:40:02.117390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e4a9d2b158'
+down_revision: Union[str, None] = '3f2b8c1d9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 한국어 부분 일치 검색용 trigram 확장
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('messages', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # content가 바뀔 때만 tsvector 재계산 (다른 컬럼 UPDATE에는 트리거 미동작)
+    # 'simple' 설정: 형태소 분석 없이 공백 기준 토큰화 — 언어 무관하게 동작
+    op.execute("""
+        CREATE TRIGGER messages_search_vector_update
+        BEFORE INSERT OR UPDATE OF content ON messages
+        FOR EACH ROW EXECUTE FUNCTION
+        tsvector_update_trigger(search_vector, 'pg_catalog.simple', content)
+    """)
+
+    # 기존 메시지 백필
+    op.execute("UPDATE messages SET search_vector = to_tsvector('pg_catalog.simple', content)")
+
+    op.create_index('ix_messages_search_vector', 'messages', ['search_vector'],
+                    unique=False, postgresql_using='gin')
+    op.create_index('ix_messages_content_trgm', 'messages', ['content'],
+                    unique=False, postgresql_using='gin',
+                    postgresql_ops={'content': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_content_trgm', table_name='messages', postgresql_using='gin')
+    op.drop_index('ix_messages_search_vector', table_name='messages', postgresql_using='gin')
+    op.execute("DROP TRIGGER IF EXISTS messages_search_vector_update ON messages")
+    op.drop_column('messages', 'search_vector')
@@ -11,6 +11,115 @@ class Settings(BaseSettings):
     # Redis
     redis_url: str = "redis://redis:6379"
 
+    # 메트릭 집계 방식
+    # - local: 워커 프로세스별 인메모리 (단일 워커용)
+    # - redis: 워커별 증가분을 Redis에 주기적으로 합산 (uvicorn --workers N용)
+    metrics_backend: str = "local"
+    metrics_flush_interval_seconds: float = 5.0
+
+    # 로깅 (큐 + 백그라운드 스레드로 출력, 이벤트 루프 블로킹 방지)
+    # - log_queue_size: 버퍼 크기, 가득 차면 새 로그는 버리고 개수만 집계
+    # - WARNING 이상 / 4xx·5xx 응답은 항상 기록, 그 외는 경로별 비율로 샘플링
+    log_queue_size: int = 10000
+    log_sample_rates: dict[str, float] = {"/health": 0.01, "/api/chat/": 0.01}
+    log_success_sample_rate: float = 1.0      # 위 매핑에 없는 경로
+
+    # SSE 스트리밍 — 토큰을 시간/바이트 창 단위로 병합해 전송, 무응답 구간엔 heartbeat 주석
+    sse_coalesce_ms: float = 30.0
+    sse_coalesce_bytes: int = 256
+    sse_heartbeat_seconds: float = 15.0
+    # 재개 가능한 스트림 — 생성 결과를 Redis Stream에 버퍼링, Last-Event-ID로 이어받기
+    sse_buffer_maxlen: int = 2000              # Stream 최대 항목 수 (병합된 프레임 기준)
+    sse_buffer_ttl_seconds: int = 600          # 버퍼 보관 시간
+    sse_resume_grace_seconds: float = 30.0     # 구독자 없이 생성을 계속하는 유예 시간
+
+    # 응답 후처리 실행기 (AI 메시지 저장, 사용량 로깅, 캐시 저장을 응답 후 백그라운드로)
+    side_effect_queue_size: int = 1000
+    side_effect_workers: int = 4
+    side_effect_max_retries: int = 3
+    side_effect_retry_base_seconds: float = 0.2   # 재시도 대기: 0.2s → 0.4s → 0.8s
+    side_effect_drain_timeout_seconds: float = 10.0
+
+    # 요청 전처리 인증 캐시 (계정 비활성화/역할 변경은 최대 이 시간만큼 늦게 반영)
+    auth_cache_ttl_seconds: int = 60
+
+    # 사용량 시간 버킷 집계 보관 기간 (해상도별, 초)
+    usage_rollup_ttl_seconds: dict[str, int] = {
+        "minute": 2 * 3600,
+        "hour": 7 * 86400,
+        "day": 90 * 86400,
+    }
+
+    # 계산기 도구 — 검증된 식만 별도 프로세스 풀에서 실행, 시간 초과 시 풀 재시작
+    calculator_processes: int = 2
+    calculator_timeout_seconds: float = 2.0
+
+    # summarize_url 도구 — 스트리밍 다운로드 + 본문 캐시 (ETag/Last-Modified 조건부 요청)
+    url_fetch_max_bytes: int = 2 * 1024 * 1024    # 이 크기까지만 다운로드
+    url_fetch_max_chars: int = 2000               # 추출할 텍스트 길이
+    url_fetch_timeout_seconds: float = 10.0
+    url_cache_size: int = 256                     # 캐시할 URL 수 (워커 프로세스별)
+    url_cache_fresh_seconds: float = 300.0        # 이 시간 안에는 재요청 없이 캐시 사용
+
+    # creative_agent 도구 실행기 — 한 턴의 도구 호출을 동시에 실행
+    # 도구별 시간 제한 (초), 목록에 없는 도구는 tool_default_timeout_seconds
+    tool_timeout_seconds: dict[str, float] = {
+        "search_web": 8.0,
+        "summarize_url": 10.0,
+        "calculate": 3.0,
+        "get_datetime": 1.0,
+    }
+    tool_default_timeout_seconds: float = 10.0
+    tool_budget_seconds: float = 20.0             # 요청 1건의 도구 실행 시간 합계 상한 (턴별 벽시계 시간)
+    tool_max_calls: int = 8                       # 요청 1건의 도구 호출 횟수 상한
+
+    # 요청 마감 시간 — 그래프 전체 실행 시간 상한 (역할별, 초, nginx proxy_read_timeout 300s보다 짧게)
+    # 클라이언트는 X-Request-Timeout 헤더로 이보다 짧게만 지정 가능
+    request_deadline_seconds_by_role: dict[str, float] = {"user": 60.0, "admin": 120.0}
+    request_deadline_default_seconds: float = 60.0   # 위 매핑에 없는 역할
+    deadline_low_seconds: float = 15.0               # 남은 시간이 이보다 적으면 저비용 전략 사용
+
+    # 재시도 정책 — 재시도에 쓸 수 있는 토큰 상한 (요청 1건, 프롬프트 + 생성)
+    retry_token_budget: int = 6000
+    retry_default_estimate_tokens: int = 1500        # 비용 장부에 근거가 없을 때 재시도 1회 예상 비용
+
+    # 점진적 출력 검증 — 응답 앞부분이 거절/저품질 문장이면 생성을 바로 중단하고 재시도
+    stream_guard_intents: list[str] = ["search", "analysis"]   # 검증할 의도 (수집 자료가 있어 거절이 저품질인 경우)
+    stream_guard_window_chars: int = 40              # 판정에 쓸 앞부분 길이 (스트리밍은 판정 전까지 보류)
+
+    # 모델 캐스케이드 — 대상 의도는 model_simple로 먼저 답하고, 검증 점수가 기준 미만이면 model_complex로
+    cascade_enabled: bool = False
+    cascade_intents: list[str] = ["search", "analysis", "creative"]
+    # 의도별 승격 기준 (output_guard 검증 점수 0.0~1.0, 이보다 낮으면 승격)
+    cascade_escalation_threshold: dict[str, float] = {"search": 0.6, "analysis": 0.7, "creative": 0.6}
+
+    # 적응형 모델 라우팅 — 모델별 최근 지연/오류율/동시 실행 수로 의도별 모델 선택 (agent/model_router.py)
+    model_routing_enabled: bool = False
+    # 의도별 대체 모델 (INTENT_MODEL_MAP의 기본 모델 다음 순서로 시도)
+    model_routing_fallbacks: dict[str, list[str]] = {
+        "search": ["llama3.2:3b"],
+        "analysis": ["llama3.2:3b"],
+        "creative": ["llama3.2:3b"],
+    }
+    model_latency_slo_ms: dict[str, float] = {"qwen2.5:7b": 20000.0, "llama3.2:3b": 8000.0}  # 호출 p95 목표 (대기 포함)
+    model_latency_slo_default_ms: float = 20000.0
+    model_max_error_rate: float = 0.2
+    model_max_in_flight: dict[str, int] = {"qwen2.5:7b": 4, "llama3.2:3b": 8}  # 이 이상 실행 중이면 포화
+    model_stats_window_seconds: float = 60.0
+    model_stats_min_samples: int = 5                 # 이보다 표본이 적으면 지연/오류율로 판단하지 않음
+
+    # 의도 분류 마이크로 배치 — 동시에 들어온 분류 요청을 모아 프롬프트 1개로 (agent/intent_batcher.py)
+    classifier_batch_enabled: bool = False
+    classifier_batch_window_ms: float = 5.0          # 첫 요청 이후 이 시간 동안 모음
+    classifier_batch_max_size: int = 16              # 이만큼 모이면 바로 전송
+
+    # 내부 LLM 호출(분류기 / 질문 분해기) — Ollama 스키마 제약 JSON 출력 + 생성 토큰 상한 (agent/structured_llm.py)
+    structured_output_enabled: bool = True           # false면 ChatOllama JSON 모드 (Ollama 0.5 미만)
+    internal_num_predict: dict[str, int] = {"classifier": 40, "decomposer": 160}   # 분류는 결과 1개당
+    classifier_reasoning: bool = False               # 분류 근거(reasoning)까지 생성할지 — 결과에는 쓰이지 않음
+    classifier_reasoning_tokens: int = 80            # reasoning을 생성하면 분류 1개당 추가 상한
+    internal_llm_timeout_seconds: float = 120.0      # /api/chat 직접 호출 타임아웃 (모델 로딩 시간 포함)
+
     # Ollama
     ollama_url: str = "http://ollama:11434"
 
@@ -21,6 +130,14 @@ class Settings(BaseSettings):
     # 복잡도 판단 기준 (단어 수)
     complexity_threshold: int = 100
 
+    # 대화 보존 정책 (일 단위, 0 = 무기한 보존)
+    # 예: RETENTION_DAYS_BY_ROLE='{"user": 90, "admin": 0}'
+    retention_enabled: bool = False
+    retention_days_by_role: dict[str, int] = {"user": 90, "admin": 0}
+    retention_default_days: int = 90          # 위 매핑에 없는 역할
+    retention_interval_seconds: int = 3600    # 정리 작업 주기
+    retention_batch_size: int = 5000          # DELETE 1회당 최대 행 수 (락/WAL 부담 제한)
+
     # Pydantic v2 방식: Config 내부 클래스 대신 model_config 사용
     model_config = SettingsConfigDict(
         # config.py -> core -> gateway -> llm-gateway (루트) 아래의 .env 찾기
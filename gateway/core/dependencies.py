@@ -4,6 +4,7 @@ from core.config import settings
 
 # 전역 클라이언트 — lifespan에서 초기화/정리
 _redis_client: airedis.Redis | None = None
+_redis_binary_client: airedis.Redis | None = None   # msgpack 등 바이너리 값용 (decode 안 함)
 _ollama_client: httpx.AsyncClient | None = None
 
 # === FastAPI Depends()용 함수 ===
@@ -14,6 +15,13 @@ async def get_redis() -> airedis.Redis:
     return _redis_client
 
 
+async def get_redis_binary() -> airedis.Redis:
+    """bytes를 그대로 반환하는 Redis 클라이언트 (캐시 값이 msgpack 바이너리)"""
+    if _redis_binary_client is None:
+        raise RuntimeError("Redis가 초기화되지 않았습니다. 서버 시작을 확인하세요.")
+    return _redis_binary_client
+
+
 async def get_ollama() -> httpx.AsyncClient:
     if _ollama_client is None:
         raise RuntimeError("Ollama가 초기화되지 않았습니다. 서버 시작을 확인하세요.")
@@ -23,12 +31,14 @@ async def get_ollama() -> httpx.AsyncClient:
 # === 수명주기 관리 (main.py의 lifespan에서 호출) ===
 
 async def init_connections():
-    global _redis_client, _ollama_client
+    global _redis_client, _redis_binary_client, _ollama_client
     
     _redis_client = airedis.from_url(
         settings.redis_url,
         decode_responses=True,  # bytes → str 자동 변환
     )
+    # decode_responses는 커넥션 풀 단위 옵션이라 바이너리용 클라이언트를 따로 둠
+    _redis_binary_client = airedis.from_url(settings.redis_url)
     _ollama_client = httpx.AsyncClient(
         base_url=settings.ollama_url,
         timeout=120.0,  # LLM 응답은 오래 걸릴 수 있음
@@ -41,11 +51,14 @@ async def init_connections():
     
     
 async def close_connections():
-    global _redis_client, _ollama_client
+    global _redis_client, _redis_binary_client, _ollama_client
     
     if _redis_client:
         await _redis_client.aclose()
         _redis_client = None
+    if _redis_binary_client:
+        await _redis_binary_client.aclose()
+        _redis_binary_client = None
     if _ollama_client:
         await _ollama_client.aclose()
         _ollama_client = None
@@ -1,99 +1,990 @@
+import heapq
+import itertools
+import math
 import time
 from collections import defaultdict
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-from core.logger import get_logger, generate_request_id, request_id_var
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from core.logger import get_logger, generate_request_id, request_id_var, log_stats
 
 logger = get_logger("metrics")
 
+# 매칭되는 라우트가 없는 요청(404 스캐너 등)의 경로 라벨
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class LatencyHistogram:
+    """
+    로그 버킷 히스토그램 (HDR 방식)
+
+    - 버킷 경계: 2^(i/8) ms → 옥타브(2배)당 8개 버킷, 상대 오차 최대 약 9%
+    - 범위: 1ms ~ 2^20ms(약 17분), 그 이상은 overflow 버킷
+    - record(): log2 한 번 + 리스트 인덱스 증가 → O(1), 요청 수와 무관
+    - 고정 크기 배열이라 메모리도 시계열당 일정 (~162개 정수)
+    """
+
+    SUB_BUCKETS = 8                                   # 옥타브당 버킷 수
+    MAX_EXPONENT = 20                                 # 2^20 ms
+    NUM_BUCKETS = SUB_BUCKETS * MAX_EXPONENT + 2      # [0]: ≤1ms, [-1]: overflow
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def bucket_index(cls, value_ms: float) -> int:
+        if value_ms <= 1.0:
+            return 0
+        return min(math.ceil(math.log2(value_ms) * cls.SUB_BUCKETS), cls.NUM_BUCKETS - 1)
+
+    @classmethod
+    def bucket_upper_ms(cls, index: int) -> float:
+        """버킷 상한값 (ms) — overflow 버킷은 inf"""
+        if index >= cls.NUM_BUCKETS - 1:
+            return math.inf
+        return 2 ** (index / cls.SUB_BUCKETS)
+
+    def record(self, value_ms: float) -> None:
+        self.counts[self.bucket_index(value_ms)] += 1
+        self.count += 1
+        self.sum += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """다른 히스토그램을 합산 (버킷 경계가 같으므로 단순 덧셈)"""
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """q(0~1) 분위수 추정값 (ms) — 해당 버킷 상한, 단 관측 최댓값을 넘지 않음"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        cumulative = 0
+        for i, c in enumerate(self.counts):
+            cumulative += c
+            if cumulative >= rank:
+                return min(self.bucket_upper_ms(i), self.max)
+        return self.max
+
+    def cumulative_buckets(self) -> list[tuple[float, int]]:
+        """
+        Prometheus용 누적 버킷 [(le_seconds, count), ...]
+        세밀한 버킷을 옥타브 경계(1ms, 2ms, 4ms, ...)로 묶어서 내보냄
+        """
+        buckets = []
+        cumulative = 0
+        for i, c in enumerate(self.counts[:-1]):
+            cumulative += c
+            if i % self.SUB_BUCKETS == 0:
+                buckets.append((self.bucket_upper_ms(i) / 1000, cumulative))
+        buckets.append((math.inf, self.count))
+        return buckets
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 1) if self.count else 0,
+            "p50": round(self.percentile(0.50), 1),
+            "p95": round(self.percentile(0.95), 1),
+            "p99": round(self.percentile(0.99), 1),
+            "max": round(self.max, 1),
+        }
+
+
+def _prom_labels(**labels) -> str:
+    """Prometheus 라벨 문자열 ({key="value",...}) — 값의 \\, ", 줄바꿈 이스케이프"""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _counter_field(prefix: str, *labels: str) -> str:
+    """카운터 필드 이름 (prefix|label|...) — 라벨 값의 \\, | 이스케이프"""
+    return "|".join((prefix, *(label.replace("\\", "\\\\").replace("|", "\\|") for label in labels)))
+
+
+def _split_counter_field(field: str) -> list[str]:
+    """_counter_field()의 역 — 이스케이프되지 않은 |로 나누고 이스케이프 해제"""
+    parts, current = [], []
+    chars = iter(field)
+    for ch in chars:
+        if ch == "\\":
+            current.append(next(chars, ""))
+        elif ch == "|":
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+
+def _prom_le(le: float) -> str:
+    return "+Inf" if le == math.inf else repr(le)
+
+
+def _prom_histogram(lines: list[str], metric: str, labels: dict, hist: LatencyHistogram) -> None:
+    """히스토그램 1개 시계열 → _bucket / _sum / _count 줄 추가 (ms → 초 변환)"""
+    for le, count in hist.cumulative_buckets():
+        lines.append(f"{metric}_bucket{_prom_labels(**labels, le=_prom_le(le))} {count}")
+    lines.append(f"{metric}_sum{_prom_labels(**labels)} {hist.sum / 1000}")
+    lines.append(f"{metric}_count{_prom_labels(**labels)} {hist.count}")
+
 
 class MetricsStore:
-    """메트릭 저장소 — 인메모리 집계"""
+    """
+    메트릭 저장소 — 인메모리 집계
+
+    asyncio 단일 스레드에서만 갱신되므로 락 없이 동작 (await 지점이 없어 원자적)
+    """
+
+    # 느린 요청 보관 개수
+    TOP_K = 5
 
     def __init__(self):
         self.total_requests = 0
         self.by_status = defaultdict(int)     # {200: 42, 404: 3, 500: 1}
-        self.by_path = defaultdict(int)        # {"/api/chat/": 30, "/api/auth/login": 12}
+        self.by_path = defaultdict(int)        # {"GET /api/chat/": 30, "POST /api/auth/login": 12}
         self.total_duration_ms = 0.0
-        self.slowest = []                      # [(duration_ms, method, path), ...]
+        # {(method, route, "2xx"): LatencyHistogram}
+        self.latency = defaultdict(LatencyHistogram)
+        # 응답 바이트 수 {"GET /api/chat/stream": 123456}
+        self.response_bytes = defaultdict(int)
+        # 스트리밍(SSE) 응답의 첫 바이트까지 시간 {(method, route): LatencyHistogram}
+        # (latency에는 스트림 종료까지의 전체 시간이 기록됨)
+        self.stream_ttfb = defaultdict(LatencyHistogram)
+        # 느린 요청 Top K — 최소 힙 [(duration_ms, seq, entry)], 힙 루트가 K개 중 가장 빠른 요청
+        self._slowest_heap = []
+        self._seq = itertools.count()          # 동일 duration 비교용 tie-breaker
 
-    def record(self, method: str, path: str, status: int, duration_ms: float):
+        # ── Agent 계측 (agent/callbacks.py) ──
+        # {(kind, name, intent, model): LatencyHistogram}
+        #   kind: node / tool / llm / llm_ttft / llm_prompt_eval / llm_eval
+        self.agent_latency = defaultdict(LatencyHistogram)
+        # SSE 스트림 writer 집계 (core/sse.py)
+        # {route: {"streams", "frames", "tokens", "heartbeats", "bytes", "duration_ms"}}
+        self.sse_streams = defaultdict(lambda: defaultdict(float))
+        # 응답 후처리 실행기 (core/side_effects.py)
+        # {(job, "lag" | "run"): LatencyHistogram}, {"job|ok": 10, "job|retry": 1, ...}
+        self.side_effect_latency = defaultdict(LatencyHistogram)
+        self.side_effect_outcomes = defaultdict(int)
+        self.side_effect_queue_depth = 0          # 게이지 (워커 프로세스별 값)
+        # 요청 전처리 — 쿼터/캐시/인증 (service/preflight_service.py)
+        # {(route, stage): LatencyHistogram}, {"route|auth_cache_hit": 10, ...}
+        self.preflight_latency = defaultdict(LatencyHistogram)
+        self.preflight_outcomes = defaultdict(int)
+        # creative_agent 도구 실행기 (agent/tool_executor.py)
+        # {(tool, outcome): LatencyHistogram} — outcome: ok / error / timeout / skipped
+        self.tool_latency = defaultdict(LatencyHistogram)
+        # 재시도 정책 (agent/retry_policy.py) {"search|resynthesize": 3, "general|fallback": 1, ...}
+        self.retry_actions = defaultdict(int)
+        # 점진적 출력 검증 (agent/stream_guard.py) {"llm_node|pass": 10, "result_synthesizer|reject": 1, ...}
+        self.stream_guard_verdicts = defaultdict(int)
+        # 모델 캐스케이드 (agent/cascade.py)
+        # {intent: {"kept", "kept_ms", "kept_tokens", "escalated", "escalated_ms", ..., "large", "large_ms", ...}}
+        #   kept: 경량 모델 응답 사용, escalated: 경량 모델 응답 폐기 후 승격, large: 승격 후 큰 모델 응답
+        self.cascade = defaultdict(lambda: defaultdict(float))
+        # 적응형 모델 라우팅 (agent/model_router.py)
+        self.model_routes = defaultdict(int)       # {"intent|model|reason": count}
+        self.model_health: dict[str, dict] = {}   # 게이지 (워커 프로세스별) {model: {"p95_ms", "error_rate", "in_flight", ...}}
+        # 의도 분류 (agent/intent_batcher.py)
+        # {(mode,): LatencyHistogram} — mode: single / batched / fallback (배치에서 얻지 못해 단건 재분류)
+        self.classify_latency = defaultdict(LatencyHistogram)
+        self.classify_batches = defaultdict(int)   # {"size|4": 배치 수, "fallback": 분배 실패 요청 수}
+        # 내부 LLM 호출 (agent/structured_llm.py)
+        # {step: {"calls", "parse_failures", "truncated", "prompt_tokens", "eval_tokens", "eval_ms"}}
+        self.internal_llm = defaultdict(lambda: defaultdict(float))
+        # 클라이언트 연결 끊김으로 중단된 생성 {model: {"generations", "tokens_generated", "tokens_saved"}}
+        self.abandoned = defaultdict(lambda: defaultdict(float))
+        # 모델별 토큰 처리량 누적 {model: {"calls", "prompt_tokens", "prompt_eval_ms", "eval_tokens", "eval_ms"}}
+        self.llm_throughput = defaultdict(lambda: defaultdict(float))
+
+    def record(
+        self, method: str, path: str, status: int, duration_ms: float,
+        bytes_sent: int = 0, ttfb_ms: float | None = None,
+    ):
+        """
+        요청 1건 기록
+
+        ttfb_ms가 주어지면 스트리밍 응답으로 취급 — 첫 바이트 시간을 별도 기록하고,
+        연결 유지 시간이 긴 것이 정상이므로 느린 요청 Top K에서는 제외
+        """
         self.total_requests += 1
         self.by_status[status] += 1
         self.by_path[f"{method} {path}"] += 1
         self.total_duration_ms += duration_ms
+        self.latency[(method, path, f"{status // 100}xx")].record(duration_ms)
+        if bytes_sent:
+            self.response_bytes[f"{method} {path}"] += bytes_sent
+        if ttfb_ms is not None:
+            self.stream_ttfb[(method, path)].record(ttfb_ms)
+            return
+
+        # 가장 느린 요청 Top K 유지 — 매번 정렬 대신 힙 push/replace: O(log K)
+        heap = self._slowest_heap
+        if len(heap) < self.TOP_K or duration_ms > heap[0][0]:
+            entry = {
+                "duration_ms": round(duration_ms, 1),
+                "method": method,
+                "path": path,
+                "status": status,
+            }
+            item = (duration_ms, next(self._seq), entry)
+            if len(heap) < self.TOP_K:
+                heapq.heappush(heap, item)
+            else:
+                heapq.heapreplace(heap, item)
+
+    def record_stage(self, kind: str, name: str, intent: str, model: str, duration_ms: float):
+        """Agent 실행 단계(노드/도구/LLM) 소요 시간 기록"""
+        self.agent_latency[(kind, name, intent, model)].record(duration_ms)
+
+    def record_llm_call(
+        self, node: str, model: str, intent: str, duration_ms: float, ttft_ms: float | None,
+        prompt_tokens: int, prompt_eval_ms: float, eval_tokens: int, eval_ms: float,
+    ):
+        """LLM 호출 1건 기록 — 전체 시간, TTFT, 프롬프트 평가/생성 시간, 토큰 처리량"""
+        self.record_stage("llm", node, intent, model, duration_ms)
+        if ttft_ms is not None:
+            self.record_stage("llm_ttft", node, intent, model, ttft_ms)
+        if prompt_eval_ms:
+            self.record_stage("llm_prompt_eval", node, intent, model, prompt_eval_ms)
+        if eval_ms:
+            self.record_stage("llm_eval", node, intent, model, eval_ms)
+
+        stats = self.llm_throughput[model]
+        stats["calls"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["prompt_eval_ms"] += prompt_eval_ms
+        stats["eval_tokens"] += eval_tokens
+        stats["eval_ms"] += eval_ms
+
+    def record_sse_stream(
+        self, route: str, frames: int, tokens: int, heartbeats: int, bytes_sent: int, duration_ms: float,
+    ):
+        """SSE 스트림 1개 종료 시 기록 — 프레임/토큰/바이트 누적 (초당 값은 조회 시 계산)"""
+        stats = self.sse_streams[route]
+        stats["streams"] += 1
+        stats["frames"] += frames
+        stats["tokens"] += tokens
+        stats["heartbeats"] += heartbeats
+        stats["bytes"] += bytes_sent
+        stats["duration_ms"] += duration_ms
+
+    def record_side_effect_stage(self, job: str, stage: str, duration_ms: float):
+        """후처리 작업 시간 — lag: 큐 대기, run: 실행(재시도 포함)"""
+        self.side_effect_latency[(job, stage)].record(duration_ms)
+
+    def record_side_effect_outcome(self, job: str, outcome: str):
+        """후처리 작업 결과 — ok / retry / failed / inline(큐가 가득 차 직접 실행)"""
+        self.side_effect_outcomes[f"{job}|{outcome}"] += 1
+
+    def record_preflight(self, route: str, timings: dict[str, float], outcomes: list[str]):
+        """요청 전처리 1건 — 단계별 시간 + 인증/응답 캐시 히트 여부"""
+        for stage, duration_ms in timings.items():
+            self.preflight_latency[(route, stage)].record(duration_ms)
+        for outcome in outcomes:
+            self.preflight_outcomes[f"{route}|{outcome}"] += 1
+
+    def record_tool_call(self, tool: str, outcome: str, duration_ms: float):
+        """도구 호출 1건 — 결과별 소요 시간 (skipped: 예산 초과로 실행하지 않음, 0ms)"""
+        self.tool_latency[(tool, outcome)].record(duration_ms)
+
+    def record_retry(self, intent: str, action: str):
+        """재시도 1건 — 선택된 방식 (resynthesize / rerun_agent / respond / fallback)"""
+        self.retry_actions[f"{intent}|{action}"] += 1
+
+    def record_stream_guard(self, node: str, verdict: str):
+        """응답 앞부분 판정 1건 — pass / reject(생성 조기 중단)"""
+        self.stream_guard_verdicts[f"{node}|{verdict}"] += 1
+
+    def record_cascade(self, intent: str, outcome: str, duration_ms: float, tokens: int):
+        """캐스케이드 판정 1건 — outcome별 건수, 모델 실행 시간, 토큰 누적"""
+        stats = self.cascade[intent]
+        stats[outcome] += 1
+        stats[f"{outcome}_ms"] += duration_ms
+        stats[f"{outcome}_tokens"] += tokens
+
+    def record_model_route(self, intent: str, model: str, reason: str):
+        """모델 라우팅 결정 1건"""
+        self.model_routes[f"{intent}|{model}|{reason}"] += 1
+
+    def record_classification(self, mode: str, duration_ms: float):
+        """의도 분류 1건 — 대기(배치 창) 포함 소요 시간"""
+        self.classify_latency[(mode,)].record(duration_ms)
+
+    def record_classify_batch(self, size: int, demuxed: int):
+        """배치 분류 호출 1건 — 크기와 결과를 분배하지 못한 요청 수"""
+        self.classify_batches[f"size|{size}"] += 1
+        if size > demuxed:
+            self.classify_batches["fallback"] += size - demuxed
 
-        # 가장 느린 요청 Top 5 유지
-        self.slowest.append({
-            "duration_ms": round(duration_ms, 1),
-            "method": method,
-            "path": path,
-            "status": status,
-        })
-        self.slowest.sort(key=lambda x: x["duration_ms"], reverse=True)
-        self.slowest = self.slowest[:5]
+    def record_internal_llm(
+        self, step: str, *, parsed: bool, truncated: bool, prompt_tokens: int, eval_tokens: int, eval_ms: float,
+    ):
+        """내부 호출 1건 — 파싱 성공 여부, 생성 상한 도달 여부, 토큰 수, 생성 시간"""
+        stats = self.internal_llm[step]
+        stats["calls"] += 1
+        stats["parse_failures"] += 0 if parsed else 1
+        stats["truncated"] += 1 if truncated else 0
+        stats["prompt_tokens"] += prompt_tokens
+        stats["eval_tokens"] += eval_tokens
+        stats["eval_ms"] += eval_ms
+
+    def internal_llm_summary(self) -> dict:
+        result = {}
+        for step, s in sorted(self.internal_llm.items()):
+            calls = s["calls"] or 1
+            result[step] = {
+                "calls": int(s["calls"]),
+                "parse_failure_rate": round(s["parse_failures"] / calls, 3),
+                "truncated": int(s["truncated"]),
+                "avg_prompt_tokens": round(s["prompt_tokens"] / calls, 1),
+                "avg_eval_tokens": round(s["eval_tokens"] / calls, 1),
+                "avg_eval_ms": round(s["eval_ms"] / calls, 1),
+            }
+        return result
+
+    def classify_batch_summary(self) -> dict:
+        sizes = {int(k[5:]): v for k, v in self.classify_batches.items() if k.startswith("size|")}
+        batches = sum(sizes.values())
+        requests = sum(size * count for size, count in sizes.items())
+        return {
+            "batches": batches,
+            "avg_size": round(requests / batches, 2) if batches else 0.0,
+            "sizes": dict(sorted(sizes.items())),
+            "fallback_requests": self.classify_batches["fallback"],
+            "latency": {mode: hist.snapshot() for (mode,), hist in sorted(self.classify_latency.items())},
+        }
+
+    def cascade_summary(self) -> dict:
+        """
+        의도별 승격률과 절약량 추정
+
+        모두 큰 모델로 답했을 때의 비용 = 요청 수 × 승격 후 큰 모델 응답의 평균 비용
+        latency_saved_ms = 그 비용 - (경량 모델 실행 시간 전체 + 큰 모델 실행 시간)
+        large_tokens_avoided = 경량 모델 응답을 그대로 쓴 건수 × 큰 모델 평균 토큰
+        (승격된 질문이 더 어려운 편이라 평균 비용은 보수적인 추정치가 아님 — 추세 비교용)
+        """
+        result = {}
+        for intent, s in sorted(self.cascade.items()):
+            requests = s["kept"] + s["escalated"]
+            avg_large_ms = s["large_ms"] / s["large"] if s["large"] else 0.0
+            avg_large_tokens = s["large_tokens"] / s["large"] if s["large"] else 0.0
+            spent_ms = s["kept_ms"] + s["escalated_ms"] + s["large_ms"]
+            result[intent] = {
+                "requests": int(requests),
+                "escalated": int(s["escalated"]),
+                "escalation_rate": round(s["escalated"] / requests, 3) if requests else 0.0,
+                "latency_saved_ms": round(requests * avg_large_ms - spent_ms, 1) if s["large"] else None,
+                "large_tokens_avoided": round(s["kept"] * avg_large_tokens) if s["large"] else None,
+                "small_tokens_wasted": int(s["escalated_tokens"]),
+            }
+        return result
+
+    def record_abandoned_generation(self, model: str, tokens_generated: int) -> int:
+        """
+        중단된 생성 1건 기록 — 절약한 토큰 수(추정)를 반환
+
+        절약량 = 해당 모델의 LLM 호출당 평균 생성 토큰 - 중단 시점까지 생성한 토큰 (최소 0)
+        """
+        model = model or "unknown"
+        stats = self.llm_throughput.get(model)
+        avg_eval_tokens = stats["eval_tokens"] / stats["calls"] if stats and stats["calls"] else 0
+        tokens_saved = max(0, round(avg_eval_tokens - tokens_generated))
+
+        abandoned = self.abandoned[model]
+        abandoned["generations"] += 1
+        abandoned["tokens_generated"] += tokens_generated
+        abandoned["tokens_saved"] += tokens_saved
+        return tokens_saved
+
+    def sse_summary(self) -> dict:
+        result = {}
+        for route, stats in sorted(self.sse_streams.items()):
+            seconds = stats["duration_ms"] / 1000
+            result[route] = {
+                "streams": int(stats["streams"]),
+                "frames": int(stats["frames"]),
+                "heartbeats": int(stats["heartbeats"]),
+                "tokens_per_frame": round(stats["tokens"] / stats["frames"], 1) if stats["frames"] else 0.0,
+                "frames_per_sec": round(stats["frames"] / seconds, 1) if seconds else 0.0,
+                "bytes_per_sec": round(stats["bytes"] / seconds, 1) if seconds else 0.0,
+            }
+        return result
+
+    def agent_summary(self) -> dict:
+        def per_sec(tokens: float, ms: float) -> float:
+            return round(tokens / (ms / 1000), 1) if ms else 0.0
+
+        return {
+            "stages": {
+                f"{kind} {name} [{intent}/{model}]": hist.snapshot()
+                for (kind, name, intent, model), hist in sorted(self.agent_latency.items())
+            },
+            "llm_throughput": {
+                model: {
+                    "calls": int(stats["calls"]),
+                    "prompt_tokens_per_sec": per_sec(stats["prompt_tokens"], stats["prompt_eval_ms"]),
+                    "eval_tokens_per_sec": per_sec(stats["eval_tokens"], stats["eval_ms"]),
+                }
+                for model, stats in sorted(self.llm_throughput.items())
+            },
+        }
+
+    # ── 직렬화 (멀티 워커 집계용, core/metrics_sync.py) ──
+    # 모든 누적값을 {필드: 값} 형태로 평탄화 → Redis 해시에 HINCRBY로 합산 가능
+    # 나눠서 복원하는 라벨 값의 \, |는 이스케이프 (_counter_field)
+    #   total_requests / total_duration_ms
+    #   status|200, path|GET /health, bytes|GET /health
+    #   http|GET|/health|2xx|b37, http|GET|/health|2xx|sum, ...|count
+    #   ttfb|GET|/api/chat/stream|b40, ...
+    #   agent|node|classifier|search|llama3.2:3b|b12, ...
+    #   llm|qwen2.5:7b|eval_tokens
+    #   sse|/api/chat/stream|frames
+    #   abandon|qwen2.5:7b|tokens_saved
+    #   bg|log_usage|lag|b12, bgout|log_usage|ok
+    #   pre|/api/chat/|redis|b0, preout|/api/chat/|auth_cache_hit
+    #   tool|search_web|timeout|b60, ...
+    #   retry|search|resynthesize
+    #   guard|result_synthesizer|reject
+    #   cascade|search|kept_ms
+    #   route|creative|llama3.2:3b|degraded_slo
+    #   clsb|size|4, clsb|fallback, cls|batched|b60, ...
+    #   internal|classifier|eval_tokens
+
+    def _histogram_families(self) -> tuple[tuple[str, dict], ...]:
+        return (
+            ("http", self.latency),
+            ("ttfb", self.stream_ttfb),
+            ("agent", self.agent_latency),
+            ("bg", self.side_effect_latency),
+            ("pre", self.preflight_latency),
+            ("tool", self.tool_latency),
+            ("cls", self.classify_latency),
+        )
+
+    def to_counters(self) -> dict[str, int | float]:
+        counters: dict[str, int | float] = {
+            "total_requests": self.total_requests,
+            "total_duration_ms": self.total_duration_ms,
+        }
+        for status, count in self.by_status.items():
+            counters[f"status|{status}"] = count
+        for path, count in self.by_path.items():
+            counters[f"path|{path}"] = count
+        for path, count in self.response_bytes.items():
+            counters[f"bytes|{path}"] = count
+        for prefix, histograms in self._histogram_families():
+            for labels, hist in histograms.items():
+                series = _counter_field(prefix, *labels)
+                for i, count in enumerate(hist.counts):
+                    if count:
+                        counters[f"{series}|b{i}"] = count
+                counters[f"{series}|sum"] = hist.sum
+                counters[f"{series}|count"] = hist.count
+        for model, stats in self.llm_throughput.items():
+            for field, value in stats.items():
+                counters[_counter_field("llm", model, field)] = value
+        for route, stats in self.sse_streams.items():
+            for field, value in stats.items():
+                counters[_counter_field("sse", route, field)] = value
+        for model, stats in self.abandoned.items():
+            for field, value in stats.items():
+                counters[_counter_field("abandon", model, field)] = value
+        for key, count in self.side_effect_outcomes.items():
+            counters[f"bgout|{key}"] = count
+        for key, count in self.preflight_outcomes.items():
+            counters[f"preout|{key}"] = count
+        for key, count in self.retry_actions.items():
+            counters[f"retry|{key}"] = count
+        for key, count in self.stream_guard_verdicts.items():
+            counters[f"guard|{key}"] = count
+        for intent, stats in self.cascade.items():
+            for field, value in stats.items():
+                counters[_counter_field("cascade", intent, field)] = value
+        for key, count in self.model_routes.items():
+            counters[f"route|{key}"] = count
+        for key, count in self.classify_batches.items():
+            counters[f"clsb|{key}"] = count
+        for step, stats in self.internal_llm.items():
+            for field, value in stats.items():
+                counters[_counter_field("internal", step, field)] = value
+        return counters
+
+    def maxima(self) -> dict[str, float]:
+        """히스토그램 시계열별 최댓값 (합산이 아니라 max로 병합해야 하는 값)"""
+        result = {}
+        for prefix, histograms in self._histogram_families():
+            for labels, hist in histograms.items():
+                result[_counter_field(prefix, *labels)] = hist.max
+        return result
+
+    @classmethod
+    def from_counters(
+        cls, counters: dict[str, float], maxima: dict[str, float] | None = None,
+        slowest: list[tuple[float, dict]] | None = None,
+    ) -> "MetricsStore":
+        """to_counters()의 (합산된) 결과로 MetricsStore 복원 — 여러 워커의 병합 뷰 생성용"""
+        store = cls()
+        maxima = maxima or {}
+        for field, value in counters.items():
+            if field == "total_requests":
+                store.total_requests = int(value)
+            elif field == "total_duration_ms":
+                store.total_duration_ms = float(value)
+            elif field.startswith("status|"):
+                store.by_status[int(field[7:])] = int(value)
+            elif field.startswith("path|"):
+                store.by_path[field[5:]] = int(value)
+            elif field.startswith("bytes|"):
+                store.response_bytes[field[6:]] = int(value)
+            elif field.startswith("llm|"):
+                _, model, stat = _split_counter_field(field)
+                store.llm_throughput[model][stat] = float(value)
+            elif field.startswith("sse|"):
+                _, route, stat = _split_counter_field(field)
+                store.sse_streams[route][stat] = float(value)
+            elif field.startswith("abandon|"):
+                _, model, stat = _split_counter_field(field)
+                store.abandoned[model][stat] = float(value)
+            elif field.startswith("bgout|"):
+                store.side_effect_outcomes[field[6:]] = int(value)
+            elif field.startswith("preout|"):
+                store.preflight_outcomes[field[7:]] = int(value)
+            elif field.startswith("retry|"):
+                store.retry_actions[field[6:]] = int(value)
+            elif field.startswith("guard|"):
+                store.stream_guard_verdicts[field[6:]] = int(value)
+            elif field.startswith("internal|"):
+                _, step, stat = _split_counter_field(field)
+                store.internal_llm[step][stat] = float(value)
+            elif field.startswith("clsb|"):
+                store.classify_batches[field[5:]] = int(value)
+            elif field.startswith("route|"):
+                store.model_routes[field[6:]] = int(value)
+            elif field.startswith("cascade|"):
+                _, intent, stat = _split_counter_field(field)
+                store.cascade[intent][stat] = float(value)
+            elif field.startswith(("http|", "ttfb|", "agent|", "bg|", "pre|", "tool|", "cls|")):
+                series = field.rsplit("|", 1)[0]
+                prefix, *labels, slot = _split_counter_field(field)
+                histograms = dict(store._histogram_families())[prefix]
+                hist = histograms[tuple(labels)]
+                if slot == "sum":
+                    hist.sum = float(value)
+                elif slot == "count":
+                    hist.count = int(value)
+                else:
+                    hist.counts[int(slot[1:])] = int(value)
+                hist.max = float(maxima.get(series, hist.max))
+        for duration_ms, entry in slowest or []:
+            store._slowest_heap.append((duration_ms, next(store._seq), entry))
+        heapq.heapify(store._slowest_heap)
+        return store
+
+    def slowest_items(self) -> list[tuple[float, int, dict]]:
+        """힙 원본 [(duration_ms, seq, entry), ...] — seq로 신규 항목 판별"""
+        return list(self._slowest_heap)
+
+    @property
+    def slowest(self) -> list[dict]:
+        """느린 순으로 정렬된 Top K (조회 시에만 정렬)"""
+        return [entry for _, _, entry in sorted(self._slowest_heap, reverse=True)]
+
+    def overall_latency(self) -> LatencyHistogram:
+        total = LatencyHistogram()
+        for hist in self.latency.values():
+            total.merge(hist)
+        return total
 
     def summary(self) -> dict:
         avg = round(self.total_duration_ms / self.total_requests, 1) if self.total_requests else 0
+        overall = self.overall_latency()
         return {
             "total_requests": self.total_requests,
             "avg_response_time_ms": avg,
+            "percentiles_ms": {
+                "p50": round(overall.percentile(0.50), 1),
+                "p95": round(overall.percentile(0.95), 1),
+                "p99": round(overall.percentile(0.99), 1),
+            },
             "by_status": dict(self.by_status),
             "by_path": dict(self.by_path),
+            "latency_by_route": {
+                f"{method} {path} {status_class}": hist.snapshot()
+                for (method, path, status_class), hist in sorted(self.latency.items())
+            },
+            "stream_ttfb_by_route": {
+                f"{method} {path}": hist.snapshot()
+                for (method, path), hist in sorted(self.stream_ttfb.items())
+            },
+            "response_bytes_by_path": dict(self.response_bytes),
             "slowest_top5": self.slowest,
+            "sse": self.sse_summary(),
+            "abandoned_generations": {
+                model: {field: int(value) for field, value in stats.items()}
+                for model, stats in sorted(self.abandoned.items())
+            },
+            "agent": self.agent_summary(),
+            "side_effects": {
+                "queue_depth": self.side_effect_queue_depth,
+                "latency": {
+                    f"{job} {stage}": hist.snapshot()
+                    for (job, stage), hist in sorted(self.side_effect_latency.items())
+                },
+                "outcomes": dict(sorted(self.side_effect_outcomes.items())),
+            },
+            "preflight": {
+                "latency": {
+                    f"{route} {stage}": hist.snapshot()
+                    for (route, stage), hist in sorted(self.preflight_latency.items())
+                },
+                "outcomes": dict(sorted(self.preflight_outcomes.items())),
+            },
+            "tools": {
+                f"{tool} {outcome}": hist.snapshot()
+                for (tool, outcome), hist in sorted(self.tool_latency.items())
+            },
+            "retries": dict(sorted(self.retry_actions.items())),
+            "stream_guard": dict(sorted(self.stream_guard_verdicts.items())),
+            "cascade": self.cascade_summary(),
+            "classifier": self.classify_batch_summary(),
+            "internal_llm": self.internal_llm_summary(),
+            "model_routing": {
+                "decisions": dict(sorted(self.model_routes.items())),
+                "health": dict(sorted(self.model_health.items())),
+            },
+            "logging": log_stats(),
         }
 
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (v0.0.4)"""
+        lines = [
+            "# HELP gateway_http_requests_total Total HTTP requests by status code.",
+            "# TYPE gateway_http_requests_total counter",
+        ]
+        for status, count in sorted(self.by_status.items()):
+            lines.append(f"gateway_http_requests_total{_prom_labels(status=status)} {count}")
+
+        lines += [
+            "# HELP gateway_http_request_duration_seconds HTTP request latency.",
+            "# TYPE gateway_http_request_duration_seconds histogram",
+        ]
+        for (method, path, status_class), hist in sorted(self.latency.items()):
+            labels = {"method": method, "route": path, "status_class": status_class}
+            _prom_histogram(lines, "gateway_http_request_duration_seconds", labels, hist)
+
+        lines += [
+            "# HELP gateway_http_stream_first_byte_seconds Time to first body chunk of streaming responses.",
+            "# TYPE gateway_http_stream_first_byte_seconds histogram",
+        ]
+        for (method, path), hist in sorted(self.stream_ttfb.items()):
+            _prom_histogram(lines, "gateway_http_stream_first_byte_seconds", {"method": method, "route": path}, hist)
+
+        lines += [
+            "# HELP gateway_http_response_bytes_total Response body bytes sent.",
+            "# TYPE gateway_http_response_bytes_total counter",
+        ]
+        for key, count in sorted(self.response_bytes.items()):
+            method, path = key.split(" ", 1)
+            lines.append(f"gateway_http_response_bytes_total{_prom_labels(method=method, route=path)} {count}")
+
+        lines += [
+            "# HELP gateway_agent_stage_duration_seconds Agent graph node/LLM/tool latency.",
+            "# TYPE gateway_agent_stage_duration_seconds histogram",
+        ]
+        for (kind, name, intent, model), hist in sorted(self.agent_latency.items()):
+            labels = {"kind": kind, "name": name, "intent": intent, "model": model}
+            _prom_histogram(lines, "gateway_agent_stage_duration_seconds", labels, hist)
+
+        # 처리량은 rate(tokens_total) / rate(seconds_total)로 계산
+        for field, metric, scale, help_text in (
+            ("prompt_tokens", "gateway_llm_prompt_tokens_total", 1, "Prompt tokens evaluated by the LLM backend."),
+            ("prompt_eval_ms", "gateway_llm_prompt_eval_seconds_total", 1000, "Time spent evaluating prompts."),
+            ("eval_tokens", "gateway_llm_eval_tokens_total", 1, "Tokens generated by the LLM backend."),
+            ("eval_ms", "gateway_llm_eval_seconds_total", 1000, "Time spent generating tokens."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for model, stats in sorted(self.llm_throughput.items()):
+                value = stats[field] / scale if scale != 1 else int(stats[field])
+                lines.append(f"{metric}{_prom_labels(model=model)} {value}")
+
+        # SSE 스트림 — frames/s = rate(frames_total) / rate(duration_seconds_total)
+        for field, metric, scale, help_text in (
+            ("streams", "gateway_sse_streams_total", 1, "Completed SSE streams."),
+            ("frames", "gateway_sse_frames_total", 1, "SSE data frames sent (after token coalescing)."),
+            ("tokens", "gateway_sse_tokens_total", 1, "LLM tokens sent over SSE."),
+            ("heartbeats", "gateway_sse_heartbeats_total", 1, "SSE heartbeat comments sent."),
+            ("bytes", "gateway_sse_bytes_total", 1, "SSE bytes sent."),
+            ("duration_ms", "gateway_sse_duration_seconds_total", 1000, "Total SSE stream time."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for route, stats in sorted(self.sse_streams.items()):
+                value = stats[field] / scale if scale != 1 else int(stats[field])
+                lines.append(f"{metric}{_prom_labels(route=route)} {value}")
+
+        for field, metric, help_text in (
+            ("generations", "gateway_abandoned_generations_total", "Generations cancelled because the client disconnected."),
+            ("tokens_generated", "gateway_abandoned_tokens_generated_total", "Tokens generated before the client disconnected."),
+            ("tokens_saved", "gateway_abandoned_tokens_saved_total", "Estimated tokens not generated thanks to cancellation."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for model, stats in sorted(self.abandoned.items()):
+                lines.append(f"{metric}{_prom_labels(model=model)} {int(stats[field])}")
+
+        lines += [
+            "# HELP gateway_side_effect_duration_seconds Background side-effect queue lag and run time.",
+            "# TYPE gateway_side_effect_duration_seconds histogram",
+        ]
+        for (job, stage), hist in sorted(self.side_effect_latency.items()):
+            _prom_histogram(lines, "gateway_side_effect_duration_seconds", {"job": job, "stage": stage}, hist)
+        lines += [
+            "# HELP gateway_side_effects_total Background side-effect jobs by outcome.",
+            "# TYPE gateway_side_effects_total counter",
+        ]
+        for key, count in sorted(self.side_effect_outcomes.items()):
+            job, outcome = key.split("|")
+            lines.append(f"gateway_side_effects_total{_prom_labels(job=job, outcome=outcome)} {count}")
+        lines += [
+            "# HELP gateway_side_effect_queue_depth Background side-effect jobs waiting in this worker.",
+            "# TYPE gateway_side_effect_queue_depth gauge",
+            f"gateway_side_effect_queue_depth {self.side_effect_queue_depth}",
+        ]
+
+        lines += [
+            "# HELP gateway_preflight_duration_seconds Request preflight (auth/quota/cache) latency by stage.",
+            "# TYPE gateway_preflight_duration_seconds histogram",
+        ]
+        for (route, stage), hist in sorted(self.preflight_latency.items()):
+            _prom_histogram(lines, "gateway_preflight_duration_seconds", {"route": route, "stage": stage}, hist)
+        lines += [
+            "# HELP gateway_preflight_total Request preflight cache lookups by outcome.",
+            "# TYPE gateway_preflight_total counter",
+        ]
+        for key, count in sorted(self.preflight_outcomes.items()):
+            route, outcome = key.split("|")
+            lines.append(f"gateway_preflight_total{_prom_labels(route=route, outcome=outcome)} {count}")
+
+        lines += [
+            "# HELP gateway_tool_call_duration_seconds Agent tool call latency by outcome (ok/error/timeout/skipped).",
+            "# TYPE gateway_tool_call_duration_seconds histogram",
+        ]
+        for (tool, outcome), hist in sorted(self.tool_latency.items()):
+            _prom_histogram(lines, "gateway_tool_call_duration_seconds", {"tool": tool, "outcome": outcome}, hist)
+        lines += [
+            "# HELP gateway_agent_retries_total Agent retries by intent and chosen retry action.",
+            "# TYPE gateway_agent_retries_total counter",
+        ]
+        for key, count in sorted(self.retry_actions.items()):
+            intent, action = key.split("|")
+            lines.append(f"gateway_agent_retries_total{_prom_labels(intent=intent, action=action)} {count}")
+        lines += [
+            "# HELP gateway_stream_guard_total Early output guard verdicts on the first tokens of an answer.",
+            "# TYPE gateway_stream_guard_total counter",
+        ]
+        for key, count in sorted(self.stream_guard_verdicts.items()):
+            node, verdict = key.split("|")
+            lines.append(f"gateway_stream_guard_total{_prom_labels(node=node, verdict=verdict)} {count}")
+
+        # 캐스케이드 — 승격률 = escalated / (kept + escalated)
+        for suffix, metric, scale, help_text in (
+            ("", "gateway_cascade_answers_total", 1, "Cascade answers by outcome (kept small / escalated small / large)."),
+            ("_ms", "gateway_cascade_model_seconds_total", 1000, "Model execution time of cascade answers."),
+            ("_tokens", "gateway_cascade_tokens_total", 1, "Tokens of cascade answers."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for intent, stats in sorted(self.cascade.items()):
+                for outcome in ("kept", "escalated", "large"):
+                    value = stats[outcome + suffix] / scale if scale != 1 else int(stats[outcome + suffix])
+                    lines.append(f"{metric}{_prom_labels(intent=intent, outcome=outcome)} {value}")
+
+        # 의도 분류 — 요청별 소요 시간(배치 창 대기 포함), 배치 크기 분포
+        lines += [
+            "# HELP gateway_classifier_duration_seconds Intent classification latency per request by mode.",
+            "# TYPE gateway_classifier_duration_seconds histogram",
+        ]
+        for (mode,), hist in sorted(self.classify_latency.items()):
+            _prom_histogram(lines, "gateway_classifier_duration_seconds", {"mode": mode}, hist)
+        lines += [
+            "# HELP gateway_classifier_batches_total Batched intent classification calls by batch size.",
+            "# TYPE gateway_classifier_batches_total counter",
+        ]
+        for size, count in self.classify_batch_summary()["sizes"].items():
+            lines.append(f"gateway_classifier_batches_total{_prom_labels(size=str(size))} {count}")
+        lines += [
+            "# HELP gateway_classifier_batch_fallbacks_total Requests re-classified singly after a batch failed to yield their result.",
+            "# TYPE gateway_classifier_batch_fallbacks_total counter",
+            f"gateway_classifier_batch_fallbacks_total {self.classify_batches['fallback']}",
+        ]
+
+        # 내부 LLM 호출 — 파싱 실패율 = parse_error / 전체, 생성 토큰이 분류기 지연의 대부분
+        lines += [
+            "# HELP gateway_internal_llm_calls_total Internal JSON LLM calls by step and parse outcome.",
+            "# TYPE gateway_internal_llm_calls_total counter",
+        ]
+        for step, stats in sorted(self.internal_llm.items()):
+            failures = int(stats["parse_failures"])
+            lines.append(f"gateway_internal_llm_calls_total{_prom_labels(step=step, outcome='ok')} {int(stats['calls']) - failures}")
+            lines.append(f"gateway_internal_llm_calls_total{_prom_labels(step=step, outcome='parse_error')} {failures}")
+        lines += [
+            "# HELP gateway_internal_llm_tokens_total Tokens of internal JSON LLM calls (prompt / generated).",
+            "# TYPE gateway_internal_llm_tokens_total counter",
+        ]
+        for step, stats in sorted(self.internal_llm.items()):
+            lines.append(f"gateway_internal_llm_tokens_total{_prom_labels(step=step, kind='prompt')} {int(stats['prompt_tokens'])}")
+            lines.append(f"gateway_internal_llm_tokens_total{_prom_labels(step=step, kind='generated')} {int(stats['eval_tokens'])}")
+        lines += [
+            "# HELP gateway_internal_llm_truncated_total Internal JSON LLM calls that hit their num_predict cap.",
+            "# TYPE gateway_internal_llm_truncated_total counter",
+        ]
+        for step, stats in sorted(self.internal_llm.items()):
+            lines.append(f"gateway_internal_llm_truncated_total{_prom_labels(step=step)} {int(stats['truncated'])}")
+
+        # 모델 라우팅 — 결정은 누적 카운터, 모델 상태는 이 워커의 게이지
+        lines += [
+            "# HELP gateway_model_route_total Model routing decisions by intent, chosen model and reason.",
+            "# TYPE gateway_model_route_total counter",
+        ]
+        for key, count in sorted(self.model_routes.items()):
+            intent, model, reason = key.split("|")
+            lines.append(f"gateway_model_route_total{_prom_labels(intent=intent, model=model, reason=reason)} {count}")
+        for field, metric, scale, help_text in (
+            ("p95_ms", "gateway_model_latency_p95_seconds", 1000, "Rolling p95 LLM call latency (queueing included) in this worker."),
+            ("error_rate", "gateway_model_error_rate", 1, "Rolling LLM call error rate in this worker."),
+            ("in_flight", "gateway_model_in_flight", 1, "LLM calls currently running from this worker."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            for model, health in sorted(self.model_health.items()):
+                lines.append(f"{metric}{_prom_labels(model=model)} {health[field] / scale if scale != 1 else health[field]}")
+
+        # 로깅 파이프라인 (워커 프로세스별 값)
+        stats = log_stats()
+        lines += [
+            "# HELP gateway_log_records_dropped_total Log records dropped because the log queue was full.",
+            "# TYPE gateway_log_records_dropped_total counter",
+            f"gateway_log_records_dropped_total {stats['dropped']}",
+            "# HELP gateway_log_records_sampled_out_total Log records skipped by sampling.",
+            "# TYPE gateway_log_records_sampled_out_total counter",
+            f"gateway_log_records_sampled_out_total {stats['sampled_out']}",
+            "# HELP gateway_log_queue_depth Log records waiting to be written.",
+            "# TYPE gateway_log_queue_depth gauge",
+            f"gateway_log_queue_depth {stats['queued']}",
+        ]
+
+        return "\n".join(lines) + "\n"
+
 
 # 싱글톤 인스턴스
 metrics_store = MetricsStore()
 
 
-class RequestMetricsMiddleware(BaseHTTPMiddleware):
+class RequestMetricsMiddleware:
     """
-    모든 HTTP 요청을 자동 계측하는 미들웨어
-    
+    모든 HTTP 요청을 자동 계측하는 미들웨어 (순수 ASGI)
+
     기능:
-    1. 요청마다 고유 request_id 부여
-    2. 응답 시간 측정
-    3. JSON 로그 출력
-    4. 메트릭 집계
+    1. 요청마다 고유 request_id 부여 (X-Request-ID 응답 헤더)
+    2. 응답 시간 측정 — 스트리밍(SSE) 응답은 마지막 청크 전송까지의 전체 시간
+    3. 응답 바이트 수, 스트리밍 응답의 첫 바이트 시간, 클라이언트 연결 끊김 감지
+    4. JSON 로그 출력 / 메트릭 집계
+
+    BaseHTTPMiddleware는 응답 본문을 별도 태스크 + 메모리 스트림으로 중계하고,
+    call_next가 헤더 시점에 반환되어 SSE 시간이 헤더까지만 측정됨
+    → send/receive를 감싸서 ASGI 메시지가 지나갈 때 직접 계측
     """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # 1. 요청 추적 ID 생성 및 ContextVar에 저장
         req_id = generate_request_id()
-        request_id_var.set(req_id)
+        token = request_id_var.set(req_id)
 
         # 2. 시작 시간 기록
         start = time.perf_counter()
+        status = 500                # 응답 시작 전에 예외가 나면 500으로 기록
+        bytes_sent = 0
+        streaming = False
+        first_byte_ms = None
+        disconnected = False
 
-        # 3. 다음 핸들러 실행 (실제 API 로직)
-        response = await call_next(request)
-
-        # 4. 응답 시간 계산
-        duration_ms = (time.perf_counter() - start) * 1000
+        async def receive_wrapper() -> Message:
+            nonlocal disconnected
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected = True
+            return message
 
-        # 5. 메트릭 기록
-        metrics_store.record(
-            method=request.method,
-            path=request.url.path,
-            status=response.status_code,
-            duration_ms=duration_ms,
-        )
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, bytes_sent, streaming, first_byte_ms
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                # 응답 헤더에 request_id 포함 (디버깅용)
+                headers.append("X-Request-ID", req_id)
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                # 본문이 여러 청크로 나뉘어 전송되면 스트리밍 응답 (SSE, NDJSON 내보내기)
+                if message.get("more_body", False):
+                    streaming = True
+                if body and first_byte_ms is None:
+                    first_byte_ms = (time.perf_counter() - start) * 1000
+                bytes_sent += len(body)
+            await send(message)
 
-        # 6. 구조화된 로그 출력
-        logger.info(
-            f"{request.method} {request.url.path} {response.status_code} {duration_ms:.0f}ms",
-            extra={"extra_data": {
-                "method": request.method,
-                "path": request.url.path,
-                "status": response.status_code,
-                "duration_ms": round(duration_ms, 1),
-            }}
-        )
+        try:
+            # 3. 다음 핸들러 실행 (실제 API 로직 + 응답 본문 전송까지)
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            # 4. 응답 시간 계산
+            duration_ms = (time.perf_counter() - start) * 1000
 
-        # 7. 응답 헤더에 request_id 포함 (디버깅용)
-        response.headers["X-Request-ID"] = req_id
+            # 5. 메트릭 기록
+            # 실제 경로 대신 라우트 템플릿 사용 (/api/conversations/{conversation_id})
+            # → ID마다 시계열이 생기지 않도록 라벨 개수를 라우트 수로 제한
+            method = scope["method"]
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            metrics_store.record(
+                method=method,
+                path=path,
+                status=status,
+                duration_ms=duration_ms,
+                bytes_sent=bytes_sent,
+                ttfb_ms=(first_byte_ms or duration_ms) if streaming else None,
+            )
 
-        return response
+            # 6. 구조화된 로그 출력
+            extra_data = {
+                "method": method,
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round(duration_ms, 1),
+                "bytes": bytes_sent,
+            }
+            if streaming:
+                extra_data["ttfb_ms"] = round(first_byte_ms or duration_ms, 1)
+                extra_data["client_disconnected"] = disconnected
+            logger.info(
+                f"{method} {scope['path']} {status} {duration_ms:.0f}ms",
+                extra={"extra_data": extra_data},
+            )
+            request_id_var.reset(token)
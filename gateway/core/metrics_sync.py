@@ -0,0 +1,167 @@
+"""
+멀티 워커 메트릭 집계 — Redis 델타 플러시
+
+uvicorn --workers N으로 띄우면 metrics_store가 프로세스마다 따로 존재하므로
+/api/metrics가 요청을 받은 워커 하나의 값만 보여주게 됩니다.
+
+동작:
+  1. 각 워커가 주기적으로 "지난 플러시 이후 증가분"만 Redis 해시에 HINCRBY
+     (MULTI 트랜잭션 1회 — 네트워크 왕복 1번)
+  2. 최댓값은 ZADD GT(더 클 때만 갱신), 느린 요청은 크기 제한 Sorted Set
+     (지난 플러시 이후 커진 최댓값 / 새 느린 요청만 — 바뀐 게 없으면 MULTI 생략)
+  3. 조회 시 자기 워커를 먼저 플러시한 뒤 Redis 값으로 MetricsStore를 복원
+     → summary()/render_prometheus()를 그대로 사용
+
+Redis 키 구조 (prefix 기본값 "metrics"):
+  {prefix}:counters  → Hash  (MetricsStore.to_counters() 필드별 누적값)
+  {prefix}:max       → ZSet  (히스토그램 시계열별 최댓값)
+  {prefix}:slowest   → ZSet  (느린 요청 Top K, score = duration_ms)
+
+설정: METRICS_BACKEND=redis, METRICS_FLUSH_INTERVAL_SECONDS=5
+"""
+import asyncio
+import os
+from contextlib import suppress
+from redis.asyncio import Redis
+
+from core.config import settings
+from core.logger import get_logger
+from core.metrics import MetricsStore, metrics_store
+from core.serialization import dumps_str, loads
+
+logger = get_logger("metrics_sync")
+
+
+class RedisMetricsSync:
+    """워커 1개의 로컬 MetricsStore ↔ Redis 공유 집계"""
+
+    def __init__(self, store: MetricsStore, redis: Redis, prefix: str = "metrics"):
+        self.store = store
+        self.redis = redis
+        self.counters_key = f"{prefix}:counters"
+        self.max_key = f"{prefix}:max"
+        self.slowest_key = f"{prefix}:slowest"
+        self._flushed: dict[str, int | float] = {}    # 마지막으로 플러시한 누적값
+        self._flushed_maxima: dict[str, float] = {}   # 마지막으로 플러시한 최댓값
+        self._flushed_slowest: set[int] = set()       # 이미 보낸 느린 요청 seq
+        self._lock = asyncio.Lock()                   # 주기 플러시와 조회 플러시 중복 방지
+
+    async def flush(self) -> int:
+        """지난 플러시 이후 증가분만 Redis에 반영 — 반영한 필드 수 반환"""
+        async with self._lock:
+            # 스냅샷은 await 없이 한 번에 떠서 기록 중인 값과 섞이지 않게 함
+            current = self.store.to_counters()
+            maxima = self.store.maxima()
+            slowest = self.store.slowest_items()
+
+            pipe = self.redis.pipeline(transaction=True)
+            fields = 0
+            for field, value in current.items():
+                delta = value - self._flushed.get(field, 0)
+                if not delta:
+                    continue
+                fields += 1
+                if isinstance(delta, int):
+                    pipe.hincrby(self.counters_key, field, delta)
+                else:
+                    pipe.hincrbyfloat(self.counters_key, field, delta)
+
+            new_maxima = {
+                series: value for series, value in maxima.items()
+                if value > self._flushed_maxima.get(series, 0.0)
+            }
+            if new_maxima:
+                pipe.zadd(self.max_key, new_maxima, gt=True)
+
+            # 멤버에 워커 pid + seq를 넣어 같은 내용의 요청이 하나로 합쳐지지 않게 함
+            new_slowest = {
+                dumps_str([f"{os.getpid()}:{seq}", entry]): duration_ms
+                for duration_ms, seq, entry in slowest
+                if seq not in self._flushed_slowest
+            }
+            if new_slowest:
+                pipe.zadd(self.slowest_key, new_slowest)
+                pipe.zremrangebyrank(self.slowest_key, 0, -(MetricsStore.TOP_K + 1))
+
+            if fields or new_maxima or new_slowest:
+                await pipe.execute()
+
+            self._flushed = current
+            self._flushed_maxima = maxima
+            self._flushed_slowest = {seq for _, seq, _ in slowest}
+            return fields
+
+    async def merged_store(self) -> MetricsStore:
+        """
+        Redis에 모인 전체 워커 값으로 MetricsStore 복원
+
+        카운터 해시는 HGETALL 한 번으로 읽으므로 원자적이고, 각 워커의 플러시는
+        MULTI로 반영되므로 특정 워커의 증가분이 일부만 보이는 일은 없음
+        (redis-py 5.1은 MULTI 안의 HGETALL 응답 처리에 버그가 있어 일반 파이프라인 사용)
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hgetall(self.counters_key)
+        pipe.zrange(self.max_key, 0, -1, withscores=True)
+        pipe.zrange(self.slowest_key, 0, -1, withscores=True)
+        counters, maxima, slowest = await pipe.execute()
+
+        merged = MetricsStore.from_counters(
+            {field: float(value) for field, value in counters.items()},
+            maxima=dict(maxima),
+            slowest=[(score, loads(member)[1]) for member, score in slowest],
+        )
+        # 게이지는 합산 대상이 아니므로 조회한 워커의 현재 값 사용
+        merged.side_effect_queue_depth = self.store.side_effect_queue_depth
+        merged.model_health = self.store.model_health
+        return merged
+
+    async def run(self, interval: float) -> None:
+        """주기적 플러시 루프 (lifespan 백그라운드 태스크)"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Redis 장애 시 로컬 누적값은 유지 → 복구 후 델타가 한꺼번에 반영됨
+                logger.error(f"metrics flush 실패: {e}")
+
+
+# 전역 인스턴스 — METRICS_BACKEND=redis일 때만 생성
+_metrics_sync: RedisMetricsSync | None = None
+_flush_task: asyncio.Task | None = None
+
+
+async def start_metrics_sync(redis: Redis) -> None:
+    global _metrics_sync, _flush_task
+    if settings.metrics_backend != "redis":
+        return
+    _metrics_sync = RedisMetricsSync(metrics_store, redis)
+    _flush_task = asyncio.create_task(_metrics_sync.run(settings.metrics_flush_interval_seconds))
+
+
+async def stop_metrics_sync() -> None:
+    """종료 시 남은 증가분까지 플러시"""
+    global _metrics_sync, _flush_task
+    if _flush_task:
+        _flush_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await _flush_task
+    if _metrics_sync:
+        with suppress(Exception):
+            await _metrics_sync.flush()
+    _metrics_sync = None
+    _flush_task = None
+
+
+async def get_metrics_view() -> MetricsStore:
+    """
+    조회용 MetricsStore
+    - redis 백엔드: 자기 워커 플러시 후 전체 워커 병합 뷰
+    - local 백엔드: 현재 워커의 metrics_store
+    """
+    if _metrics_sync is None:
+        return metrics_store
+    await _metrics_sync.flush()
+    return await _metrics_sync.merged_store()
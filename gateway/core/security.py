@@ -34,6 +34,45 @@ def create_refresh_token(user_id: str) -> str:
     }
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
+def decode_access_token(token: str) -> str:
+    """JWT 접근 토큰을 검증하고 user_id(sub)를 반환합니다. (DB 조회 없음)"""
+    try:
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+        user_id: str = payload.get("sub")
+        token_type: str = payload.get("type", "access")  # 이전 토큰 호환을 위해 기본값 access
+        
+        if user_id is None or token_type != "access":
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="유효하지 않은 접근 토큰입니다")
+            
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="토큰 검증에 실패했습니다")
+    return user_id
+
+async def load_user(db: AsyncSession, user_id: str) -> User:
+    """user_id로 DB에서 User 객체를 조회합니다."""
+    stmt = select(User).where(User.id == user_id)
+    result = await db.execute(stmt)
+    user = result.scalars().first()
+    
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="사용자를 찾을 수 없습니다")
+    return user
+
+async def load_user_by_api_key(db: AsyncSession, api_key_str: str) -> User:
+    """활성 API Key로 DB에서 User 객체를 조회합니다."""
+    stmt = select(ApiKey).where(ApiKey.key == api_key_str, ApiKey.is_active == True)
+    result = await db.execute(stmt)
+    api_key = result.scalars().first()
+    if not api_key:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="유효하지 않거나 만료된 API 키입니다")
+    return await load_user(db, api_key.user_id)
+
+def ensure_active(user: User) -> User:
+    """비활성화된 계정이면 403"""
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="비활성화된 계정입니다")
+    return user
+
 async def get_current_user(
     credencials: HTTPAuthorizationCredentials = Depends(security_schema),
     api_key_str: str = Depends(api_key_header),
@@ -43,41 +82,12 @@ async def get_current_user(
     
     if api_key_str:
         # 1. API Key 검증
-        stmt = select(ApiKey).where(ApiKey.key == api_key_str, ApiKey.is_active == True)
-        result = await db.execute(stmt)
-        api_key = result.scalars().first()
-        if not api_key:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="유효하지 않거나 만료된 API 키입니다")
-            
-        stmt = select(User).where(User.id == api_key.user_id)
-        result = await db.execute(stmt)
-        user = result.scalars().first()
-        if not user:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="사용자를 찾을 수 없습니다")
-        return user
+        return await load_user_by_api_key(db, api_key_str)
         
     elif credencials:
         # 2. JWT 검증
-        token = credencials.credentials
-        try:
-            payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-            user_id: str = payload.get("sub")
-            token_type: str = payload.get("type", "access")  # 이전 토큰 호환을 위해 기본값 access
-            
-            if user_id is None or token_type != "access":
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="유효하지 않은 접근 토큰입니다")
-                
-        except JWTError:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="토큰 검증에 실패했습니다")
-            
-        stmt = select(User).where(User.id == user_id)
-        result = await db.execute(stmt)
-        user = result.scalars().first()
-        
-        if not user:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="사용자를 찾을 수 없습니다")
-            
-        return user
+        user_id = decode_access_token(credencials.credentials)
+        return await load_user(db, user_id)
         
     else:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="인증 정보(토큰 또는 API 키)가 제공되지 않았습니다")
@@ -106,9 +116,7 @@ async def verify_refresh_token(refresh_token: str, db: AsyncSession) -> User:
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """활성화된 사용자만 통과시킵니다."""
-    if not current_user.is_active:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="비활성화된 계정입니다")
-    return current_user
+    return ensure_active(current_user)
 
 async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
     """관리자 권한이 있는 사용자만 통과시킵니다."""
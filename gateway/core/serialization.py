@@ -0,0 +1,63 @@
+"""
+공용 직렬화 모듈
+
+- JSON: orjson (stdlib json 대비 수 배 빠름, 결과가 바로 UTF-8 bytes, 한글 escape 없음)
+- SSE 프레임: 고정 접두사(b'data: {"token":')를 미리 인코딩해두고 가변 부분만 인코딩
+- Redis 캐시 값: msgpack (바이너리, JSON보다 작고 빠름) — decode_responses=False 클라이언트 필요
+
+라우터/서비스에서 json.dumps를 직접 쓰지 말고 이 모듈을 사용
+"""
+import msgpack
+import orjson
+
+# orjson.JSONDecodeError는 json.JSONDecodeError의 하위 클래스
+JSONDecodeError = orjson.JSONDecodeError
+
+
+# ===== JSON =====
+
+def dumps(obj) -> bytes:
+    """객체 → JSON bytes (UTF-8)"""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps_str(obj) -> str:
+    """객체 → JSON str (decode_responses=True인 Redis 등 str이 필요한 곳)"""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
+def loads(data: bytes | str):
+    return orjson.loads(data)
+
+
+# ===== msgpack (Redis 캐시 값) =====
+
+def pack(obj) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def unpack(data: bytes):
+    return msgpack.unpackb(data, raw=False)
+
+
+# ===== SSE 프레임 =====
+# "data: {json}\n\n" 형식, StreamingResponse에 bytes로 그대로 전달
+
+_FRAME_END = b"\n\n"
+_TOKEN_PREFIX = b'data: {"token":'
+_TOKEN_SUFFIX = b"}" + _FRAME_END
+
+
+def sse_data(payload: dict) -> bytes:
+    """임의 payload → SSE data 프레임"""
+    return b"data: " + orjson.dumps(payload) + _FRAME_END
+
+
+def sse_token(content: str) -> bytes:
+    """토큰 프레임 — 매 토큰마다 호출되므로 문자열 하나만 인코딩"""
+    return _TOKEN_PREFIX + orjson.dumps(content) + _TOKEN_SUFFIX
+
+
+def sse_status_frames(status_map: dict[str, str]) -> dict[str, bytes]:
+    """고정된 상태 메시지는 시작 시 한 번만 인코딩 {key: 프레임}"""
+    return {key: sse_data({"status": message}) for key, message in status_map.items()}
@@ -0,0 +1,119 @@
+"""
+응답 후처리(side effect) 실행기 — 사용자 응답 경로에서 부가 작업 분리
+
+채팅 응답 직전에 하던 AI 메시지 DB 저장(commit), 토큰 사용량 로깅, 캐시 저장을
+큐에 넣고 바로 응답 → 워커 태스크가 백그라운드에서 실행
+
+- 크기 제한 큐: 가득 차면 호출한 쪽에서 직접 실행 (유실 대신 배압)
+- 실패 시 지수 백오프 재시도, 최종 실패는 로그로 남김
+- 작업은 (이름, 코루틴 함수, 인자)로 받음 → 재시도마다 새 코루틴 생성
+- 종료 시 lifespan에서 drain() — 남은 작업을 모두 처리한 뒤 워커 정리
+- 큐 대기 시간(lag)/실행 시간/결과별 건수/큐 길이를 메트릭으로 집계
+"""
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+
+from core.config import settings
+from core.logger import get_logger
+from core.metrics import metrics_store
+
+logger = get_logger("side_effects")
+
+
+class SideEffectExecutor:
+    def __init__(self, queue_size: int, workers: int, max_retries: int, retry_base_seconds: float):
+        self.queue_size = queue_size
+        self.num_workers = workers
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self) -> None:
+        # 큐는 이벤트 루프 안에서 생성 (lifespan 시작 시점)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"side-effect-{i}")
+            for i in range(self.num_workers)
+        ]
+
+    async def submit(self, name: str, fn: Callable[..., Awaitable], *args, **kwargs) -> None:
+        """
+        작업 등록 — 보통 즉시 반환
+
+        실행기가 시작되지 않았거나(테스트/스크립트) 큐가 가득 차면 그 자리에서 실행
+        """
+        if not self.running:
+            await self._run(name, fn, args, kwargs, enqueued_at=time.perf_counter())
+            return
+        try:
+            self._queue.put_nowait((name, fn, args, kwargs, time.perf_counter()))
+        except asyncio.QueueFull:
+            metrics_store.record_side_effect_outcome(name, "inline")
+            await self._run(name, fn, args, kwargs, enqueued_at=time.perf_counter())
+            return
+        metrics_store.side_effect_queue_depth = self._queue.qsize()
+
+    async def _worker(self) -> None:
+        while True:
+            name, fn, args, kwargs, enqueued_at = await self._queue.get()
+            metrics_store.side_effect_queue_depth = self._queue.qsize()
+            try:
+                await self._run(name, fn, args, kwargs, enqueued_at)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, name: str, fn: Callable[..., Awaitable], args, kwargs, enqueued_at: float) -> None:
+        started = time.perf_counter()
+        metrics_store.record_side_effect_stage(name, "lag", (started - enqueued_at) * 1000)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                await fn(*args, **kwargs)
+                metrics_store.record_side_effect_stage(name, "run", (time.perf_counter() - started) * 1000)
+                metrics_store.record_side_effect_outcome(name, "ok")
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    metrics_store.record_side_effect_outcome(name, "failed")
+                    logger.error(
+                        f"후처리 작업 실패 ({name}): {e}",
+                        extra={"extra_data": {"job": name, "attempts": attempt + 1}},
+                    )
+                    return
+                metrics_store.record_side_effect_outcome(name, "retry")
+                await asyncio.sleep(self.retry_base_seconds * 2 ** attempt)
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """남은 작업을 처리한 뒤 워커 종료 (timeout 초과 시 남은 작업은 버림)"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(
+                f"후처리 큐 drain 시간 초과 — 미처리 {self._queue.qsize()}건",
+                extra={"extra_data": {"pending": self._queue.qsize()}},
+            )
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._workers = []
+        metrics_store.side_effect_queue_depth = 0
+
+
+# 싱글톤 인스턴스
+side_effects = SideEffectExecutor(
+    queue_size=settings.side_effect_queue_size,
+    workers=settings.side_effect_workers,
+    max_retries=settings.side_effect_max_retries,
+    retry_base_seconds=settings.side_effect_retry_base_seconds,
+)
@@ -0,0 +1,182 @@
+"""
+SSE 스트림 writer — 토큰 병합(coalescing) + heartbeat + id 필드
+
+LLM 토큰(한국어는 1~3글자)마다 프레임을 보내면 답변 하나에 수천 번의 작은 write가
+nginx(proxy_buffering off)를 그대로 통과함 → 시간/바이트 창 단위로 묶어서 전송
+
+- 토큰은 창(기본 30ms) 또는 크기(기본 256B)가 차면 하나의 token 프레임으로 전송
+- 상태/종료 같은 완성 프레임은 그 전에 쌓인 토큰을 먼저 내보낸 뒤 순서대로 전송
+- 이벤트가 없는 구간(researcher 검색 등)에는 ": heartbeat" 주석으로 연결 유지
+- 데이터 프레임마다 "id: N" 필드 부여 (재연결 시 Last-Event-ID 기준)
+
+소스 제네레이터 규약:
+  str   → 토큰 (병합 대상)
+  bytes → 완성된 "data: ...\\n\\n" 프레임 (core.serialization.sse_data 등)
+"""
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import suppress
+
+from core.config import settings
+from core.logger import get_logger
+from core.metrics import metrics_store
+from core.serialization import sse_token
+
+logger = get_logger("sse")
+
+HEARTBEAT_FRAME = b": heartbeat\n\n"
+
+
+class SSEWriter:
+    """스트림 1개 단위 writer — 프레임 수/바이트 수를 집계해 종료 시 보고"""
+
+    def __init__(
+        self,
+        route: str,
+        window_ms: float | None = None,
+        max_bytes: int | None = None,
+        heartbeat_seconds: float | None = None,
+    ):
+        self.route = route
+        self.window_s = (window_ms if window_ms is not None else settings.sse_coalesce_ms) / 1000
+        self.max_bytes = max_bytes if max_bytes is not None else settings.sse_coalesce_bytes
+        self.heartbeat_s = heartbeat_seconds if heartbeat_seconds is not None else settings.sse_heartbeat_seconds
+
+        self.event_id = 0
+        self._pending: list[str] = []
+        self._pending_bytes = 0
+        self._pending_since = 0.0
+
+        # 스트림 통계
+        self.started_at = time.perf_counter()
+        self.frames = 0
+        self.tokens = 0
+        self.heartbeats = 0
+        self.bytes_sent = 0
+
+    # ── 프레임 생성 ──
+
+    def _emit(self, frame: bytes) -> bytes:
+        self.event_id += 1
+        out = b"id: %d\n" % self.event_id + frame
+        self.frames += 1
+        self.bytes_sent += len(out)
+        return out
+
+    def add_token(self, content: str) -> bytes | None:
+        """토큰 추가 — 크기 한도를 넘으면 병합된 프레임 반환"""
+        if not self._pending:
+            self._pending_since = time.perf_counter()
+        self._pending.append(content)
+        self._pending_bytes += len(content.encode("utf-8"))
+        self.tokens += 1
+        if self._pending_bytes >= self.max_bytes:
+            return self.flush()
+        return None
+
+    def flush(self) -> bytes | None:
+        """쌓인 토큰을 token 프레임 하나로 (없으면 None)"""
+        if not self._pending:
+            return None
+        frame = sse_token("".join(self._pending))
+        self._pending.clear()
+        self._pending_bytes = 0
+        return self._emit(frame)
+
+    def frame(self, frame: bytes) -> bytes:
+        """완성 프레임 — 순서 유지를 위해 대기 중인 토큰을 먼저 붙여서 반환"""
+        pending = self.flush() or b""
+        return pending + self._emit(frame)
+
+    def heartbeat(self) -> bytes:
+        self.heartbeats += 1
+        self.bytes_sent += len(HEARTBEAT_FRAME)
+        return HEARTBEAT_FRAME
+
+    def _next_timeout(self, last_write: float) -> float:
+        """다음 타이머까지 남은 시간 — 병합 창 마감 또는 heartbeat"""
+        now = time.perf_counter()
+        if self._pending:
+            return max(0.0, self._pending_since + self.window_s - now)
+        return max(0.0, last_write + self.heartbeat_s - now)
+
+    # ── 스트림 구동 ──
+
+    async def stream(self, source: AsyncIterator[str | bytes]) -> AsyncIterator[bytes]:
+        """
+        소스 제네레이터를 SSE 바이트 스트림으로 변환 (StreamingResponse용)
+
+        다음 이벤트를 기다리는 동안에도 타이머(병합 창/heartbeat)가 동작해야 하므로
+        __anext__를 태스크로 띄우고 asyncio.wait(timeout=...)로 대기
+        — wait_for와 달리 타임아웃 시 소스(astream_events)를 취소하지 않음
+        """
+        iterator = source.__aiter__()
+        next_item = None
+        last_write = time.perf_counter()
+        try:
+            while True:
+                if next_item is None:
+                    next_item = asyncio.ensure_future(iterator.__anext__())
+                done, _ = await asyncio.wait({next_item}, timeout=self._next_timeout(last_write))
+
+                if not done:
+                    # 타이머 만료 — 병합 창이 찼으면 토큰 전송, 아니면 heartbeat
+                    out = self.flush() if self._pending else self.heartbeat()
+                    last_write = time.perf_counter()
+                    yield out
+                    continue
+
+                task, next_item = next_item, None
+                try:
+                    item = task.result()
+                except StopAsyncIteration:
+                    break
+
+                out = self.add_token(item) if isinstance(item, str) else self.frame(item)
+                if out:
+                    last_write = time.perf_counter()
+                    yield out
+
+            tail = self.flush()
+            if tail:
+                yield tail
+        finally:
+            self.report()
+            # 클라이언트 연결 끊김 등으로 중단된 경우 소스 정리
+            if next_item is not None:
+                # __anext__ 실행 중 → 태스크 취소가 소스 제네레이터까지 전파되어 종료됨
+                # 소스의 정리 작업(부분 응답 저장 등)이 끝날 때까지 대기
+                next_item.cancel()
+                with suppress(asyncio.CancelledError, StopAsyncIteration):
+                    await next_item
+            elif hasattr(iterator, "aclose"):
+                await iterator.aclose()
+
+    def stats(self) -> dict:
+        duration_s = max(time.perf_counter() - self.started_at, 1e-9)
+        return {
+            "frames": self.frames,
+            "tokens": self.tokens,
+            "heartbeats": self.heartbeats,
+            "bytes": self.bytes_sent,
+            "duration_ms": round(duration_s * 1000, 1),
+            "frames_per_sec": round(self.frames / duration_s, 1),
+            "bytes_per_sec": round(self.bytes_sent / duration_s, 1),
+        }
+
+    def report(self) -> None:
+        """스트림 종료 시 메트릭 집계 + 로그"""
+        stats = self.stats()
+        metrics_store.record_sse_stream(
+            route=self.route,
+            frames=self.frames,
+            tokens=self.tokens,
+            heartbeats=self.heartbeats,
+            bytes_sent=self.bytes_sent,
+            duration_ms=stats["duration_ms"],
+        )
+        logger.info(
+            f"SSE {self.route} {self.frames} frames / {self.tokens} tokens",
+            extra={"extra_data": {"route": self.route, **stats}},
+        )
@@ -1,16 +1,50 @@
+import asyncio
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
-from core.dependencies import init_connections, close_connections
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager, suppress
+from core.config import settings
+from core.dependencies import init_connections, close_connections, get_redis
 from core.database import engine
-from core.metrics import RequestMetricsMiddleware, metrics_store
+from core.metrics import RequestMetricsMiddleware
+from core.metrics_sync import start_metrics_sync, stop_metrics_sync, get_metrics_view
 from router import chat, admin, auth, user, conversation
+from service.retention_service import retention_worker
+from service.generation_service import stop_generations
+from core.side_effects import side_effects
+from agent.calculator import calculator
+from agent.web_fetch import url_fetcher
+from agent.intent_batcher import intent_batcher
+from agent.structured_llm import ollama_json
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    retention_task = None
     try:
         await init_connections()
+        # 멀티 워커 메트릭 집계 (METRICS_BACKEND=redis)
+        await start_metrics_sync(await get_redis())
+        # 응답 후처리 워커 (메시지 저장, 사용량 로깅, 캐시 저장)
+        side_effects.start()
+        # 계산기 도구 프로세스 풀
+        calculator.start()
+        # 보존 정책 정리 작업 (백그라운드)
+        if settings.retention_enabled:
+            retention_task = asyncio.create_task(retention_worker(await get_redis()))
         yield
     finally:
+        if retention_task:
+            retention_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await retention_task
+        # 진행 중인 SSE 생성 취소 (부분 응답 저장 후 종료)
+        await stop_generations()
+        # 남은 후처리 작업 처리 (DB/Redis 연결을 닫기 전에)
+        await side_effects.drain(timeout=settings.side_effect_drain_timeout_seconds)
+        calculator.close()
+        await url_fetcher.aclose()
+        await intent_batcher.aclose()
+        await ollama_json.aclose()
+        await stop_metrics_sync()
         await close_connections()
         # DB 연결 풀 정리
         await engine.dispose()
@@ -19,7 +53,9 @@ app = FastAPI(
     title="LLM API Gateway",
     description="LangGraph 기반 지능형 LLM 라우팅 게이트웨이",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # JSON 응답 인코딩을 orjson으로 (stdlib json 대비 빠름, 한글 escape 없음)
+    default_response_class=ORJSONResponse,
 )
 
 # 미들웨어 등록 (모든 요청을 자동 계측)
@@ -37,5 +73,15 @@ async def health():
 
 @app.get("/api/metrics", tags=["Monitoring"])
 async def get_metrics():
-    """실시간 메트릭 조회 — 총 요청 수, 응답 시간, 상태코드별 분포 등"""
-    return metrics_store.summary()
\ No newline at end of file
+    """실시간 메트릭 조회 — 총 요청 수, 응답 시간(p50/p95/p99), 상태코드별 분포 등"""
+    store = await get_metrics_view()
+    return store.summary()
+
+@app.get("/api/metrics/prometheus", tags=["Monitoring"], response_class=PlainTextResponse)
+async def get_metrics_prometheus():
+    """Prometheus 스크레이프용 메트릭 (text exposition format)"""
+    store = await get_metrics_view()
+    return PlainTextResponse(
+        store.render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
\ No newline at end of file
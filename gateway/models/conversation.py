@@ -1,5 +1,6 @@
 import uuid
-from sqlalchemy import String, Text, ForeignKey
+from sqlalchemy import String, Text, Boolean, ForeignKey, Index, FetchedValue, false
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from models.base import TimestampMixin
 from core.database import Base
@@ -11,6 +12,10 @@ class Conversation(TimestampMixin, Base):
     User : Conversation = 1 : N
     """
     __tablename__ = "conversations"
+    __table_args__ = (
+        # 보존 정책 정리 작업용 (created_at < cutoff 범위 스캔)
+        Index("ix_conversations_created_at", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -34,9 +39,11 @@ class Conversation(TimestampMixin, Base):
     )
 
     # ORM 관계: conversation.messages로 접근 가능
+    # passive_deletes=True: 삭제 시 메시지를 로드하지 않고 DB의 ON DELETE CASCADE에 위임
     messages: Mapped[list["Message"]] = relationship(
         back_populates="conversation",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         order_by="Message.created_at",
     )
 
@@ -47,6 +54,18 @@ class Message(TimestampMixin, Base):
     Conversation : Message = 1 : N
     """
     __tablename__ = "messages"
+    __table_args__ = (
+        # 보존 정책 정리 작업용 (created_at < cutoff 범위 스캔)
+        Index("ix_messages_created_at", "created_at"),
+        # 전문 검색용 GIN 인덱스 (tsvector 단어 매칭)
+        Index("ix_messages_search_vector", "search_vector", postgresql_using="gin"),
+        # 한국어 부분 일치용 trigram GIN 인덱스 (조사가 붙은 단어도 검색 가능)
+        Index(
+            "ix_messages_content_trgm", "content",
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -73,6 +92,25 @@ class Message(TimestampMixin, Base):
         nullable=False,
     )
 
+    # 생성 도중 중단된 응답 (SSE 클라이언트 연결 끊김 → 부분 응답만 저장)
+    truncated: Mapped[bool] = mapped_column(
+        Boolean,
+        nullable=False,
+        default=False,
+        server_default=false(),
+    )
+
+    # 전문 검색용 tsvector — DB 트리거가 content로부터 자동 갱신
+    # - FetchedValue: INSERT/UPDATE 시 ORM이 값을 넣지 않음 (트리거에 위임)
+    # - deferred: 일반 조회 시 로드하지 않음
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        nullable=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+        deferred=True,
+    )
+
     # ORM 역참조
     conversation: Mapped["Conversation"] = relationship(
         back_populates="messages",
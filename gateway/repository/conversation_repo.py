@@ -1,7 +1,21 @@
+from collections.abc import AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from datetime import datetime
+from sqlalchemy import select, delete, func, or_, any_, exists, literal_column
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import selectinload
 from models.conversation import Conversation, Message
+from models.users import User
+
+# 전문 검색 설정 — 마이그레이션의 트리거와 동일해야 인덱스를 탈 수 있음
+SEARCH_CONFIG = "pg_catalog.simple"
+
+# pg_trgm은 3글자 이상이어야 trigram을 뽑을 수 있음
+# (그보다 짧으면 trigram 인덱스가 전체 스캔이 되므로 tsvector 매칭만 사용)
+TRGM_MIN_LENGTH = 3
+
+# 검색 결과 미리보기 길이 (문자 수)
+SNIPPET_LENGTH = 200
 
 
 async def create(db: AsyncSession, conversation: Conversation) -> Conversation:
@@ -20,6 +34,24 @@ async def add_message(db: AsyncSession, message: Message) -> Message:
     return message
 
 
+async def insert_message_once(
+    db: AsyncSession, message_id: str, conversation_id: str, role: str, content: str, truncated: bool
+) -> bool:
+    """
+    id를 지정해 메시지 저장 — 같은 id가 이미 있으면 무시 (INSERT ... ON CONFLICT DO NOTHING)
+
+    커밋은 됐지만 응답을 받지 못해 다시 실행해도 한 번만 저장됨
+    Returns: 새로 저장했으면 True
+    """
+    result = await db.execute(
+        insert(Message)
+        .values(id=message_id, conversation_id=conversation_id, role=role, content=content, truncated=truncated)
+        .on_conflict_do_nothing(index_elements=[Message.id])
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
 async def find_by_user_id(db: AsyncSession, user_id: str) -> list[Conversation]:
     """유저의 대화 목록 조회 (최신순)"""
     result = await db.execute(
@@ -41,7 +73,149 @@ async def find_by_id_and_user(db: AsyncSession, conversation_id: str, user_id: s
     return result.scalar_one_or_none()
 
 
-async def delete(db: AsyncSession, conversation: Conversation) -> None:
-    """대화 삭제"""
-    await db.delete(conversation)
+async def search_messages(
+    db: AsyncSession, user_id: str, query: str, limit: int, offset: int
+) -> list:
+    """
+    본인 대화의 메시지 전문 검색 (관련도순 → 최신순)
+
+    - tsvector GIN 인덱스: 단어 단위 매칭 + ts_rank 랭킹
+    - trigram GIN 인덱스: 한국어 부분 일치 (예: "서울" → "서울의")
+    - 두 조건의 OR는 BitmapOr로 합쳐져 두 인덱스를 모두 사용
+    """
+    ts_query = func.plainto_tsquery(SEARCH_CONFIG, query)
+    rank = func.ts_rank(Message.search_vector, ts_query)
+
+    conditions = [Message.search_vector.op("@@")(ts_query)]
+    if len(query) >= TRGM_MIN_LENGTH:
+        conditions.append(Message.content.icontains(query, autoescape=True))
+
+    result = await db.execute(
+        select(
+            Message.id.label("message_id"),
+            Message.conversation_id,
+            Conversation.title.label("conversation_title"),
+            Message.role,
+            func.left(Message.content, SNIPPET_LENGTH).label("snippet"),
+            rank.label("rank"),
+            Message.created_at,
+        )
+        .join(Conversation, Conversation.id == Message.conversation_id)
+        .where(Conversation.user_id == user_id)
+        .where(or_(*conditions))
+        .order_by(rank.desc(), Message.created_at.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return list(result.mappings().all())
+
+
+async def stream_for_export(
+    db: AsyncSession, user_id: str, batch_size: int = 1000
+) -> AsyncIterator:
+    """
+    유저의 전체 대화 + 메시지를 서버 사이드 커서로 스트리밍 조회
+
+    - stream() + yield_per: 전체 결과를 메모리에 올리지 않고 batch_size씩 fetch
+    - outer join: 메시지가 없는 대화도 포함 (message_id = None)
+    - 정렬: 대화별로 메시지가 연속해서 나오도록 conversation 기준 정렬
+    """
+    result = await db.stream(
+        select(
+            Conversation.id.label("conversation_id"),
+            Conversation.title,
+            Conversation.created_at.label("conversation_created_at"),
+            Message.id.label("message_id"),
+            Message.role,
+            Message.content,
+            Message.created_at.label("message_created_at"),
+        )
+        .outerjoin(Message, Message.conversation_id == Conversation.id)
+        .where(Conversation.user_id == user_id)
+        .order_by(Conversation.created_at, Conversation.id, Message.created_at)
+        .execution_options(yield_per=batch_size)
+    )
+    async for row in result.mappings():
+        yield row
+
+
+async def delete_by_id_and_user(db: AsyncSession, conversation_id: str, user_id: str) -> bool:
+    """
+    대화 삭제 (본인 것만) — 메시지는 DB의 ON DELETE CASCADE로 함께 삭제
+    ORM cascade와 달리 자식 Message를 메모리에 로드하지 않음
+    """
+    result = await db.execute(
+        delete(Conversation)
+        .where(Conversation.id == conversation_id)
+        .where(Conversation.user_id == user_id)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+def _role_filter(roles: list[str], exclude: bool):
+    """보존 정책 대상 역할 조건 (exclude=True면 roles 이외의 역할)"""
+    return User.role.not_in(roles) if exclude else User.role.in_(roles)
+
+
+def _expired_conversations(roles: list[str], exclude: bool, cutoff: datetime):
+    """
+    마지막 활동이 cutoff 이전인 대화 id (대화 생성 시각과 가장 최근 메시지 모두 cutoff 이전)
+
+    메시지 단위가 아니라 대화 단위로 판단 — 오래 이어지는 대화의 앞부분만 잘려 나가지 않도록
+    """
+    recent = exists().where(Message.conversation_id == Conversation.id, Message.created_at >= cutoff)
+    return (
+        select(Conversation.id)
+        .join(User, User.id == Conversation.user_id)
+        .where(_role_filter(roles, exclude))
+        .where(Conversation.created_at < cutoff)
+        .where(~recent)
+    )
+
+
+async def purge_messages_batch(
+    db: AsyncSession, roles: list[str], exclude: bool, cutoff: datetime, batch_size: int
+) -> int:
+    """
+    마지막 활동이 보존 기간을 지난 대화의 메시지를 최대 batch_size건 삭제 (set-based)
+
+    DELETE ... WHERE ctid = ANY(ARRAY(SELECT ctid ... LIMIT n))
+    - ctid(물리 행 주소)로 지정하므로 Tid Scan으로 바로 삭제
+    - 배치마다 커밋해서 락 보유 시간과 트랜잭션 크기를 제한
+    - 배치마다 대화의 마지막 활동을 다시 확인 — 정리 중에 새 메시지가 온 대화는 건너뜀
+    """
+    ctid = literal_column("messages.ctid")
+    batch = (
+        select(ctid)
+        .select_from(Message)
+        .where(Message.conversation_id.in_(_expired_conversations(roles, exclude, cutoff)))
+        .limit(batch_size)
+    )
+    result = await db.execute(
+        delete(Message).where(ctid == any_(func.array(batch.scalar_subquery())))
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def purge_expired_conversations_batch(
+    db: AsyncSession, roles: list[str], exclude: bool, cutoff: datetime, batch_size: int
+) -> int:
+    """
+    마지막 활동이 보존 기간을 지난 대화를 최대 batch_size건 삭제
+
+    메시지는 purge_messages_batch로 먼저 비움 — 남은 메시지는 ON DELETE CASCADE
+    """
+    ctid = literal_column("conversations.ctid")
+    batch = (
+        select(ctid)
+        .select_from(Conversation)
+        .where(Conversation.id.in_(_expired_conversations(roles, exclude, cutoff)))
+        .limit(batch_size)
+    )
+    result = await db.execute(
+        delete(Conversation).where(ctid == any_(func.array(batch.scalar_subquery())))
+    )
     await db.commit()
+    return result.rowcount
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
 from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
+from core.database import get_db
 from core.dependencies import get_ollama, get_redis
 from core.security import get_current_admin_user
 from models.users import User
-from service.log_service import get_usage_summary
+from schemas.admin import UsageLeaderboard, UsageSeries, UsageSummary
+from service.log_service import get_usage_leaderboard, get_usage_series, get_usage_summary
+from service.retention_service import purge_expired
 
 router = APIRouter()
 
@@ -18,6 +23,46 @@ async def list_models(
     return response.json()
 
 
-@router.get("/usage")
-async def get_usage(current_user: User = Depends(get_current_admin_user), redis: Redis = Depends(get_redis)):
-    return await get_usage_summary(redis, current_user.id)
\ No newline at end of file
+@router.get("/usage", response_model=UsageSummary)
+async def get_usage(
+    user_id: str | None = Query(None, description="조회할 유저 (생략 시 본인)"),
+    current_user: User = Depends(get_current_admin_user),
+    redis: Redis = Depends(get_redis),
+):
+    return await get_usage_summary(redis, user_id or current_user.id)
+
+
+@router.get("/usage/top", response_model=UsageLeaderboard)
+async def get_usage_top(
+    resolution: Literal["minute", "hour", "day"] = "day",
+    bucket: str | None = Query(None, max_length=12, description="버킷 (예: 20250101, 생략 시 현재)"),
+    dimension: Literal["user", "model"] = "user",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    current_user: User = Depends(get_current_admin_user),
+    redis: Redis = Depends(get_redis),
+):
+    """토큰 사용량 상위 유저/모델 — 시간 버킷별 리더보드 (ZSet)"""
+    return await get_usage_leaderboard(redis, resolution, bucket, dimension, limit, offset)
+
+
+@router.get("/usage/series", response_model=UsageSeries)
+async def get_usage_timeseries(
+    dimension: Literal["user", "model"],
+    member: str = Query(..., min_length=1, max_length=200, description="user_id 또는 모델 이름"),
+    resolution: Literal["minute", "hour", "day"] = "hour",
+    count: int = Query(24, ge=1, le=120),
+    current_user: User = Depends(get_current_admin_user),
+    redis: Redis = Depends(get_redis),
+):
+    """유저/모델 1개의 최근 시간 버킷별 사용량"""
+    return await get_usage_series(redis, dimension, member, resolution, count)
+
+
+@router.post("/retention/purge")
+async def run_retention_purge(
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """보존 기간이 지난 메시지/대화 즉시 정리 — 삭제 행 수와 소요 시간 반환"""
+    return await purge_expired(db)
\ No newline at end of file
@@ -1,43 +1,85 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import uuid
+from contextlib import aclosing
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
-import json
 from schemas.chat import ChatRequest, ChatResponse
 from agent.graph import agent
-from core.security import get_current_active_user
+from agent.callbacks import GraphTimingCallback
+from agent.deadline import make_deadline, request_timeout_seconds
+from agent.model_router import model_stats_callback
+from agent.stream_guard import CascadeHoldback, StreamHoldback
+from core.security import api_key_header, get_current_active_user, security_schema
 from core.database import get_db
 from models.users import User
-from core.dependencies import get_redis
-from service.cache_service import get_cached_response, set_cached_response
-from service.quota_service import check_quota
+from core.dependencies import get_redis, get_redis_binary
+from core.serialization import sse_data, sse_status_frames
+from core.sse import SSEWriter
+from core.metrics import metrics_store
+from core.side_effects import side_effects
+from core.logger import get_logger
+from service.cache_service import set_cached_response
 from service.log_service import log_usage
-from service import conversation_service
+from service.preflight_service import run_preflight
+from service import conversation_service, generation_service
+
+logger = get_logger("chat")
 
 router = APIRouter()
 
+# 주요 노드 진입 시 클라이언트에 보낼 상태 알림 (SSE 프레임으로 미리 인코딩)
+STATUS_FRAMES = sse_status_frames({
+    "input_guard": " 입력 검증 중...",
+    "classifier": " 의도 분석 중...",
+    "search_agent": " 검색 에이전트 실행 중...",
+    "analysis_agent": " 분석 에이전트 실행 중...",
+    "creative_agent": " 창작 에이전트 실행 중...",
+    "general_agent": " 응답 생성 중...",
+    "output_guard": " 응답 검증 중...",
+    "resynthesize": " 응답 다시 작성 중...",
+})
+
+# 응답을 토큰 스트림이 아닌 노드 출력으로 만들 수 있는 노드 (fallback, 마감 시간 초과 부분 답변)
+PARTIAL_ANSWER_NODES = {"search_agent", "analysis_agent", "creative_agent", "general_agent", "fallback"}
+
 
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest, current_user: User = Depends(get_current_active_user), redis: Redis = Depends(get_redis), db: AsyncSession = Depends(get_db)):
+async def chat(
+    request: ChatRequest,
+    response: Response,
+    credentials: HTTPAuthorizationCredentials | None = Depends(security_schema),
+    api_key: str | None = Depends(api_key_header),
+    redis: Redis = Depends(get_redis),
+    cache_redis: Redis = Depends(get_redis_binary),
+    db: AsyncSession = Depends(get_db),
+    request_timeout: float | None = Header(default=None, alias="X-Request-Timeout", gt=0),
+):
     """
     전체 파이프라인:
-    1. JWT 인증
-    2. 쿼터 확인 (분당 20회)
-    3. 캐시 확인 → 히트 시 즉시 반환
+    1. JWT/API Key 인증       ┐
+    2. 쿼터 확인 (분당 20회)     │ 전처리 — Redis 왕복 1번 (service/preflight_service.py)
+    3. 캐시 확인 → 히트 시 즉시 반환 ┘ DB는 인증 캐시 미스일 때만
     4. 대화 세션 생성/로드
     5. 사용자 메시지 DB 저장
     6. LangGraph Agent 실행 (고도화된 멀티 에이전트 그래프)
-    7. AI 응답 DB 저장
-    8. 토큰 사용량 로깅 + 캐시 저장
+       역할별 마감 시간(또는 더 짧은 X-Request-Timeout 헤더) 안에서 — 초과 시 부분 답변
+    7. AI 응답 DB 저장          ┐
+    8. 토큰 사용량 로깅 + 캐시 저장 ┘ 후처리 큐에 넣고 바로 응답 (core/side_effects.py)
     """
 
-    # 1. 쿼터
-    await check_quota(redis, current_user.id)
+    # 1~2. 인증 + 쿼터 + 캐시 조회
+    preflight = await run_preflight(
+        cache_redis, db, "/api/chat/", credentials, api_key, query=request.query,
+    )
+    current_user = preflight.user
+    response.headers["Server-Timing"] = preflight.server_timing()
 
-    # 2. 캐시
-    cached = await get_cached_response(redis, request.query)
-    if cached:
-        return ChatResponse(**cached)
+    # 캐시 히트 — dict 그대로 반환 (response_model 검증 1회, 모델 생성/덤프 왕복 없음)
+    if preflight.cached:
+        return preflight.cached
 
     # 3. 대화 세션 - 없으면 새로 생성, 있으면 기존 것 사용
     if request.conversation_id:
@@ -73,6 +115,11 @@ async def chat(request: ChatRequest, current_user: User = Depends(get_current_ac
         # Output Quality
         "output_quality": "pass",
         "retry_count": 0,
+        "failure_reason": "",
+        "retry_action": "",
+        "retry_hint": "",
+        "cascade_stage": "",
+        "cost_ledger": [],
         # Subgraph 공유
         "sub_queries": [],
         "search_results": [],
@@ -80,19 +127,31 @@ async def chat(request: ChatRequest, current_user: User = Depends(get_current_ac
         "response": "",
         "prompt_tokens": 0,
         "completion_tokens": 0,
+        # 도구 예산 (agent/tool_executor.py) / 요청 마감 시간 (agent/deadline.py)
+        "tool_calls": 0,
+        "tool_time_ms": 0.0,
+        "deadline": make_deadline(request_timeout_seconds(current_user.role, request_timeout)),
+        "deadline_exceeded": False,
     }
 
-    # 실행
-    final_state = await agent.ainvoke(initial_state)
+    # 실행 — 노드/LLM/도구별 소요 시간 계측
+    timing = GraphTimingCallback()
+    final_state = await agent.ainvoke(initial_state, config={"callbacks": [timing, model_stats_callback]})
+    timing.flush(intent=final_state.get("intent", "general"), model=final_state.get("model", ""))
+    response.headers["Server-Timing"] = f"{preflight.server_timing()}, {timing.server_timing()}"
+
+    # 6~8. 후처리 — 큐에 넣고 바로 응답 (DB commit, Redis 왕복이 응답 지연에 포함되지 않음)
 
     # 6. AI 응답 DB 저장 (차단된 경우에도 차단 메시지 저장)
-    await conversation_service.add_message(
-        db, conversation.id, "assistant", final_state["response"]
+    await side_effects.submit(
+        "add_message", conversation_service.save_message,
+        str(uuid.uuid4()), conversation.id, "assistant", final_state["response"],
     )
 
     # 7. 로깅 — 토큰 사용량 기록 (차단되지 않은 경우만)
     if not final_state.get("is_blocked", False):
-        await log_usage(
+        await side_effects.submit(
+            "log_usage", log_usage,
             redis=redis,
             user_id=current_user.id,
             query=request.query,
@@ -113,20 +172,32 @@ async def chat(request: ChatRequest, current_user: User = Depends(get_current_ac
         "is_blocked": final_state.get("is_blocked", False),
     }
 
-    await set_cached_response(redis, request.query, response_data)
+    await side_effects.submit(
+        "set_cached_response", set_cached_response, cache_redis, request.query, response_data,
+    )
 
-    return ChatResponse(**response_data)
+    return response_data
 
 @router.post("/stream")
-async def chat_stream(request: ChatRequest, current_user: User = Depends(get_current_active_user), redis: Redis = Depends(get_redis), db: AsyncSession = Depends(get_db)):
+async def chat_stream(
+    request: ChatRequest,
+    credentials: HTTPAuthorizationCredentials | None = Depends(security_schema),
+    api_key: str | None = Depends(api_key_header),
+    stream_redis: Redis = Depends(get_redis_binary),
+    db: AsyncSession = Depends(get_db),
+    request_timeout: float | None = Header(default=None, alias="X-Request-Timeout", gt=0),
+):
     """
     SSE 스트리밍 엔드포인트
     - ChatGPT처럼 답변이 토큰 단위로 실시간 전송됨
     - 프로토콜: Server-Sent Events (text/event-stream)
+    - 생성은 연결과 분리되어 Redis Stream에 버퍼링됨
+      → 연결이 끊기면 GET /stream/{generation_id} + Last-Event-ID로 이어받기
     """
 
-    # 1. 쿼터 
-    await check_quota(redis, current_user.id)
+    # 1. 인증 + 쿼터 (Redis 왕복 1번, 스트리밍은 캐시 미사용)
+    preflight = await run_preflight(stream_redis, db, "/api/chat/stream", credentials, api_key)
+    current_user = preflight.user
 
     # 2. 대화 세션
     if request.conversation_id:
@@ -158,63 +229,183 @@ async def chat_stream(request: ChatRequest, current_user: User = Depends(get_cur
         "block_reason": "",
         "output_quality": "pass",
         "retry_count": 0,
+        "failure_reason": "",
+        "retry_action": "",
+        "retry_hint": "",
+        "cascade_stage": "",
+        "cost_ledger": [],
         "sub_queries": [],
         "search_results": [],
         "response": "",
         "prompt_tokens": 0,
         "completion_tokens": 0,
+        "tool_calls": 0,
+        "tool_time_ms": 0.0,
+        "deadline": make_deadline(request_timeout_seconds(current_user.role, request_timeout)),
+        "deadline_exceeded": False,
     }
 
+    # 재연결(Last-Event-ID) 시 버퍼를 찾는 키
+    generation_id = str(uuid.uuid4())
+
     # 5. 스트리밍 제네레이터 함수
     async def event_generator():
         """
-        astream_events()로 LangGraph 실행 중 발생하는
-        모든 이벤트를 실시간으로 SSE 형식으로 전송
+        astream_events()로 LangGraph 실행 중 발생하는 이벤트를 SSEWriter로 전달
+        - str: 토큰 (writer가 시간/바이트 창 단위로 병합)
+        - bytes: 완성된 상태/종료 프레임
+
+        유예 시간 동안 구독자가 없으면 generation_service가 생성 태스크를 취소하고,
+        SSEWriter가 이 제네레이터를 실행 중인 태스크를 취소함
+        → astream_events → 그래프 노드 태스크 → 진행 중인 Ollama HTTP 요청까지 취소 전파
+        → 여기서는 지금까지 받은 부분 응답을 truncated로 저장
         """
-        full_response = ""
+        parts: list[str] = []
+        partial_sent = False    # 부분 답변/fallback 응답은 한 번만 (에이전트 노드의 부분 답변을 fallback이 다시 반환)
+        # 응답 메시지 id — 완료 저장 후 [DONE] 전송 중에 끊겨도 truncated로 한 번 더 저장되지 않도록
+        message_id = str(uuid.uuid4())
         current_intent = "general"
-        is_blocked = False
-
-        async for event in agent.astream_events(initial_state, version="v2"):
-            kind = event["event"]
-            
-            # 노드 시작 이벤트 — 현재 진행 상태를 클라이언트에 전송
-            if kind == "on_chain_start" and event.get("name"):
-                node_name = event["name"]
-                # 주요 노드 진입 시 상태 알림
-                if node_name in ("input_guard", "classifier", "search_agent", 
-                                 "analysis_agent", "creative_agent", "general_agent",
-                                 "output_guard"):
-                    status_map = {
-                        "input_guard": " 입력 검증 중...",
-                        "classifier": " 의도 분석 중...",
-                        "search_agent": " 검색 에이전트 실행 중...",
-                        "analysis_agent": " 분석 에이전트 실행 중...",
-                        "creative_agent": " 창작 에이전트 실행 중...",
-                        "general_agent": " 응답 생성 중...",
-                        "output_guard": " 응답 검증 중...",
-                    }
-                    status_msg = status_map.get(node_name, "")
-                    if status_msg:
-                        yield f"data: {json.dumps({'status': status_msg}, ensure_ascii=False)}\n\n"
-
-            # LLM이 토큰을 하나씩 생성할 때마다 발생하는 이벤트
-            if kind == "on_chat_model_stream":
-                content = event["data"]["chunk"].content
-                if content: # 빈 문자열 제외
-                    # SSE 형식: "data: {json}\n\n"
-                    full_response += content
-                    yield f"data: {json.dumps({'token': content}, ensure_ascii=False)}\n\n"
-
-        # 스트림 완료 후 AI 응답 DB 저장
-        await conversation_service.add_message(
-            db, conversation.id, "assistant", full_response
-        )
+        current_model = ""
+        timing = GraphTimingCallback()
+        # 응답 노드의 앞부분 검증 — 판정 전 토큰은 보류, 거절로 판정되면 버림 (agent/stream_guard.py)
+        holdback = StreamHoldback()
+        # 캐스케이드 경량 모델 응답 — output_guard 판정 전까지 보류, 승격되면 버림
+        cascade_holdback = CascadeHoldback()
+
+        try:
+            # 재연결용 ID를 첫 프레임으로 전달 (EventSource는 응답 헤더를 읽을 수 없음)
+            yield sse_data({"generation_id": generation_id, "conversation_id": conversation.id})
+
+            # aclosing: 중단 시 astream_events를 즉시 닫아 그래프 실행 태스크까지 취소
+            events = agent.astream_events(initial_state, version="v2", config={"callbacks": [timing, model_stats_callback]})
+            async with aclosing(events):
+                async for event in events:
+                    kind = event["event"]
+
+                    # 노드 시작 이벤트 — 현재 진행 상태를 클라이언트에 전송
+                    if kind == "on_chain_start" and event.get("name"):
+                        frame = STATUS_FRAMES.get(event["name"])
+                        if frame:
+                            yield frame
+
+                    # 분류 결과 — 계측 라벨용
+                    if kind == "on_chain_end" and event.get("name") == "classifier":
+                        output = event["data"].get("output") or {}
+                        current_intent = output.get("intent", current_intent)
+                        current_model = output.get("model", current_model)
+                        cascade_holdback.classified(output.get("cascade_stage"))
+
+                    # LLM이 토큰을 하나씩 생성할 때마다 발생하는 이벤트
+                    if kind == "on_chat_model_stream":
+                        content = event["data"]["chunk"].content
+                        node = event.get("metadata", {}).get("langgraph_node")
+                        if content: # 빈 문자열 제외
+                            content = holdback.token(event["run_id"], node, current_intent, content)
+                        if content:
+                            content = cascade_holdback.token(node, content)
+                        if content:
+                            parts.append(content)
+                            yield content
 
-        # 스트리밍 종료 신호
-        yield f"data: {json.dumps({'token': '[DONE]', 'conversation_id': conversation.id})}\\n\\n"
+                    # 응답이 판정 길이보다 짧게 끝난 경우 — 보류분 전송
+                    if kind == "on_chat_model_end":
+                        content = holdback.end(event["run_id"])
+                        if content:
+                            content = cascade_holdback.token(event.get("metadata", {}).get("langgraph_node"), content)
+                        if content:
+                            parts.append(content)
+                            yield content
+
+                    # 출력 검증 결과 — 캐스케이드 경량 모델 응답이 통과했으면 보류분 전송
+                    if kind == "on_chain_end" and event.get("name") == "output_guard":
+                        output = event["data"].get("output") or {}
+                        content = cascade_holdback.judged(output.get("output_quality"))
+                        if content and not partial_sent:    # 마감 시간 초과 부분 답변을 이미 보냈으면 생략
+                            parts.append(content)
+                            yield content
+
+                    # Fallback 응답 / 마감 시간 초과 부분 답변은 LLM 토큰이 아니므로 직접 전송
+                    # (마감 시간 초과 후 fallback 노드가 같은 부분 답변을 다시 반환하므로 첫 번째만)
+                    if kind == "on_chain_end" and event.get("name") in PARTIAL_ANSWER_NODES:
+                        output = event["data"].get("output") or {}
+                        content = output.get("response")
+                        if (
+                            content
+                            and not partial_sent
+                            and (event["name"] == "fallback" or output.get("deadline_exceeded"))
+                        ):
+                            partial_sent = True
+                            parts.append(content)
+                            yield content
+
+            timing.flush(intent=current_intent, model=current_model)
+
+            # 스트림 완료 후 AI 응답 DB 저장 (후처리 큐)
+            await side_effects.submit(
+                "add_message", conversation_service.save_message,
+                message_id, conversation.id, "assistant", "".join(parts),
+            )
+
+            # 스트리밍 종료 신호
+            yield sse_data({"token": "[DONE]", "conversation_id": conversation.id})
+
+        except (asyncio.CancelledError, GeneratorExit):
+            # 클라이언트 연결 끊김 — 생성 중단, 부분 응답 보존
+            timing.flush(intent=current_intent, model=current_model)
+            tokens_saved = metrics_store.record_abandoned_generation(current_model, len(parts))
+            logger.info(
+                f"SSE 생성 중단 (클라이언트 연결 끊김) {len(parts)} tokens",
+                extra={"extra_data": {
+                    "conversation_id": conversation.id,
+                    "intent": current_intent,
+                    "model": current_model,
+                    "tokens_generated": len(parts),
+                    "tokens_saved_estimate": tokens_saved,
+                }},
+            )
+            if parts:
+                await side_effects.submit(
+                    "add_message", conversation_service.save_message,
+                    message_id, conversation.id, "assistant", "".join(parts), truncated=True,
+                )
+            raise
+
+    await generation_service.start_generation(
+        stream_redis,
+        generation_id,
+        user_id=current_user.id,
+        conversation_id=conversation.id,
+        writer=SSEWriter(route="/api/chat/stream"),
+        source=event_generator(),
+    )
+    return StreamingResponse(
+        generation_service.tail_generation(stream_redis, generation_id),
+        media_type="text/event-stream",
+        headers={"X-Generation-ID": generation_id, "Server-Timing": preflight.server_timing()},
+    )
+
+
+@router.get("/stream/{generation_id}")
+async def resume_chat_stream(
+    generation_id: str,
+    last_event_id: int = Header(default=0, alias="Last-Event-ID"),
+    current_user: User = Depends(get_current_active_user),
+    stream_redis: Redis = Depends(get_redis_binary),
+):
+    """
+    끊긴 SSE 스트림 이어받기
+    - Last-Event-ID 이후 프레임을 버퍼에서 재생한 뒤 실시간 출력 이어서 전송
+    - 그래프는 다시 실행하지 않음 (토큰 재과금 없음)
+    """
+    meta = await generation_service.get_generation_meta(stream_redis, generation_id)
+    if not meta or meta["user_id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="생성 기록을 찾을 수 없습니다."
+        )
 
     return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream"
+        generation_service.tail_generation(stream_redis, generation_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"X-Generation-ID": generation_id},
     )
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.security import get_current_active_user
 from core.database import get_db
 from models.users import User
-from schemas.conversation import ConversationCreate, ConversationSummary, ConversationDetail
+from schemas.conversation import (
+    ConversationCreate, ConversationSummary, ConversationDetail, MessageSearchResponse,
+)
 from service import conversation_service
 
 router = APIRouter()
@@ -29,6 +32,37 @@ async def list_conversations(
     return await conversation_service.get_conversations(db, current_user.id)
 
 
+# 주의: /{conversation_id}보다 먼저 등록해야 "search", "export"가 ID로 매칭되지 않음
+@router.get("/export")
+async def export_conversations(
+    gzip: bool = Query(False, description="gzip 압축 전송 여부"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """내 대화 전체를 NDJSON으로 스트리밍 내보내기 (대화 수와 무관하게 메모리 일정)"""
+    headers = {"Content-Disposition": 'attachment; filename="conversations.ndjson"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        conversation_service.export_conversations(db, current_user.id, compress=gzip),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+
+@router.get("/search", response_model=MessageSearchResponse)
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=200, description="검색어"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """내 대화 메시지 전문 검색 (관련도순, 페이지네이션)"""
+    return await conversation_service.search_messages(db, current_user.id, q, limit, offset)
+
+
 @router.get("/{conversation_id}", response_model=ConversationDetail)
 async def get_conversation(
     conversation_id: str,
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from core.database import get_db
+from core.dependencies import get_redis
 from core.security import get_current_active_user
 from models.users import User
 from schemas.api_key import ApiKeyCreate, ApiKeyResponse
@@ -31,9 +33,10 @@ async def list_keys(
 async def revoke_key(
     key_id: str,
     current_user: User = Depends(get_current_active_user),
+    redis: Redis = Depends(get_redis),
     db: AsyncSession = Depends(get_db)
 ):
     """API 키를 폐기(비활성화)합니다."""
-    success = await revoke_api_key(db, current_user.id, key_id)
+    success = await revoke_api_key(db, redis, current_user.id, key_id)
     if not success:
         raise HTTPException(status_code=404, detail="API 키를 찾을 수 없거나 권한이 없습니다.")
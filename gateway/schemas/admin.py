@@ -1,7 +1,45 @@
 from pydantic import BaseModel
+from typing import List
 
 class UsageSummary(BaseModel):
     user_id: str
     total_tokens: int
     request_count: int
-    recent_history: list
\ No newline at end of file
+    recent_history: list
+
+
+class UsageCounts(BaseModel):
+    requests: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+
+
+class UsageRankItem(UsageCounts):
+    """리더보드 한 항목 (member = user_id 또는 모델 이름)"""
+    rank: int
+    member: str
+
+
+class UsageLeaderboard(BaseModel):
+    """버킷 하나의 토큰 사용량 순위 (페이지 단위)"""
+    resolution: str
+    bucket: str
+    dimension: str
+    total: int
+    limit: int
+    offset: int
+    has_more: bool
+    results: List[UsageRankItem]
+
+
+class UsageBucket(UsageCounts):
+    bucket: str
+
+
+class UsageSeries(BaseModel):
+    """유저/모델 1개의 시간 버킷 시계열"""
+    dimension: str
+    member: str
+    resolution: str
+    series: List[UsageBucket]
@@ -8,6 +8,7 @@ class MessageResponse(BaseModel):
     id: str
     role: str           # "user" 또는 "assistant"
     content: str
+    truncated: bool = False   # 클라이언트 연결 끊김으로 생성이 중단된 응답
     created_at: datetime
 
 
@@ -30,3 +31,23 @@ class ConversationDetail(BaseModel):
     title: str
     created_at: datetime
     messages: List[MessageResponse]
+
+
+class MessageSearchHit(BaseModel):
+    """검색 결과 한 건 (본문은 앞부분 미리보기만)"""
+    message_id: str
+    conversation_id: str
+    conversation_title: str
+    role: str
+    snippet: str
+    rank: float
+    created_at: datetime
+
+
+class MessageSearchResponse(BaseModel):
+    """메시지 검색 결과 (페이지 단위)"""
+    query: str
+    limit: int
+    offset: int
+    has_more: bool
+    results: List[MessageSearchHit]
\ No newline at end of file
@@ -1,8 +1,10 @@
 import secrets
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.api_key import ApiKey
 from schemas.api_key import ApiKeyCreate
 from repository import api_key_repo
+from service.preflight_service import invalidate_api_key
 
 
 async def create_api_key(db: AsyncSession, user_id: str, data: ApiKeyCreate) -> ApiKey:
@@ -23,8 +25,8 @@ async def get_user_api_keys(db: AsyncSession, user_id: str) -> list[ApiKey]:
     """유저의 API 키 목록 조회"""
     return await api_key_repo.find_by_user_id(db, user_id)
 
-async def revoke_api_key(db: AsyncSession, user_id: str, key_id: str) -> bool:
-    """API 키 비활성화 비즈니스 로직"""
+async def revoke_api_key(db: AsyncSession, redis: Redis, user_id: str, key_id: str) -> bool:
+    """API 키 비활성화 비즈니스 로직 (전처리 인증 캐시도 삭제)"""
     # 본인 키 확인 (Repository 호출)
     api_key = await api_key_repo.find_by_id_and_user(db, key_id, user_id)
     
@@ -33,4 +35,5 @@ async def revoke_api_key(db: AsyncSession, user_id: str, key_id: str) -> bool:
     
     # 비활성화 (Repository 호출)
     await api_key_repo.deactivate(db, api_key)
+    await invalidate_api_key(redis, api_key.key)
     return True
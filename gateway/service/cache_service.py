@@ -1,37 +1,38 @@
-import json
 import hashlib
 from redis.asyncio import Redis
+from core.serialization import pack, unpack
 
 # 캐시 TTL (초) — 1시간
 CACHE_TTL = 3600
 
-def _make_cache_key(query: str) -> str:
+def make_cache_key(query: str) -> str:
     query_hash = hashlib.md5(query.encode()).hexdigest()
-    return f"cache:{query_hash}"
+    # 값 형식이 JSON → msgpack으로 바뀌어 키 접두사를 분리 (기존 JSON 값은 TTL로 자연 만료)
+    return f"cache:mp:{query_hash}"
 
 
 async def get_cached_response(redis: Redis, query: str) -> dict | None:
     """
-    캐시에서 응답 조회
+    캐시에서 응답 조회 (redis: get_redis_binary() 클라이언트)
     Returns:
         캐시 히트: {"query": ..., "complexity": ..., "model": ..., "response": ...}
         캐시 미스: None
     """
-    key = _make_cache_key(query)
+    key = make_cache_key(query)
     cached = await redis.get(key)
     
     if cached:
-        return json.loads(cached)
+        return unpack(cached)
     
     return None
 
 
 async def set_cached_response(redis: Redis, query: str, response_data: dict) -> None:
     """
-    응답을 캐시에 저장
+    응답을 캐시에 저장 (msgpack 바이너리)
     Args:
         query: 원본 질문 (키 생성용)
         response_data: 저장할 응답 dict
     """
-    key = _make_cache_key(query)
-    await redis.set(key, json.dumps(response_data, ensure_ascii=False), ex=CACHE_TTL)
\ No newline at end of file
+    key = make_cache_key(query)
+    await redis.set(key, pack(response_data), ex=CACHE_TTL)
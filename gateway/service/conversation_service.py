@@ -1,7 +1,14 @@
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator, Mapping
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from models.conversation import Conversation, Message
 from repository import conversation_repo
+from core.database import async_session
+from core.serialization import dumps
+
+# 내보내기: 한 번에 전송할 버퍼 크기 (작은 write 수천 번 대신 64KB 단위로 묶음)
+EXPORT_FLUSH_BYTES = 64 * 1024
 
 
 async def create_conversation(db: AsyncSession, user_id: str, title: str = "새 대화") -> Conversation:
@@ -10,16 +17,33 @@ async def create_conversation(db: AsyncSession, user_id: str, title: str = "새
     return await conversation_repo.create(db, conversation)
 
 
-async def add_message(db: AsyncSession, conversation_id: str, role: str, content: str) -> Message:
-    """대화에 메시지 추가"""
+async def add_message(
+    db: AsyncSession, conversation_id: str, role: str, content: str, truncated: bool = False
+) -> Message:
+    """대화에 메시지 추가 (truncated: 생성 도중 중단된 부분 응답)"""
     message = Message(
         conversation_id=conversation_id,
         role=role,
-        content=content
+        content=content,
+        truncated=truncated,
     )
     return await conversation_repo.add_message(db, message)
 
 
+async def save_message(
+    message_id: str, conversation_id: str, role: str, content: str, truncated: bool = False
+) -> None:
+    """
+    새 세션으로 메시지 저장 — 응답 후 백그라운드 작업용 (core/side_effects.py)
+
+    요청의 Depends(get_db) 세션은 응답과 함께 정리되므로 별도 세션을 열어서 사용
+    message_id: 호출하는 쪽에서 미리 만든 id (멱등 키) — 후처리 큐가 재시도하거나
+                같은 응답을 두 번 저장하려 해도 메시지는 1건
+    """
+    async with async_session() as db:
+        await conversation_repo.insert_message_once(db, message_id, conversation_id, role, content, truncated)
+
+
 async def get_conversations(db: AsyncSession, user_id: str) -> list[Conversation]:
     """내 대화 목록 조회"""
     return await conversation_repo.find_by_user_id(db, user_id)
@@ -37,12 +61,113 @@ async def get_conversation_detail(db: AsyncSession, conversation_id: str, user_i
     return conversation
 
 
+async def search_messages(
+    db: AsyncSession, user_id: str, query: str, limit: int = 20, offset: int = 0
+) -> dict:
+    """메시지 전문 검색 — limit+1건을 조회해 다음 페이지 존재 여부 판단 (COUNT 쿼리 생략)"""
+    query = query.strip()
+    if not query:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="검색어를 입력해주세요."
+        )
+
+    rows = await conversation_repo.search_messages(db, user_id, query, limit + 1, offset)
+
+    return {
+        "query": query,
+        "limit": limit,
+        "offset": offset,
+        "has_more": len(rows) > limit,
+        "results": rows[:limit],
+    }
+
+
+async def iter_export_ndjson(
+    rows: AsyncIterable[Mapping], compress: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    대화/메시지 행 스트림 → NDJSON 바이트 청크
+
+    출력 형식 (한 줄 = JSON 객체 1개):
+      {"type": "conversation", "id": ..., "title": ..., "created_at": ...}
+      {"type": "message", "conversation_id": ..., "id": ..., "role": ..., "content": ..., "created_at": ...}
+
+    - 대화 헤더 줄 뒤에 해당 대화의 메시지 줄이 이어짐 → 대화 단위 버퍼링 불필요
+    - 메모리 사용량은 EXPORT_FLUSH_BYTES 버퍼 하나로 고정
+    - compress=True면 gzip 스트림으로 압축 (wbits=31: gzip 헤더/트레일러 포함)
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer: list[bytes] = []
+    buffered = 0
+    current_conversation_id = None
+
+    def flush() -> bytes:
+        nonlocal buffered
+        chunk = b"".join(buffer)
+        buffer.clear()
+        buffered = 0
+        return compressor.compress(chunk) if compressor else chunk
+
+    async for row in rows:
+        lines = []
+        if row["conversation_id"] != current_conversation_id:
+            current_conversation_id = row["conversation_id"]
+            lines.append({
+                "type": "conversation",
+                "id": row["conversation_id"],
+                "title": row["title"],
+                "created_at": row["conversation_created_at"].isoformat(),
+            })
+        if row["message_id"] is not None:
+            lines.append({
+                "type": "message",
+                "conversation_id": row["conversation_id"],
+                "id": row["message_id"],
+                "role": row["role"],
+                "content": row["content"],
+                "created_at": row["message_created_at"].isoformat(),
+            })
+
+        for line in lines:
+            encoded = dumps(line) + b"\n"
+            buffer.append(encoded)
+            buffered += len(encoded)
+
+        if buffered >= EXPORT_FLUSH_BYTES:
+            chunk = flush()
+            if chunk:
+                yield chunk
+
+    tail = flush()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
+
+
+async def export_conversations(
+    db: AsyncSession, user_id: str, compress: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    내 대화 전체 NDJSON 내보내기 (StreamingResponse용 제네레이터)
+
+    StreamingResponse는 Depends(get_db) 정리 이후에 실행되므로
+    스트림이 끝나면 세션을 직접 닫아 커넥션을 풀에 반환
+    """
+    try:
+        rows = conversation_repo.stream_for_export(db, user_id)
+        async for chunk in iter_export_ndjson(rows, compress=compress):
+            yield chunk
+    finally:
+        await db.close()
+
+
 async def delete_conversation(db: AsyncSession, conversation_id: str, user_id: str) -> None:
     """대화 삭제 — 없으면 404"""
-    conversation = await conversation_repo.find_by_id_and_user(db, conversation_id, user_id)
-    if not conversation:
+    deleted = await conversation_repo.delete_by_id_and_user(db, conversation_id, user_id)
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="대화를 찾을 수 없습니다."
-        )
-    await conversation_repo.delete(db, conversation)
\ No newline at end of file
+        )
\ No newline at end of file
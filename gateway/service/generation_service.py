@@ -0,0 +1,215 @@
+"""
+재개 가능한 SSE 생성 서비스 — Redis Streams 버퍼
+
+모바일 클라이언트는 연결이 자주 끊김 → 재연결 때마다 /api/chat/stream을 다시 POST하면
+그래프 전체를 재실행하고 토큰도 다시 과금됨
+
+구조:
+  생성(producer)  : 그래프 실행을 HTTP 연결과 분리된 백그라운드 태스크로 돌리고,
+                    SSEWriter가 만든 프레임을 Redis Stream에 XADD (entry ID = SSE id)
+  구독(consumer)  : SSE 엔드포인트는 Stream을 XREAD BLOCK으로 tail
+                    재연결 시 Last-Event-ID 이후부터 재생 후 실시간 출력 이어서 전송
+  유예(grace)     : 구독자가 attached 키를 주기적으로 갱신 (TTL = 유예 시간)
+                    키가 만료되면(= 유예 시간 동안 아무도 안 봄) 생성 취소
+                    → 다른 워커로 재연결해도 동작 (상태가 전부 Redis에 있음)
+
+Redis 키 구조 (TTL = SSE_BUFFER_TTL_SECONDS):
+  gen:{generation_id}:events    → Stream  {f: 프레임 bytes} / 마지막 항목 {end: 상태}
+                                   entry ID "0-{N}" = SSE "id: N" (MAXLEN으로 길이 제한)
+                                   writer 청크 하나에 프레임이 여러 개면 프레임마다 항목 1개
+  gen:{generation_id}:meta      → Hash    {user_id, conversation_id, status}
+  gen:{generation_id}:attached  → String  구독자 생존 신호 (TTL = SSE_RESUME_GRACE_SECONDS)
+"""
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import suppress
+from redis.asyncio import Redis
+
+from core.config import settings
+from core.logger import get_logger
+from core.sse import SSEWriter, HEARTBEAT_FRAME
+
+logger = get_logger("generation")
+
+# 진행 중인 생성 태스크 {generation_id: Task} — 태스크 참조 유지 + 종료 시 정리용
+_generations: dict[str, asyncio.Task] = {}
+
+
+def _events_key(generation_id: str) -> str:
+    return f"gen:{generation_id}:events"
+
+
+def _meta_key(generation_id: str) -> str:
+    return f"gen:{generation_id}:meta"
+
+
+def _attached_key(generation_id: str) -> str:
+    return f"gen:{generation_id}:attached"
+
+
+def _grace_ms() -> int:
+    return max(int(settings.sse_resume_grace_seconds * 1000), 1)
+
+
+def _split_frames(chunk: bytes) -> list[tuple[int, bytes]]:
+    """
+    writer 청크 → [(SSE id, 프레임)]
+
+    SSEWriter.frame()은 대기 중인 토큰 프레임과 완성 프레임을 한 청크로 반환함
+    → 청크 하나를 항목 하나로 넣으면 그 안의 id로 재연결할 때 앞 프레임이 다시 재생됨
+    """
+    frames = []
+    for block in chunk.split(b"\n\n"):
+        if block:
+            event_id = int(block.split(b"\n", 1)[0].removeprefix(b"id: "))
+            frames.append((event_id, block + b"\n\n"))
+    return frames
+
+
+async def _publish(
+    redis: Redis, generation_id: str, entries: list[tuple[int, dict]], status: str | None = None
+) -> None:
+    """
+    항목 XADD + TTL 갱신 (파이프라인 1회 왕복)
+
+    entries: [(SSE id, 필드)] — entry ID "0-{SSE id}"
+    status가 주어지면 meta 상태도 함께 갱신 (MULTI) — 종료 항목을 본 구독자가
+    이전 상태("running")를 읽는 일이 없도록
+    """
+    pipe = redis.pipeline(transaction=status is not None)
+    if status is not None:
+        pipe.hset(_meta_key(generation_id), "status", status)
+    for entry_id, fields in entries:
+        pipe.xadd(
+            _events_key(generation_id), fields, id=f"0-{entry_id}",
+            maxlen=settings.sse_buffer_maxlen, approximate=True,
+        )
+    pipe.expire(_events_key(generation_id), settings.sse_buffer_ttl_seconds)
+    pipe.expire(_meta_key(generation_id), settings.sse_buffer_ttl_seconds)
+    await pipe.execute()
+
+
+async def _watch_subscribers(redis: Redis, generation_id: str, task: asyncio.Task) -> None:
+    """구독자가 유예 시간 동안 없으면 생성 태스크 취소"""
+    interval = max(settings.sse_resume_grace_seconds / 4, 0.05)
+    while not task.done():
+        await asyncio.sleep(interval)
+        if not await redis.exists(_attached_key(generation_id)):
+            logger.info(
+                f"생성 취소 — {settings.sse_resume_grace_seconds}s 동안 구독자 없음",
+                extra={"extra_data": {"generation_id": generation_id}},
+            )
+            task.cancel()
+            return
+
+
+async def _run_generation(
+    redis: Redis, generation_id: str, writer: SSEWriter, source: AsyncIterator[str | bytes]
+) -> None:
+    status = "cancelled"
+    last_id = 0
+    watchdog = asyncio.create_task(
+        _watch_subscribers(redis, generation_id, asyncio.current_task())
+    )
+    try:
+        async for chunk in writer.stream(source):
+            # heartbeat는 버퍼에 넣지 않음 (구독자 쪽에서 XREAD 대기 시간마다 직접 전송)
+            if chunk.startswith(b":"):
+                continue
+            last_id = writer.event_id
+            frames = _split_frames(chunk)
+            await _publish(redis, generation_id, [(event_id, {"f": frame}) for event_id, frame in frames])
+        status = "done"
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        status = "error"
+        logger.error(f"생성 실패: {e}", extra={"extra_data": {"generation_id": generation_id}})
+    finally:
+        watchdog.cancel()
+        _generations.pop(generation_id, None)
+        # 종료 표시 — 구독자는 이 항목을 받으면 스트림을 닫음
+        try:
+            await _publish(redis, generation_id, [(last_id + 1, {"end": status})], status=status)
+        except Exception as e:
+            logger.error(f"생성 종료 표시 실패: {e}", extra={"extra_data": {"generation_id": generation_id}})
+
+
+async def start_generation(
+    redis: Redis,
+    generation_id: str,
+    user_id: str,
+    conversation_id: str,
+    writer: SSEWriter,
+    source: AsyncIterator[str | bytes],
+) -> None:
+    """
+    생성 시작 — HTTP 연결과 분리된 백그라운드 태스크로 실행
+
+    redis: get_redis_binary() 클라이언트 (프레임이 bytes)
+    """
+    pipe = redis.pipeline(transaction=False)
+    pipe.hset(_meta_key(generation_id), mapping={
+        "user_id": user_id,
+        "conversation_id": conversation_id,
+        "status": "running",
+    })
+    pipe.expire(_meta_key(generation_id), settings.sse_buffer_ttl_seconds)
+    # 첫 구독자가 붙기 전에 워치독이 취소하지 않도록 미리 생존 신호 설정
+    pipe.set(_attached_key(generation_id), 1, px=_grace_ms())
+    await pipe.execute()
+
+    _generations[generation_id] = asyncio.create_task(
+        _run_generation(redis, generation_id, writer, source)
+    )
+
+
+async def get_generation_meta(redis: Redis, generation_id: str) -> dict | None:
+    """생성 메타 정보 {user_id, conversation_id, status} — 없거나 만료되면 None"""
+    meta = await redis.hgetall(_meta_key(generation_id))
+    if not meta:
+        return None
+    return {key.decode(): value.decode() for key, value in meta.items()}
+
+
+async def tail_generation(redis: Redis, generation_id: str, last_event_id: int = 0) -> AsyncIterator[bytes]:
+    """
+    Stream 구독 — last_event_id 이후 프레임 재생 + 실시간 tail (StreamingResponse용)
+
+    - XREAD BLOCK 대기 시간마다 attached 키 갱신 + heartbeat 전송
+    - 버퍼가 MAXLEN으로 잘린 경우 남아 있는 가장 오래된 프레임부터 재생
+    - 연결이 끊기면 이 제네레이터만 취소되고 생성은 유예 시간 동안 계속됨
+    """
+    events_key = _events_key(generation_id)
+    meta_key = _meta_key(generation_id)
+    attached_key = _attached_key(generation_id)
+    block_ms = int(min(settings.sse_heartbeat_seconds, settings.sse_resume_grace_seconds / 2) * 1000)
+    cursor = f"0-{last_event_id}"
+
+    while True:
+        await redis.set(attached_key, 1, px=_grace_ms())
+        response = await redis.xread({events_key: cursor}, count=100, block=max(block_ms, 1))
+
+        if not response:
+            # 새 프레임 없음 — 생성 정보가 만료됐으면 종료, 아니면 heartbeat
+            # (첫 프레임 전에는 Stream 키가 아직 없으므로 meta 키로 판단)
+            if not await redis.exists(meta_key):
+                return
+            yield HEARTBEAT_FRAME
+            continue
+
+        for entry_id, fields in response[0][1]:
+            cursor = entry_id
+            if b"end" in fields:
+                return
+            yield fields[b"f"]
+
+
+async def stop_generations() -> None:
+    """서버 종료 시 진행 중인 생성 취소 (부분 응답은 truncated로 저장됨)"""
+    tasks = list(_generations.values())
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
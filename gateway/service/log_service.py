@@ -1,6 +1,7 @@
-import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from redis.asyncio import Redis
+from core.config import settings
+from core.serialization import dumps_str, loads
 
 """
 토큰 사용량 로깅 서비스
@@ -11,6 +12,15 @@ Redis 키 구조:
   log:{user_id}:total_tokens      → 누적 총 토큰 수 (INCRBY)
   log:{user_id}:request_count     → 누적 요청 횟수 (INCR)
   log:{user_id}:history           → 최근 요청 기록 리스트 (LPUSH, 최대 100개)
+
+시간 버킷 집계 (분/시간/일, UTC) — 같은 파이프라인에서 함께 기록:
+  usage:{res}:{bucket}:user:{user_id}   → Hash  {requests, prompt_tokens, completion_tokens, total_tokens}
+  usage:{res}:{bucket}:model:{model}    → Hash  (위와 동일)
+  usage:{res}:{bucket}:top:users        → ZSet  user_id별 total_tokens (ZINCRBY)
+  usage:{res}:{bucket}:top:models       → ZSet  model별 total_tokens (ZINCRBY)
+  res: minute(%Y%m%d%H%M) / hour(%Y%m%d%H) / day(%Y%m%d)
+  TTL: USAGE_ROLLUP_TTL_SECONDS — 해상도가 낮을수록 오래 보관 (분 2시간, 시간 7일, 일 90일)
+  → "오늘 토큰 사용량 상위 유저"를 log:* 키 SCAN 없이 ZREVRANGE 한 번으로 조회 (O(log n + k))
   
 chat-platform과 비교:
   chat-platform: 최근 메시지 30개를 Redis List로 캐싱
@@ -21,17 +31,52 @@ chat-platform과 비교:
 # 최근 기록 보관 개수
 MAX_HISTORY = 100
 
+# 해상도별 버킷 형식과 길이
+RESOLUTIONS = {
+    "minute": ("%Y%m%d%H%M", timedelta(minutes=1)),
+    "hour": ("%Y%m%d%H", timedelta(hours=1)),
+    "day": ("%Y%m%d", timedelta(days=1)),
+}
+USAGE_FIELDS = ("requests", "prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def _bucket(resolution: str, at: datetime) -> str:
+    return at.strftime(RESOLUTIONS[resolution][0])
+
+
+def _rollup_key(resolution: str, bucket: str, dimension: str, member: str) -> str:
+    """dimension: user / model"""
+    return f"usage:{resolution}:{bucket}:{dimension}:{member}"
+
+
+def _top_key(resolution: str, bucket: str, dimension: str) -> str:
+    """dimension: user / model"""
+    return f"usage:{resolution}:{bucket}:top:{dimension}s"
+
+
+def _parse_usage(raw: dict) -> dict:
+    return {field: int(raw.get(field, 0)) for field in USAGE_FIELDS}
+
 async def log_usage(
-    redis: Redis, user_id: str, query: str, model: str, prompt_tokens: int, completion_tokens: int
+    redis: Redis,
+    user_id: str,
+    query: str,
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    now: datetime | None = None,
 ) -> None:
     """
     요청 1건의 토큰 사용량 기록
-    3가지 데이터를 동시에 업데이트:
+    4가지 데이터를 동시에 업데이트:
     1. 총 토큰 수 누적
     2. 요청 횟수 +1
     3. 상세 기록 리스트에 추가
+    4. 분/시간/일 버킷 집계 + 리더보드
     """
     total_tokens = prompt_tokens + completion_tokens
+    now = now or datetime.now(timezone.utc)
+    model = model or "unknown"
     
     # Pipeline: 여러 Redis 명령을 한 번에 보냄 (네트워크 왕복 1번)
     pipe = redis.pipeline()
@@ -43,17 +88,37 @@ async def log_usage(
     pipe.incr(f"log:{user_id}:request_count")
     
     # 3. 상세 기록 (최근 100건만 유지)
-    record = json.dumps({
+    record = dumps_str({
         "query": query[:100],      # 질문 앞 100자만 저장 (메모리 절약)
         "model": model,
         "prompt_tokens": prompt_tokens,
         "completion_tokens": completion_tokens,
         "total_tokens": total_tokens,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-    }, ensure_ascii=False)
+        "timestamp": now.isoformat(),
+    })
     
     pipe.lpush(f"log:{user_id}:history", record)
     pipe.ltrim(f"log:{user_id}:history", 0, MAX_HISTORY - 1)
+
+    # 4. 시간 버킷 집계 — 해상도별로 유저/모델 해시 + 리더보드
+    usage = {
+        "requests": 1,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+    }
+    for resolution in RESOLUTIONS:
+        bucket = _bucket(resolution, now)
+        ttl = settings.usage_rollup_ttl_seconds[resolution]
+        for dimension, member in (("user", user_id), ("model", model)):
+            key = _rollup_key(resolution, bucket, dimension, member)
+            for field, value in usage.items():
+                pipe.hincrby(key, field, value)
+            pipe.expire(key, ttl)
+
+            top_key = _top_key(resolution, bucket, dimension)
+            pipe.zincrby(top_key, total_tokens, member)
+            pipe.expire(top_key, ttl)
     
     # 한 번에 실행
     await pipe.execute()
@@ -79,11 +144,89 @@ async def get_usage_summary(redis: Redis, user_id: str) -> dict:
     
     total_tokens = int(results[0]) if results[0] else 0
     request_count = int(results[1]) if results[1] else 0
-    history = [json.loads(h) for h in results[2]] if results[2] else []
+    history = [loads(h) for h in results[2]] if results[2] else []
     
     return {
         "user_id": user_id,
         "total_tokens": total_tokens,
         "request_count": request_count,
         "recent_history": history
-    }
\ No newline at end of file
+    }
+
+
+async def get_usage_leaderboard(
+    redis: Redis,
+    resolution: str = "day",
+    bucket: str | None = None,
+    dimension: str = "user",
+    limit: int = 20,
+    offset: int = 0,
+) -> dict:
+    """
+    버킷 하나의 토큰 사용량 순위 (페이지 단위)
+
+    bucket을 생략하면 현재 버킷 (예: 오늘)
+    limit+1건을 조회해 다음 페이지 존재 여부 판단 → 각 항목의 상세 집계는 파이프라인 1회로 조회
+    """
+    bucket = bucket or _bucket(resolution, datetime.now(timezone.utc))
+    top_key = _top_key(resolution, bucket, dimension)
+
+    pipe = redis.pipeline(transaction=False)
+    pipe.zrevrange(top_key, offset, offset + limit, withscores=True)
+    pipe.zcard(top_key)
+    ranked, total = await pipe.execute()
+
+    has_more = len(ranked) > limit
+    ranked = ranked[:limit]
+
+    pipe = redis.pipeline(transaction=False)
+    for member, _ in ranked:
+        pipe.hgetall(_rollup_key(resolution, bucket, dimension, member))
+    details = await pipe.execute() if ranked else []
+
+    return {
+        "resolution": resolution,
+        "bucket": bucket,
+        "dimension": dimension,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "has_more": has_more,
+        "results": [
+            {"rank": offset + i + 1, "member": member, **_parse_usage(raw)}
+            for i, ((member, _), raw) in enumerate(zip(ranked, details))
+        ],
+    }
+
+
+async def get_usage_series(
+    redis: Redis,
+    dimension: str,
+    member: str,
+    resolution: str = "hour",
+    count: int = 24,
+    now: datetime | None = None,
+) -> dict:
+    """
+    유저/모델 1개의 최근 count개 버킷 시계열 (오래된 순)
+
+    TTL이 지난 버킷은 0으로 채움
+    """
+    now = now or datetime.now(timezone.utc)
+    step = RESOLUTIONS[resolution][1]
+    buckets = [_bucket(resolution, now - step * i) for i in reversed(range(count))]
+
+    pipe = redis.pipeline(transaction=False)
+    for bucket in buckets:
+        pipe.hgetall(_rollup_key(resolution, bucket, dimension, member))
+    results = await pipe.execute()
+
+    return {
+        "dimension": dimension,
+        "member": member,
+        "resolution": resolution,
+        "series": [
+            {"bucket": bucket, **_parse_usage(raw)}
+            for bucket, raw in zip(buckets, results)
+        ],
+    }
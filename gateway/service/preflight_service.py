@@ -0,0 +1,202 @@
+"""
+요청 전처리(preflight) 서비스 — 쿼터 + 응답 캐시 + 인증 정보를 Redis 왕복 1번으로
+
+기존 흐름 (요청마다 순서대로):
+  인증: PostgreSQL SELECT (API Key면 2번)
+  쿼터: INCR (+ 첫 요청이면 EXPIRE)
+  캐시: GET
+→ 그래프 실행 전에만 DB 1~2회 + Redis 2~3회 왕복
+
+변경:
+  1. JWT 서명 검증은 CPU 작업 (user_id = sub)
+  2. Lua 스크립트 1회 — 인증 캐시 HGETALL + 쿼터 INCR/EXPIRE + 응답 캐시 GET
+     API Key 요청은 user_id를 모르므로 스크립트 안에서 인증 캐시의 id로 쿼터 키를 만듦
+  3. 인증 캐시 미스일 때만 PostgreSQL 조회 → 인증 캐시 채우기 (파이프라인 1회)
+→ 캐시 히트 응답은 게이트웨이 오버헤드가 Redis 왕복 1번
+
+Redis 키 구조 (TTL = AUTH_CACHE_TTL_SECONDS):
+  auth:user:{user_id}          → Hash {id, username, role, is_active}  (JWT)
+  auth:key:{sha256(api_key)}   → Hash (위와 동일)  (API Key, 원문 키는 저장하지 않음)
+  API Key 폐기 시 api_key_service가 해당 키 삭제
+
+단계별 시간은 Server-Timing 헤더(pre_*)와 메트릭으로 보고
+"""
+import hashlib
+import time
+from fastapi import HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.metrics import metrics_store
+from core.security import decode_access_token, ensure_active, load_user, load_user_by_api_key
+from core.serialization import unpack
+from models.users import User
+from service.cache_service import make_cache_key
+from service.quota_service import QUOTA_TTL, enforce_quota, make_quota_key, quota_bucket
+
+# KEYS[1] 인증 캐시, KEYS[2] 응답 캐시 (생략 가능)
+# ARGV[1] user_id (API Key 요청이면 빈 문자열), ARGV[2] 쿼터 분 버킷, ARGV[3] 쿼터 TTL
+# 반환: {쿼터 사용 횟수 (user_id를 모르면 0), 캐시 값 (없으면 ''), 인증 캐시 필드 목록}
+# 쿼터 키는 스크립트 안에서 만들어지므로 단일 Redis 인스턴스 전제 (클러스터 미지원)
+PREFLIGHT_SCRIPT = """
+local principal = redis.call('HGETALL', KEYS[1])
+local user_id = ARGV[1]
+if user_id == '' then
+  for i = 1, #principal, 2 do
+    if principal[i] == 'id' then user_id = principal[i + 1] end
+  end
+end
+local used = 0
+if user_id ~= '' then
+  local quota_key = 'quota:' .. user_id .. ':' .. ARGV[2]
+  used = redis.call('INCR', quota_key)
+  if used == 1 then redis.call('EXPIRE', quota_key, ARGV[3]) end
+end
+local cached = ''
+if #KEYS > 1 then cached = redis.call('GET', KEYS[2]) or '' end
+return {used, cached, principal}
+"""
+
+# EVALSHA용 스크립트 객체 (첫 호출 시 생성, 서버에 없으면 redis-py가 SCRIPT LOAD 후 재시도)
+_preflight_script: AsyncScript | None = None
+
+
+def _auth_key(user_id: str | None, api_key: str | None) -> str:
+    if api_key:
+        return f"auth:key:{hashlib.sha256(api_key.encode()).hexdigest()}"
+    return f"auth:user:{user_id}"
+
+
+def _principal_fields(user: User) -> dict:
+    return {
+        "id": user.id,
+        "username": user.username,
+        "role": user.role,
+        "is_active": int(bool(user.is_active)),
+    }
+
+
+def _principal_user(fields: list[bytes]) -> User:
+    """HGETALL 결과 → DB 세션과 무관한 User 객체 (id/username/role/is_active만 채움)"""
+    data = {fields[i].decode(): fields[i + 1].decode() for i in range(0, len(fields), 2)}
+    return User(
+        id=data["id"],
+        username=data["username"],
+        role=data["role"],
+        is_active=data["is_active"] == "1",
+    )
+
+
+async def invalidate_api_key(redis: Redis, api_key: str) -> None:
+    """폐기된 API Key의 인증 캐시 삭제"""
+    await redis.delete(_auth_key(None, api_key))
+
+
+class Preflight:
+    """전처리 결과 — 인증된 사용자, 쿼터 사용 횟수, 캐시된 응답, 단계별 시간"""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.user: User | None = None
+        self.quota_used = 0
+        self.cached: dict | None = None
+        self.timings: dict[str, float] = {}
+        self.outcomes: list[str] = []
+        self._mark = time.perf_counter()
+
+    def stage(self, name: str) -> None:
+        """직전 단계 종료 시점 기록"""
+        now = time.perf_counter()
+        self.timings[name] = self.timings.get(name, 0.0) + (now - self._mark) * 1000
+        self._mark = now
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 — 예: "pre_auth;dur=0.1, pre_redis;dur=0.4" """
+        return ", ".join(f"pre_{name};dur={ms:.1f}" for name, ms in self.timings.items())
+
+    def report(self) -> None:
+        metrics_store.record_preflight(self.route, self.timings, self.outcomes)
+
+
+async def run_preflight(
+    redis: Redis,
+    db: AsyncSession,
+    route: str,
+    credentials: HTTPAuthorizationCredentials | None,
+    api_key: str | None,
+    query: str | None = None,
+) -> Preflight:
+    """
+    인증 → 쿼터 → 캐시 조회를 한 번에 처리
+
+    redis: get_redis_binary() 클라이언트 (캐시 값이 msgpack)
+    query: 주어지면 응답 캐시도 조회 (스트리밍은 캐시를 쓰지 않으므로 생략)
+    Raises:
+        401/403: 인증 실패, 비활성 계정 (core.security와 동일)
+        429: 쿼터 초과
+    """
+    result = Preflight(route)
+    try:
+        # 1. 인증 정보 — JWT는 서명 검증만 (DB 조회 없음)
+        if api_key:
+            user_id = None
+        elif credentials:
+            user_id = decode_access_token(credentials.credentials)
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="인증 정보(토큰 또는 API 키)가 제공되지 않았습니다",
+            )
+        auth_key = _auth_key(user_id, api_key)
+        result.stage("auth")
+
+        # 2. Redis 왕복 1번 — 인증 캐시 + 쿼터 + 응답 캐시
+        global _preflight_script
+        if _preflight_script is None:
+            _preflight_script = redis.register_script(PREFLIGHT_SCRIPT)
+        keys = [auth_key, make_cache_key(query)] if query is not None else [auth_key]
+        used, cached, principal = await _preflight_script(
+            keys=keys, args=[user_id or "", quota_bucket(), QUOTA_TTL], client=redis,
+        )
+        result.stage("redis")
+
+        # 3. 인증 캐시 미스 — DB 조회 후 캐시 채우기
+        if principal:
+            result.user = _principal_user(principal)
+            result.outcomes.append("auth_cache_hit")
+        else:
+            result.outcomes.append("auth_cache_miss")
+            if api_key:
+                result.user = await load_user_by_api_key(db, api_key)
+            else:
+                result.user = await load_user(db, user_id)
+            result.stage("auth_db")
+
+            pipe = redis.pipeline(transaction=False)
+            pipe.hset(auth_key, mapping=_principal_fields(result.user))
+            pipe.expire(auth_key, settings.auth_cache_ttl_seconds)
+            if not used:
+                # API Key 요청은 스크립트에서 쿼터를 세지 못했으므로 여기서 증가
+                quota_key = make_quota_key(result.user.id)
+                pipe.incr(quota_key)
+                pipe.expire(quota_key, QUOTA_TTL)
+            responses = await pipe.execute()
+            if not used:
+                used = responses[2]
+            result.stage("redis_fill")
+
+        ensure_active(result.user)
+        result.quota_used = used
+        enforce_quota(used)
+
+        if cached:
+            result.cached = unpack(cached)
+            result.outcomes.append("response_cache_hit")
+        elif query is not None:
+            result.outcomes.append("response_cache_miss")
+        return result
+    finally:
+        result.report()
@@ -7,9 +7,22 @@ MAX_REQUESTS_PER_MINUTE = 20
 # 쿼터 키 TTL (초) — 2분 (여유분 포함)
 QUOTA_TTL = 120
 
-def _make_quota_key(user_id: str) -> str:
-    now = datetime.now(timezone.utc).strftime("%Y%m%d%H%M")
-    return f"quota:{user_id}:{now}"
+def quota_bucket() -> str:
+    """현재 분 단위 버킷 (쿼터 키 접미사)"""
+    return datetime.now(timezone.utc).strftime("%Y%m%d%H%M")
+
+
+def make_quota_key(user_id: str) -> str:
+    return f"quota:{user_id}:{quota_bucket()}"
+
+
+def enforce_quota(current: int) -> None:
+    """증가 후 사용 횟수가 한도를 넘으면 429"""
+    if current > MAX_REQUESTS_PER_MINUTE:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"분당 {MAX_REQUESTS_PER_MINUTE}회 요청 제한을 초과했습니다. 잠시 후 다시 시도해주세요."
+        )
 
 
 async def check_quota(redis: Redis, user_id: str) -> int:
@@ -20,7 +33,7 @@ async def check_quota(redis: Redis, user_id: str) -> int:
     Raises:
         429 Too Many Requests: 쿼터 초과 시
     """
-    key = _make_quota_key(user_id)
+    key = make_quota_key(user_id)
     
     # INCR: 키가 없으면 1로 생성, 있으면 +1
     # 원자적(atomic) 연산 — 동시 요청에도 안전
@@ -31,11 +44,7 @@ async def check_quota(redis: Redis, user_id: str) -> int:
         await redis.expire(key, QUOTA_TTL)
     
     # 쿼터 초과
-    if current > MAX_REQUESTS_PER_MINUTE:
-            raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"분당 {MAX_REQUESTS_PER_MINUTE}회 요청 제한을 초과했습니다. 잠시 후 다시 시도해주세요."
-        )
+    enforce_quota(current)
     return current
 
 
@@ -45,7 +54,7 @@ async def get_remaining_quota(redis: Redis, user_id: str) -> dict:
     Returns:
         {"user_id": "admin", "used": 7, "limit": 20, "remaining": 13}
     """
-    key = _make_quota_key(user_id)
+    key = make_quota_key(user_id)
     used = await redis.get(key)
     used = int(used) if used else 0
     
@@ -0,0 +1,160 @@
+"""
+대화 보존 정책(Retention) 서비스
+
+역할별 보존 기간이 지난 대화를 배치 단위로 정리합니다.
+
+정리 방식 (대화 단위 — 마지막 활동 = 대화 생성 시각과 가장 최근 메시지 중 늦은 쪽):
+  1. 메시지: 마지막 활동이 cutoff 이전인 대화의 메시지를 batch_size씩 set-based DELETE
+  2. 대화: 마지막 활동이 cutoff 이전인 대화(이제 비어 있음)를 삭제
+  → 이어지고 있는 대화의 오래된 앞부분만 잘려 나가지 않음
+  → ORM cascade처럼 행을 메모리에 로드하지 않고, 배치마다 커밋해서
+    긴 트랜잭션/락 없이 점진적으로 정리
+
+주기 작업은 워커(uvicorn --workers N)마다 실행되므로 Redis 락(SET NX EX = 정리 주기)을
+먼저 잡은 워커 하나만 정리 — 주기당 1회
+
+설정 (core/config.py):
+  retention_days_by_role   → {"user": 90, "admin": 0}  (0 = 무기한)
+  retention_default_days   → 매핑에 없는 역할의 보존 기간
+"""
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import async_session
+from core.logger import get_logger
+from repository import conversation_repo
+
+logger = get_logger("retention")
+
+# 주기 작업 담당 워커 락 (값: 락을 잡은 호스트:pid, 만료: 정리 주기)
+RETENTION_LOCK_KEY = "retention:lock"
+
+
+def get_retention_policies() -> list[dict]:
+    """
+    설정 → 정리 대상 정책 목록
+
+    Returns:
+        [{"name": "user", "roles": ["user"], "exclude": False, "days": 90}, ...]
+        (보존 기간 0인 역할은 제외, 매핑에 없는 역할은 "default" 정책으로 묶음)
+    """
+    by_role = settings.retention_days_by_role
+    policies = [
+        {"name": role, "roles": [role], "exclude": False, "days": days}
+        for role, days in by_role.items()
+        if days > 0
+    ]
+    if settings.retention_default_days > 0:
+        policies.append({
+            "name": "default",
+            "roles": list(by_role),
+            "exclude": True,
+            "days": settings.retention_default_days,
+        })
+    return policies
+
+
+async def _purge_in_batches(purge_batch, db: AsyncSession, policy: dict, cutoff: datetime) -> tuple[int, int]:
+    """배치가 가득 차지 않을 때까지 반복 삭제 → (삭제 행 수, 배치 수)"""
+    batch_size = settings.retention_batch_size
+    total = 0
+    batches = 0
+    while True:
+        deleted = await purge_batch(db, policy["roles"], policy["exclude"], cutoff, batch_size)
+        total += deleted
+        batches += 1
+        if deleted < batch_size:
+            return total, batches
+        # 배치 사이에 다른 요청이 DB 커넥션/이벤트 루프를 쓸 수 있도록 양보
+        await asyncio.sleep(0)
+
+
+async def purge_expired(db: AsyncSession) -> dict:
+    """
+    보존 기간이 지난 데이터 정리 (1회 실행)
+
+    Returns:
+        {
+            "messages_deleted": 1234,
+            "conversations_deleted": 56,
+            "duration_ms": 812.3,
+            "policies": [{"name": "user", "cutoff": "...", ...}, ...]
+        }
+    """
+    start = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    reports = []
+
+    for policy in get_retention_policies():
+        policy_start = time.perf_counter()
+        cutoff = now - timedelta(days=policy["days"])
+
+        messages_deleted, message_batches = await _purge_in_batches(
+            conversation_repo.purge_messages_batch, db, policy, cutoff
+        )
+        conversations_deleted, conversation_batches = await _purge_in_batches(
+            conversation_repo.purge_expired_conversations_batch, db, policy, cutoff
+        )
+
+        reports.append({
+            "name": policy["name"],
+            "days": policy["days"],
+            "cutoff": cutoff.isoformat(),
+            "messages_deleted": messages_deleted,
+            "conversations_deleted": conversations_deleted,
+            "batches": message_batches + conversation_batches,
+            "duration_ms": round((time.perf_counter() - policy_start) * 1000, 1),
+        })
+
+    report = {
+        "messages_deleted": sum(r["messages_deleted"] for r in reports),
+        "conversations_deleted": sum(r["conversations_deleted"] for r in reports),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        "policies": reports,
+    }
+
+    logger.info(
+        f"retention purge: {report['messages_deleted']} messages, "
+        f"{report['conversations_deleted']} conversations, {report['duration_ms']:.0f}ms",
+        extra={"extra_data": report},
+    )
+    return report
+
+
+async def purge_if_leader(redis: Redis) -> dict | None:
+    """
+    이번 주기의 락을 잡으면 정리 실행 (다른 워커가 이미 잡았으면 None)
+
+    락은 해제하지 않고 주기만큼 유지 — 워커 수와 관계없이 주기당 1회,
+    정리 중인 워커가 죽어도 다음 주기에는 다른 워커가 이어받음
+    """
+    acquired = await redis.set(
+        RETENTION_LOCK_KEY, f"{socket.gethostname()}:{os.getpid()}",
+        nx=True, ex=settings.retention_interval_seconds,
+    )
+    if not acquired:
+        return None
+    async with async_session() as db:
+        return await purge_expired(db)
+
+
+async def retention_worker(redis: Redis) -> None:
+    """
+    주기적 정리 작업 (main.py lifespan에서 백그라운드 태스크로 실행)
+    한 번 실패해도 다음 주기에 다시 시도
+    """
+    while True:
+        try:
+            await purge_if_leader(redis)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"retention purge 실패: {e}")
+
+        await asyncio.sleep(settings.retention_interval_seconds)
@@ -12,6 +12,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 from sqlalchemy.pool import NullPool
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from core.database import get_db
 from core.config import settings
 from core.security import create_access_token
@@ -29,7 +30,7 @@ async def override_get_db():
             await session.close()
 
 # ===== 테스트 전용 앱 (미들웨어 없이) =====
-test_app = FastAPI()
+test_app = FastAPI(default_response_class=ORJSONResponse)
 test_app.include_router(auth.router, prefix="/api/auth", tags=["Auth"])
 test_app.include_router(chat.router, prefix="/api/chat", tags=["Chat"])
 test_app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
@@ -55,6 +56,13 @@ def client():
         yield c
 
 
+@pytest.fixture
+async def db():
+    """테스트 DB 세션 (리포지토리/서비스 직접 호출용)"""
+    async with test_session_factory() as session:
+        yield session
+
+
 @pytest.fixture
 def auth_headers(client):
     """인증된 헤더 — 회원가입 후 JWT 직접 생성"""
@@ -0,0 +1,65 @@
+"""
+Agent 계측 콜백 테스트
+"""
+import uuid
+from typing import TypedDict
+
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.messages import AIMessage
+from langgraph.graph import StateGraph, START, END
+
+from agent.callbacks import GraphTimingCallback
+from core.metrics import metrics_store
+
+
+class _State(TypedDict):
+    query: str
+    response: str
+
+
+async def test_노드_실행시간_및_Server_Timing():
+    async def first(state):
+        return {"response": "a"}
+
+    async def second(state):
+        return {"response": state["response"] + "b"}
+
+    graph = StateGraph(_State)
+    graph.add_node("first", first)
+    graph.add_node("second", second)
+    graph.add_edge(START, "first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+
+    timing = GraphTimingCallback()
+    await graph.compile().ainvoke({"query": "q", "response": ""}, config={"callbacks": [timing]})
+
+    # __start__ 같은 내부 실행 단위는 제외하고 노드만 기록
+    assert [name for name, _ in timing.node_timings] == ["first", "second"]
+    header = timing.server_timing()
+    assert header.startswith("first;dur=")
+    assert "graph;dur=" in header
+
+
+def test_Ollama_메타데이터_처리량_기록():
+    timing = GraphTimingCallback()
+    run_id = uuid.uuid4()
+    timing.on_chat_model_start({}, [[]], run_id=run_id,
+                               metadata={"langgraph_node": "classifier", "ls_model_name": "test-model"})
+    timing.on_llm_new_token("안", run_id=run_id)
+    # Ollama는 duration을 나노초로 반환
+    generation = ChatGeneration(message=AIMessage(content="안녕"), generation_info={
+        "prompt_eval_count": 100, "prompt_eval_duration": 50_000_000,
+        "eval_count": 20, "eval_duration": 400_000_000,
+    })
+    timing.on_llm_end(LLMResult(generations=[[generation]]), run_id=run_id)
+
+    call = timing.llm_calls[0]
+    assert call["node"] == "classifier"
+    assert call["ttft_ms"] is not None
+    assert call["eval_ms"] == 400.0
+
+    timing.flush(intent="general", model="test-model")
+    throughput = metrics_store.agent_summary()["llm_throughput"]["test-model"]
+    assert throughput["eval_tokens_per_sec"] == 50.0           # 20 tokens / 0.4s
+    assert throughput["prompt_tokens_per_sec"] == 2000.0       # 100 tokens / 0.05s
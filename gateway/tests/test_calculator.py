@@ -0,0 +1,84 @@
+"""
+계산기 엔진 테스트 (AST 화이트리스트 / 크기 사전 검사 / 프로세스 풀 시간 제한)
+"""
+import time
+
+import pytest
+
+from agent.calculator import CalculatorError, CalculatorPool, compile_expression, evaluate_sync
+from agent.tool import calculate
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("2 + 3 * 4", 14),
+    ("2 ** 10", 1024),
+    ("sqrt(144)", 12.0),
+    ("-7 // 2", -4),
+    ("max([1, 5, 3]) + min(4, 2)", 7),
+    ("pow(2, 100, 7)", 2),
+    ("round(pi, 2)", 3.14),
+    ("factorial(20)", 2432902008176640000),
+    ("factorial(floor(log(100)))", 24),
+    ("round(1e300) // 10**299", 10),
+])
+def test_허용된_식_계산(expression, expected):
+    assert evaluate_sync(expression) == expected
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('ls')",
+    "(1).__class__.__bases__",
+    "lambda: 1",
+    "[x for x in range(10)]",
+    "open('/etc/passwd')",
+    "x + 1",
+    "'a' * 10",
+    "1 << 100",
+    "abs(x=1)",
+])
+def test_허용되지_않는_구문_거부(expression):
+    with pytest.raises(CalculatorError):
+        compile_expression(expression)
+
+
+@pytest.mark.parametrize("expression", [
+    "9**9**9",
+    "factorial(10**6)",
+    "10**10**10",
+    "(2**5000) * (2**5000) * (2**5000)",
+    "pow(factorial(100), 10**6)",
+    # 실수 인자가 섞여 실수로 잘못 판정되던 경우 (정수 거듭제곱으로 실행됨)
+    "max(2**9000, 0.5) ** max(2**9000, 0.5)",
+    "round(1e300) ** round(1e300)",
+    "pow(max(3, 0.5), max(10**200, 0.5))",
+    "max([2**9000, 0.5]) ** 2**100",
+])
+def test_거대한_계산은_실행_전에_즉시_거부(expression):
+    started = time.perf_counter()
+    with pytest.raises(CalculatorError, match="너무"):
+        compile_expression(expression)
+    assert time.perf_counter() - started < 0.05
+
+
+async def test_도구는_오류를_문자열로_반환():
+    assert await calculate.ainvoke({"expression": "2 ** 10"}) == "계산 결과: 2 ** 10 = 1024"
+    assert "계산할 수 없는 식" in await calculate.ainvoke({"expression": "9**9**9"})
+    assert "0으로 나눌 수 없습니다" in await calculate.ainvoke({"expression": "1 / 0"})
+
+
+async def test_프로세스_풀_실행과_시간_초과시_재시작():
+    pool = CalculatorPool(processes=1, timeout_seconds=10)
+    pool.start()
+    try:
+        assert await pool.evaluate("3 ** 4") == 81
+        with pytest.raises(ZeroDivisionError):
+            await pool.evaluate("1 % 0")
+
+        # 시간 초과 → 풀 강제 종료 후 재생성, 이후 요청은 정상 처리
+        pool.timeout_seconds = 0
+        with pytest.raises(CalculatorError, match="시간"):
+            await pool.evaluate("2 ** 64")
+        pool.timeout_seconds = 10
+        assert await pool.evaluate("2 ** 64") == 18446744073709551616
+    finally:
+        pool.close()
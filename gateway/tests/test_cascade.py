@@ -0,0 +1,220 @@
+"""
+모델 캐스케이드 테스트 (경량 모델 검증 / 승격 / 절약량 집계)
+"""
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+
+from agent import cascade
+from agent.graph import output_quality_router
+from agent.model_router import ModelRouter
+from agent.nodes.output_guard import output_guard_node, verify_answer
+from agent.retry_policy import retry_policy_node, retry_router
+from agent.state import AgentState
+from agent.stream_guard import CascadeHoldback
+from core.config import settings
+from core.metrics import MetricsStore, metrics_store
+
+
+def _entry(step: str, model: str, tokens: int, duration_ms: float) -> dict:
+    return {
+        "step": step, "model": model, "attempt": 0,
+        "prompt_tokens": tokens, "completion_tokens": 0, "duration_ms": duration_ms,
+    }
+
+
+def _state(intent: str, response: str, **extra) -> dict:
+    state = {
+        "query": "질문", "intent": intent, "model": settings.model_simple, "retry_count": 0,
+        "response": response, "search_results": [], "cascade_stage": "small", "deadline": 0,
+        "cost_ledger": [
+            _entry("classifier", settings.model_simple, 50, 100.0),
+            _entry("llm_node", settings.model_simple, 300, 800.0),
+        ],
+    }
+    state.update(extra)
+    return state
+
+
+def test_검증_점수():
+    good = "서울은 대한민국의 수도이며 정치, 경제, 문화의 중심지입니다. " * 5
+    assert verify_answer({"intent": "search", "response": good}) == 1.0
+    # 길이 비율
+    assert verify_answer({"intent": "analysis", "response": "가" * 200}) == 0.5
+    # 짧은 거절성 응답
+    assert verify_answer({"intent": "search", "response": "죄송합니다. " + "가" * 140}) < 0.4
+    # 확신 없는 표현
+    assert verify_answer({"intent": "search", "response": good + " 아마도 추측입니다."}) == 0.7
+    # 한자가 섞인 답변
+    assert verify_answer({"intent": "search", "response": good + "首都" * 20}) == 0.5
+    assert verify_answer({"intent": "search", "response": ""}) == 0.0
+
+
+async def test_점수가_기준_미만이면_큰_모델로_승격():
+    before = metrics_store.cascade["creative"]["escalated"]
+    state = _state("creative", "짧은 시 한 줄입니다.")      # 재시도 판정은 아니지만 점수 미달
+    verdict = await output_guard_node(state)
+    assert verdict["output_quality"] == "escalate"
+    assert verdict["retry_count"] == 0                     # 재시도 횟수와 별개
+    assert output_quality_router(verdict) == "retry_policy"
+    assert metrics_store.cascade["creative"]["escalated"] == before + 1
+
+    retry_before = dict(metrics_store.retry_actions)
+    update = await retry_policy_node({**state, **verdict})
+    assert update["model"] == settings.model_complex
+    assert update["cascade_stage"] == "escalated"
+    assert update["response"] == "" and update["retry_hint"] == ""
+    assert retry_router({**state, **verdict, **update}) == "creative_agent"
+    assert dict(metrics_store.retry_actions) == retry_before
+
+
+async def test_승격된_큰_모델은_거절된_답변_없이_대화를_받음():
+    seen = []
+
+    async def small_model(state):
+        return {"messages": [AIMessage(content="짧은 시 한 줄입니다.")], "response": "짧은 시 한 줄입니다."}
+
+    async def large_model(state):
+        seen.append((state["model"], [m.content for m in state["messages"]]))
+        return {"messages": [AIMessage(content="큰 모델의 시")], "response": "큰 모델의 시"}
+
+    builder = StateGraph(AgentState)
+    builder.add_node("small", small_model)
+    builder.add_node("output_guard", output_guard_node)
+    builder.add_node("retry_policy", retry_policy_node)
+    builder.add_node("large", large_model)
+    builder.add_edge(START, "small")
+    builder.add_edge("small", "output_guard")
+    builder.add_edge("output_guard", "retry_policy")
+    builder.add_edge("retry_policy", "large")
+    builder.add_edge("large", END)
+
+    state = _state("creative", "", messages=[HumanMessage(content="이전 질문"), AIMessage(content="이전 답변"),
+                                              HumanMessage(content="시를 써줘")])
+    final = await builder.compile().ainvoke(state)
+
+    assert seen == [(settings.model_complex, ["이전 질문", "이전 답변", "시를 써줘"])]
+    assert [m.content for m in final["messages"]][-2:] == ["시를 써줘", "큰 모델의 시"]
+
+
+LARGE_ANSWER = "큰 모델이 쓴 긴 시입니다. " * 10
+
+
+def _streaming_graph(small_answer: str):
+    """classifier → creative_agent(모델별 가짜 스트리밍 응답) → output_guard → (승격) retry_policy → creative_agent"""
+
+    async def classifier(state):
+        return {"intent": "creative", "model": settings.model_simple, "cascade_stage": "small"}
+
+    async def creative_agent(state):
+        answer = LARGE_ANSWER if state["model"] == settings.model_complex else small_answer
+        message = await GenericFakeChatModel(messages=iter([answer])).ainvoke(state["messages"])
+        return {"messages": [message], "response": message.content}
+
+    builder = StateGraph(AgentState)
+    builder.add_node("classifier", classifier)
+    builder.add_node("creative_agent", creative_agent)
+    builder.add_node("output_guard", output_guard_node)
+    builder.add_node("retry_policy", retry_policy_node)
+    builder.add_edge(START, "classifier")
+    builder.add_edge("classifier", "creative_agent")
+    builder.add_edge("creative_agent", "output_guard")
+    builder.add_conditional_edges(
+        "output_guard", lambda state: "retry_policy" if state["output_quality"] == "escalate" else END,
+    )
+    builder.add_edge("retry_policy", "creative_agent")
+    return builder.compile()
+
+
+async def _client_stream(graph, state) -> str:
+    """/api/chat/stream과 같은 방식으로 이벤트를 걸러 클라이언트가 받는 본문"""
+    holdback = CascadeHoldback()
+    parts = []
+    async for event in graph.astream_events(state, version="v2"):
+        kind, name = event["event"], event.get("name")
+        if kind == "on_chain_end" and name == "classifier":
+            holdback.classified(event["data"]["output"].get("cascade_stage"))
+        if kind == "on_chat_model_stream":
+            parts.append(holdback.token(event["metadata"].get("langgraph_node"), event["data"]["chunk"].content))
+        if kind == "on_chain_end" and name == "output_guard":
+            parts.append(holdback.judged(event["data"]["output"].get("output_quality")))
+    return "".join(parts)
+
+
+async def test_스트리밍은_승격되면_경량_모델_응답을_보내지_않음():
+    state = _state("creative", "", messages=[HumanMessage(content="시를 써줘")])
+    assert await _client_stream(_streaming_graph("짧은 시 한 줄입니다."), state) == LARGE_ANSWER
+
+    # 경량 모델 응답이 통과하면 판정 뒤 보류분을 그대로 전송
+    kept = "경량 모델이 쓴 충분히 긴 시입니다. " * 10
+    assert await _client_stream(_streaming_graph(kept), state) == kept
+
+
+async def test_승격_모델도_적응형_라우팅으로_선택(monkeypatch):
+    router = ModelRouter()
+    monkeypatch.setattr(cascade, "model_router", router)
+    monkeypatch.setattr(settings, "model_routing_enabled", True)
+    monkeypatch.setattr(settings, "model_routing_fallbacks", {"creative": [settings.model_simple]})
+    monkeypatch.setattr(settings, "model_max_in_flight", {settings.model_complex: 1})
+    state = _state("creative", "짧은 시 한 줄입니다.")
+
+    # 큰 모델이 건강하면 라우터가 고른 모델로 승격
+    verdict = await output_guard_node(state)
+    assert verdict["output_quality"] == "escalate" and verdict["model"] == settings.model_complex
+    update = await retry_policy_node({**state, **verdict})
+    assert update["model"] == settings.model_complex
+
+    # 큰 모델이 포화 → 라우터가 경량 모델을 고르므로 승격하지 않고 경량 모델 응답 유지
+    router.started(object(), settings.model_complex)
+    kept_before = metrics_store.cascade["creative"]["kept"]
+    verdict = await output_guard_node(state)
+    assert verdict["output_quality"] == "pass"
+    assert metrics_store.cascade["creative"]["kept"] == kept_before + 1
+    # 재시도 판정이면 승격 대신 일반 재시도
+    assert (await output_guard_node(_state("creative", "")))["output_quality"] == "retry"
+
+
+async def test_재시도_판정도_승격으로_대체():
+    verdict = await output_guard_node(_state("search", ""))
+    assert verdict["output_quality"] == "escalate"
+    assert verdict["failure_reason"] == "empty"
+
+
+async def test_충분한_답변은_경량_모델_유지():
+    before = metrics_store.cascade["search"]["kept"]
+    verdict = await output_guard_node(_state("search", "환율 정보입니다. " * 20))
+    assert verdict["output_quality"] == "pass"
+    assert metrics_store.cascade["search"]["kept"] == before + 1
+
+    # 승격 후 통과한 큰 모델 응답 비용 기록
+    large_before = metrics_store.cascade["search"]["large_tokens"]
+    state = _state(
+        "search", "환율 정보입니다. " * 20, cascade_stage="escalated", model=settings.model_complex,
+        cost_ledger=[_entry("result_synthesizer", settings.model_complex, 900, 3000.0)],
+    )
+    assert (await output_guard_node(state))["output_quality"] == "pass"
+    assert metrics_store.cascade["search"]["large_tokens"] == large_before + 900
+
+
+async def test_마감_임박이면_승격하지_않음():
+    verdict = await output_guard_node(_state("analysis", "짧은 답변입니다.", deadline=1.0))
+    assert verdict["output_quality"] == "pass"
+
+
+def test_절약량_집계와_병합():
+    store = MetricsStore()
+    for _ in range(3):
+        store.record_cascade("search", "kept", 800.0, 300)
+    store.record_cascade("search", "escalated", 700.0, 250)
+    store.record_cascade("search", "large", 3000.0, 900)
+
+    summary = store.summary()["cascade"]["search"]
+    assert summary["escalation_rate"] == 0.25
+    # 전부 큰 모델이었다면 4 × 3000ms, 실제로는 3×800 + 700 + 3000
+    assert summary["latency_saved_ms"] == 12000 - 6100
+    assert summary["large_tokens_avoided"] == 2700
+    assert summary["small_tokens_wasted"] == 250
+
+    merged = MetricsStore.from_counters(store.to_counters())
+    assert merged.summary()["cascade"] == store.summary()["cascade"]
+    assert 'gateway_cascade_answers_total{intent="search",outcome="escalated"} 1' in store.render_prometheus()
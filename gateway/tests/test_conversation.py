@@ -1,6 +1,18 @@
 """
 대화 관리 API 테스트
 """
+import gzip
+import json
+import uuid
+from datetime import datetime, timezone
+
+from service import conversation_service
+from service.conversation_service import iter_export_ndjson
+
+
+async def _rows(items):
+    for item in items:
+        yield item
 
 
 def test_대화_생성(client, auth_headers):
@@ -49,3 +61,63 @@ def test_대화_상세_및_삭제(client, auth_headers):
 def test_인증_없이_접근_차단(client):
     response = client.get("/api/conversations/")
     assert response.status_code in [401, 403]
+
+
+def test_메시지_검색(client, auth_headers):
+    response = client.get(
+        "/api/conversations/search",
+        params={"q": "존재하지않는검색어", "limit": 5},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["results"] == []
+    assert data["has_more"] is False
+    assert data["limit"] == 5
+
+    # 검색어 누락 시 422
+    missing = client.get("/api/conversations/search", headers=auth_headers)
+    assert missing.status_code == 422
+
+
+def test_대화_내보내기(client, auth_headers):
+    client.post("/api/conversations/", json={"title": "내보내기"}, headers=auth_headers)
+
+    response = client.get("/api/conversations/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert any(line["type"] == "conversation" and line["title"] == "내보내기" for line in lines)
+
+
+async def test_메시지_저장_재시도는_한_번만_저장(client, auth_headers):
+    conv_id = client.post("/api/conversations/", json={"title": "재시도"}, headers=auth_headers).json()["id"]
+    message_id = str(uuid.uuid4())
+
+    # 커밋 후 응답을 받지 못해 후처리 큐가 다시 실행한 경우 / 완료 저장 후 중단 저장
+    await conversation_service.save_message(message_id, conv_id, "assistant", "답변")
+    await conversation_service.save_message(message_id, conv_id, "assistant", "답", truncated=True)
+
+    messages = client.get(f"/api/conversations/{conv_id}", headers=auth_headers).json()["messages"]
+    assert [(m["content"], m["truncated"]) for m in messages] == [("답변", False)]
+
+
+async def test_NDJSON_변환_및_gzip():
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"conversation_id": "c1", "title": "첫 대화", "conversation_created_at": now,
+         "message_id": "m1", "role": "user", "content": "안녕", "message_created_at": now},
+        {"conversation_id": "c1", "title": "첫 대화", "conversation_created_at": now,
+         "message_id": "m2", "role": "assistant", "content": "반가워요", "message_created_at": now},
+        # 메시지 없는 대화 (outer join)
+        {"conversation_id": "c2", "title": "빈 대화", "conversation_created_at": now,
+         "message_id": None, "role": None, "content": None, "message_created_at": None},
+    ]
+
+    plain = b"".join([c async for c in iter_export_ndjson(_rows(rows))])
+    lines = [json.loads(line) for line in plain.decode("utf-8").splitlines()]
+    assert [line["type"] for line in lines] == ["conversation", "message", "message", "conversation"]
+    assert lines[2]["content"] == "반가워요"
+
+    compressed = b"".join([c async for c in iter_export_ndjson(_rows(rows), compress=True)])
+    assert gzip.decompress(compressed) == plain
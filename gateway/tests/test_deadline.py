@@ -0,0 +1,93 @@
+"""
+요청 마감 시간 테스트 (마감 시간 계산 / 저비용 전략 / 부분 답변)
+
+마감 시간이 이미 지난 state는 LLM을 호출하지 않으므로 Ollama 없이 그래프 전체 실행 가능
+"""
+import asyncio
+import time
+
+import pytest
+
+from agent.deadline import (
+    DeadlineExceeded, is_short, make_deadline, partial_answer, remaining, request_timeout_seconds, run_within,
+)
+from agent.graph import agent
+from agent.nodes.fallback_node import fallback_node
+from agent.nodes.output_guard import output_guard_node
+from agent.subgraphs.analysis_subgraph import decomposer_node
+from core.config import settings
+
+
+def _state(deadline: float, **extra) -> dict:
+    state = {
+        "messages": [{"role": "user", "content": "AI 규제 동향을 비교 분석해줘"}],
+        "query": "AI 규제 동향을 비교 분석해줘",
+        "intent": "general", "confidence": 0.0, "complexity": "", "model": settings.model_complex,
+        "is_blocked": False, "block_reason": "",
+        "output_quality": "pass", "retry_count": 0,
+        "sub_queries": [], "search_results": [],
+        "response": "", "prompt_tokens": 0, "completion_tokens": 0,
+        "deadline": deadline, "deadline_exceeded": False,
+    }
+    state.update(extra)
+    return state
+
+
+def test_역할별_마감_시간과_헤더():
+    assert request_timeout_seconds("user") == settings.request_deadline_seconds_by_role["user"]
+    assert request_timeout_seconds("user", 5) == 5
+    # 헤더로 역할 상한보다 늘릴 수 없음
+    assert request_timeout_seconds("user", 10_000) == settings.request_deadline_seconds_by_role["user"]
+    assert request_timeout_seconds("unknown") == settings.request_deadline_default_seconds
+
+    assert remaining({}) == float("inf") and not is_short({})
+    assert is_short({"deadline": make_deadline(settings.deadline_low_seconds / 2)})
+    assert not is_short({"deadline": make_deadline(settings.deadline_low_seconds * 2)})
+
+
+async def test_남은_시간을_넘는_작업은_취소():
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        await run_within({"deadline": make_deadline(0.05)}, slow())
+    assert time.perf_counter() - start < 1
+    assert cancelled.is_set()
+
+    assert await run_within({}, asyncio.sleep(0, result="ok")) == "ok"
+
+
+async def test_시간이_부족하면_분해와_재시도_생략():
+    short = _state(make_deadline(1))
+
+    assert await decomposer_node(short) == {"sub_queries": [short["query"]]}
+    assert (await output_guard_node({**short, "response": "짧"}))["output_quality"] == "pass"
+    assert (await output_guard_node(short))["output_quality"] == "fallback"
+    # 시간이 충분하면 기존대로 재시도
+    assert (await output_guard_node(_state(make_deadline(60))))["output_quality"] == "retry"
+
+
+async def test_마감_초과_시_수집한_결과를_부분_답변으로():
+    state = _state(make_deadline(-1), search_results=["[분석 1: 미국]\n행정명령 중심", "[분석 2: EU]\nAI Act 시행"])
+
+    answer = partial_answer(state)
+    assert "시간 제한" in answer and "AI Act" in answer
+    assert (await fallback_node(state))["response"] == answer
+    assert partial_answer({**state, "response": "완성된 답변"}) == "완성된 답변"
+
+
+async def test_마감_시간이_지난_요청은_LLM_호출_없이_종료():
+    start = time.perf_counter()
+    final_state = await agent.ainvoke(_state(make_deadline(-1)))
+
+    assert time.perf_counter() - start < 1
+    assert final_state["deadline_exceeded"] is True
+    assert final_state["model"] == settings.model_simple
+    assert final_state["response"]           # fallback 안내 메시지
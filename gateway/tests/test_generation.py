@@ -0,0 +1,136 @@
+"""
+재개 가능한 SSE 생성 테스트 (Redis Streams 버퍼 / Last-Event-ID / 유예 시간)
+
+로컬 Redis가 없으면 skip
+"""
+import asyncio
+import json
+import uuid
+
+import pytest
+import redis.asyncio as airedis
+
+from core.config import settings
+from core.serialization import sse_data
+from core.sse import SSEWriter
+from service import generation_service
+
+
+@pytest.fixture
+async def redis_bin():
+    client = airedis.from_url(settings.redis_url, socket_connect_timeout=1)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis에 연결할 수 없음")
+    yield client
+    await client.aclose()
+
+
+def _frames(chunks: list[bytes]) -> list[tuple[int, dict]]:
+    events = []
+    for block in b"".join(chunks).split(b"\n\n"):
+        if block and not block.startswith(b":"):
+            fields = dict(line.split(b": ", 1) for line in block.split(b"\n"))
+            events.append((int(fields[b"id"]), json.loads(fields[b"data"])))
+    return events
+
+
+async def _tokens(words: list[str]):
+    for word in words:
+        await asyncio.sleep(0.02)
+        yield word
+    yield sse_data({"token": "[DONE]"})
+
+
+async def test_끊긴_스트림_Last_Event_ID로_이어받기(redis_bin, monkeypatch):
+    monkeypatch.setattr(settings, "sse_heartbeat_seconds", 0.2)
+    words = [f"단어{i} " for i in range(10)]
+    generation_id = str(uuid.uuid4())
+    await generation_service.start_generation(
+        redis_bin, generation_id, user_id="u1", conversation_id="c1",
+        writer=SSEWriter("/test", window_ms=1, max_bytes=1024, heartbeat_seconds=60),
+        source=_tokens(words),
+    )
+
+    # 첫 연결: 프레임 3개만 받고 끊김
+    first = []
+    stream = generation_service.tail_generation(redis_bin, generation_id)
+    async for chunk in stream:
+        if not chunk.startswith(b":"):
+            first.append(chunk)
+        if len(first) == 3:
+            break
+    await stream.aclose()
+    last_id = _frames(first)[-1][0]
+
+    # 재연결: 이후 프레임만 재생 + 실시간 tail, 종료 표시에서 끝남
+    rest = [
+        chunk async for chunk in generation_service.tail_generation(redis_bin, generation_id, last_id)
+        if not chunk.startswith(b":")
+    ]
+
+    events = _frames(first) + _frames(rest)
+    ids = [event_id for event_id, _ in events]
+    assert ids == sorted(set(ids))                      # 중복/역순 없음
+    text = "".join(data["token"] for _, data in events if data["token"] != "[DONE]")
+    assert text == "".join(words)
+    assert events[-1][1] == {"token": "[DONE]"}
+
+    meta = await generation_service.get_generation_meta(redis_bin, generation_id)
+    assert meta == {"user_id": "u1", "conversation_id": "c1", "status": "done"}
+
+
+async def test_한_청크의_프레임도_id별로_이어받기(redis_bin):
+    async def source():
+        yield "대기 중인 토큰"                           # 병합 창 안에서 상태 프레임이 와서 한 청크로 묶임
+        yield sse_data({"status": "검색 중"})
+        yield sse_data({"token": "[DONE]"})
+
+    generation_id = str(uuid.uuid4())
+    await generation_service.start_generation(
+        redis_bin, generation_id, user_id="u1", conversation_id="c1",
+        writer=SSEWriter("/test", window_ms=10_000, max_bytes=1024, heartbeat_seconds=60),
+        source=source(),
+    )
+    events = _frames([chunk async for chunk in generation_service.tail_generation(redis_bin, generation_id)])
+    assert events[0] == (1, {"token": "대기 중인 토큰"})
+
+    # 청크 안의 첫 프레임 id로 재연결 → 그 프레임은 다시 오지 않음
+    rest = _frames([chunk async for chunk in generation_service.tail_generation(redis_bin, generation_id, 1)])
+    assert rest == events[1:]
+    assert rest[0] == (2, {"status": "검색 중"})
+
+
+async def test_유예_시간_동안_구독자_없으면_생성_취소(redis_bin, monkeypatch):
+    monkeypatch.setattr(settings, "sse_resume_grace_seconds", 0.2)
+    cancelled = asyncio.Event()
+
+    async def endless():
+        try:
+            while True:
+                await asyncio.sleep(0.01)
+                yield "토큰"
+        except (asyncio.CancelledError, GeneratorExit):
+            cancelled.set()
+            raise
+
+    generation_id = str(uuid.uuid4())
+    await generation_service.start_generation(
+        redis_bin, generation_id, user_id="u1", conversation_id="c1",
+        writer=SSEWriter("/test", window_ms=5, heartbeat_seconds=60),
+        source=endless(),
+    )
+
+    await asyncio.wait_for(cancelled.wait(), timeout=2)
+    for _ in range(50):
+        meta = await generation_service.get_generation_meta(redis_bin, generation_id)
+        if meta["status"] != "running":
+            break
+        await asyncio.sleep(0.02)
+    assert meta["status"] == "cancelled"
+
+    # 취소 후 재연결하면 버퍼에 남은 프레임을 재생하고 종료 표시에서 끝남
+    replay = [c async for c in generation_service.tail_generation(redis_bin, generation_id)]
+    assert replay and all(b'"token"' in c for c in replay)
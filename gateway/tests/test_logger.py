@@ -0,0 +1,60 @@
+"""
+로깅 파이프라인 테스트 (샘플링 / 큐 오버플로 / JSON 포맷)
+"""
+import json
+import logging
+import queue
+
+from core.logger import (
+    DroppingQueueHandler, JsonFormatter, SamplingFilter, request_id_var,
+)
+
+
+def _record(level=logging.INFO, msg="hello", extra_data=None) -> logging.LogRecord:
+    record = logging.LogRecord("test", level, __file__, 0, msg, None, None)
+    if extra_data is not None:
+        record.extra_data = extra_data
+    return record
+
+
+def test_샘플링_에러는_항상_기록():
+    f = SamplingFilter({"/health": 0.0}, default_rate=0.0)
+
+    assert f.filter(_record(level=logging.ERROR))
+    assert f.filter(_record(extra_data={"path": "/health", "status": 500}))
+    assert f.filter(_record(extra_data={"path": "/api/chat/", "status": 429}))
+    assert f.sampled_out == 0
+
+
+def test_샘플링_경로별_비율():
+    f = SamplingFilter({"/health": 0.0}, default_rate=1.0)
+
+    assert not f.filter(_record(extra_data={"path": "/health", "status": 200}))
+    assert f.filter(_record(extra_data={"path": "/api/conversations/", "status": 200}))
+    assert f.filter(_record())     # extra_data 없는 일반 로그는 기본 비율
+    assert f.sampled_out == 1
+
+
+def test_큐_오버플로시_버리고_집계():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(_record())
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_request_id는_호출_시점에_캡처():
+    handler = DroppingQueueHandler(queue.Queue())
+    token = request_id_var.set("req-1234")
+    try:
+        handler.handle(_record(msg="로그인 성공", extra_data={"status": 200}))
+    finally:
+        request_id_var.reset(token)
+
+    # 리스너 스레드에서 포맷해도 원래 요청의 request_id가 유지되어야 함
+    line = JsonFormatter().format(handler.queue.get_nowait())
+    data = json.loads(line)
+    assert data["request_id"] == "req-1234"
+    assert data["status"] == 200
+    assert "로그인 성공" in line     # 한글은 escape 없이 그대로
@@ -1,6 +1,13 @@
 """
 메트릭 & 헬스체크 테스트
 """
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.testclient import TestClient
+
+from core.metrics import LatencyHistogram, MetricsStore, RequestMetricsMiddleware, metrics_store
 
 
 def test_헬스체크(client):
@@ -17,3 +24,117 @@ def test_메트릭_조회(client):
     assert "avg_response_time_ms" in data
     assert "by_status" in data
     assert "slowest_top5" in data
+
+
+# ===== MetricsStore 단위 테스트 =====
+
+def test_히스토그램_분위수():
+    hist = LatencyHistogram()
+    for ms in range(1, 1001):      # 1ms ~ 1000ms 균등 분포
+        hist.record(float(ms))
+
+    assert hist.count == 1000
+    # 로그 버킷 상대 오차(약 9%) 이내
+    assert abs(hist.percentile(0.50) - 500) / 500 < 0.1
+    assert abs(hist.percentile(0.99) - 990) / 990 < 0.1
+    # 최댓값을 넘는 추정값은 나오지 않음
+    assert hist.percentile(1.0) == 1000
+
+
+def test_느린_요청_TopK():
+    store = MetricsStore()
+    for i, ms in enumerate([5, 50, 1, 300, 20, 7, 100, 2]):
+        store.record("GET", f"/p{i}", 200, float(ms))
+
+    top = [s["duration_ms"] for s in store.slowest]
+    assert top == [300, 100, 50, 20, 7]
+
+
+def test_라우트_상태코드별_집계_및_프로메테우스():
+    store = MetricsStore()
+    store.record("GET", "/health", 200, 3.0)
+    store.record("GET", "/health", 200, 5.0)
+    store.record("POST", "/api/chat/", 500, 1500.0)
+
+    summary = store.summary()
+    assert summary["latency_by_route"]["GET /health 2xx"]["count"] == 2
+    assert summary["latency_by_route"]["POST /api/chat/ 5xx"]["max"] == 1500.0
+    assert "p99" in summary["percentiles_ms"]
+
+    text = store.render_prometheus()
+    assert '# TYPE gateway_http_request_duration_seconds histogram' in text
+    assert 'gateway_http_request_duration_seconds_count{method="GET",route="/health",status_class="2xx"} 2' in text
+    assert 'le="+Inf"} 1' in text
+
+
+# ===== RequestMetricsMiddleware (순수 ASGI) =====
+
+def _middleware_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/mw/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/mw/stream")
+    async def stream():
+        async def gen():
+            for i in range(3):
+                await asyncio.sleep(0.05)
+                yield f"data: {i}\n\n"
+        return StreamingResponse(gen(), media_type="text/event-stream")
+
+    @app.get("/mw/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+
+def test_미들웨어_요청ID_및_바이트_기록():
+    with TestClient(_middleware_app()) as c:
+        response = c.get("/mw/ping")
+
+    assert response.status_code == 200
+    assert len(response.headers["X-Request-ID"]) == 8
+    assert metrics_store.response_bytes["GET /mw/ping"] >= len(response.content)
+
+
+def test_미들웨어_스트림_전체_시간_기록():
+    with TestClient(_middleware_app()) as c:
+        response = c.get("/mw/stream")
+
+    assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+    # 헤더 시점이 아니라 마지막 청크까지의 시간 (3 × 50ms)
+    hist = metrics_store.latency[("GET", "/mw/stream", "2xx")]
+    assert hist.max >= 150
+    assert metrics_store.stream_ttfb[("GET", "/mw/stream")].count >= 1
+    assert metrics_store.response_bytes["GET /mw/stream"] >= len(response.content)
+    # 스트림은 느린 요청 Top K에서 제외
+    assert all(s["path"] != "/mw/stream" for s in metrics_store.slowest)
+
+
+def test_미들웨어_처리되지_않은_예외는_500으로_기록():
+    before = metrics_store.latency[("GET", "/mw/boom", "5xx")].count
+    with TestClient(_middleware_app(), raise_server_exceptions=False) as c:
+        response = c.get("/mw/boom")
+
+    assert response.status_code == 500
+    assert metrics_store.latency[("GET", "/mw/boom", "5xx")].count == before + 1
+
+
+def test_중단된_생성_절약_토큰_추정():
+    store = MetricsStore()
+    # 모델 평균 생성 토큰: (300 + 500) / 2 = 400
+    for eval_tokens in (300, 500):
+        store.record_llm_call("general_agent", "qwen2.5:7b", "general", 1000.0, 100.0, 50, 10.0, eval_tokens, 900.0)
+
+    assert store.record_abandoned_generation("qwen2.5:7b", 120) == 280
+    assert store.record_abandoned_generation("qwen2.5:7b", 900) == 0      # 평균보다 길게 생성된 경우
+    assert store.record_abandoned_generation("", 10) == 0                  # 분류 전 중단 (모델 미정)
+
+    summary = store.summary()["abandoned_generations"]
+    assert summary["qwen2.5:7b"] == {"generations": 2, "tokens_generated": 1020, "tokens_saved": 280}
+    assert summary["unknown"]["generations"] == 1
+    assert 'gateway_abandoned_tokens_saved_total{model="qwen2.5:7b"} 280' in store.render_prometheus()
@@ -0,0 +1,146 @@
+"""
+멀티 워커 메트릭 집계 테스트
+
+여러 프로세스가 각자 MetricsStore에 기록한 값이 하나의 뷰로 정확히 합쳐지는지 검증
+"""
+import asyncio
+import multiprocessing
+import uuid
+
+import pytest
+import redis.asyncio as airedis
+
+from core.config import settings
+from core.metrics import MetricsStore
+from core.metrics_sync import RedisMetricsSync
+
+WORKERS = 3
+REQUESTS_PER_WORKER = 200
+
+
+def _record_requests(store: MetricsStore, worker: int) -> None:
+    for i in range(REQUESTS_PER_WORKER):
+        status = 500 if i % 50 == 0 else 200
+        store.record("GET", "/health", status, float(worker * 100 + i % 10 + 1))
+
+
+def _local_worker(worker: int, queue) -> None:
+    store = MetricsStore()
+    _record_requests(store, worker)
+    queue.put((store.to_counters(), store.maxima()))
+
+
+def _redis_worker(worker: int, prefix: str) -> None:
+    async def run():
+        client = airedis.from_url(settings.redis_url, decode_responses=True)
+        store = MetricsStore()
+        sync = RedisMetricsSync(store, client, prefix=prefix)
+        # 두 번에 나눠 플러시 → 두 번째는 증가분만 반영되어야 함
+        _record_requests(store, worker)
+        await sync.flush()
+        store.record("POST", "/api/chat/", 200, 10.0)
+        await sync.flush()
+        await client.aclose()
+    asyncio.run(run())
+
+
+def _run_processes(target, args_list):
+    ctx = multiprocessing.get_context("fork")
+    processes = [ctx.Process(target=target, args=args) for args in args_list]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join(timeout=30)
+        assert p.exitcode == 0
+
+
+def test_라벨의_구분자_이스케이프():
+    store = MetricsStore()
+    store.record("GET", "/a|b\\", 200, 12.0)
+    store.record_sse_stream(route="/s|t", frames=3, tokens=5, heartbeats=0, bytes_sent=90, duration_ms=40.0)
+
+    merged = MetricsStore.from_counters(store.to_counters(), store.maxima())
+    assert merged.latency[("GET", "/a|b\\", "2xx")].count == 1
+    assert merged.latency[("GET", "/a|b\\", "2xx")].max == 12.0
+    assert merged.sse_streams["/s|t"]["frames"] == 3
+
+
+def test_멀티프로세스_카운터_병합():
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    processes = [ctx.Process(target=_local_worker, args=(w, queue)) for w in range(WORKERS)]
+    for p in processes:
+        p.start()
+    results = [queue.get(timeout=30) for _ in range(WORKERS)]
+    for p in processes:
+        p.join(timeout=30)
+
+    # Redis HINCRBY / ZADD GT와 같은 방식으로 병합
+    counters: dict[str, float] = {}
+    maxima: dict[str, float] = {}
+    for worker_counters, worker_maxima in results:
+        for field, value in worker_counters.items():
+            counters[field] = counters.get(field, 0) + value
+        for series, value in worker_maxima.items():
+            maxima[series] = max(maxima.get(series, 0.0), value)
+
+    merged = MetricsStore.from_counters(counters, maxima)
+    summary = merged.summary()
+
+    assert summary["total_requests"] == WORKERS * REQUESTS_PER_WORKER
+    assert summary["by_status"][500] == WORKERS * (REQUESTS_PER_WORKER // 50)
+    assert merged.latency[("GET", "/health", "2xx")].max == (WORKERS - 1) * 100 + 10
+    assert sum(h.count for h in merged.latency.values()) == WORKERS * REQUESTS_PER_WORKER
+
+
+async def test_Redis_멀티워커_병합():
+    client = airedis.from_url(settings.redis_url, decode_responses=True, socket_connect_timeout=1)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis에 연결할 수 없음")
+
+    prefix = f"test-metrics:{uuid.uuid4().hex[:8]}"
+    try:
+        _run_processes(_redis_worker, [(w, prefix) for w in range(WORKERS)])
+
+        merged = await RedisMetricsSync(MetricsStore(), client, prefix=prefix).merged_store()
+        summary = merged.summary()
+        assert summary["total_requests"] == WORKERS * (REQUESTS_PER_WORKER + 1)
+        assert summary["by_path"]["POST /api/chat/"] == WORKERS
+        assert len(summary["slowest_top5"]) == MetricsStore.TOP_K
+    finally:
+        await client.delete(f"{prefix}:counters", f"{prefix}:max", f"{prefix}:slowest")
+        await client.aclose()
+
+
+async def test_바뀐_값이_없으면_트랜잭션_생략():
+    client = airedis.from_url(settings.redis_url, decode_responses=True, socket_connect_timeout=1)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis에 연결할 수 없음")
+
+    async def multi_calls() -> int:
+        return (await client.info("commandstats")).get("cmdstat_multi", {}).get("calls", 0)
+
+    prefix = f"test-metrics:{uuid.uuid4().hex[:8]}"
+    store = MetricsStore()
+    sync = RedisMetricsSync(store, client, prefix=prefix)
+    try:
+        store.record("GET", "/health", 200, 20.0)
+        await sync.flush()
+        before = await multi_calls()
+        assert await sync.flush() == 0
+        assert await multi_calls() == before
+
+        # 더 작은 값만 기록 → 카운터만 반영, 최댓값은 그대로
+        store.record("GET", "/health", 200, 5.0)
+        await sync.flush()
+        assert await client.zscore(f"{prefix}:max", "http|GET|/health|2xx") == 20.0
+        assert (await sync.merged_store()).summary()["total_requests"] == 2
+    finally:
+        await client.delete(f"{prefix}:counters", f"{prefix}:max", f"{prefix}:slowest")
+        await client.aclose()
@@ -0,0 +1,140 @@
+"""
+적응형 모델 라우팅 테스트 (속도가 다른 가짜 백엔드로 시뮬레이션)
+"""
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from agent.model_router import ModelRouter, ModelStatsCallback
+from core.config import settings
+from core.metrics import MetricsStore, metrics_store
+
+LARGE, SMALL = "qwen2.5:7b", "llama3.2:3b"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StubBackend:
+    """
+    동시 실행 수만큼 느려지는 가짜 모델 서버 — 호출 1건 = base_ms × (대기 중인 호출 수)
+    (시간은 FakeClock으로 진행, 실제 대기는 이벤트 루프 양보만)
+    """
+
+    def __init__(self, clock: FakeClock, base_ms: float, fail: bool = False):
+        self.clock = clock
+        self.base_ms = base_ms
+        self.fail = fail
+        self.calls = 0
+
+    async def generate(self, router: ModelRouter, model: str) -> None:
+        async with router.track(model):
+            self.calls += 1
+            queued = router.stats(model).snapshot(self.clock())["in_flight"]
+            await asyncio.sleep(0)
+            self.clock.now += self.base_ms * queued / 1000
+            if self.fail:
+                raise ConnectionError("backend down")
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    monkeypatch.setattr(settings, "model_routing_fallbacks", {"creative": [SMALL]})
+    monkeypatch.setattr(settings, "model_latency_slo_ms", {LARGE: 5000.0, SMALL: 3000.0})
+    monkeypatch.setattr(settings, "model_max_in_flight", {LARGE: 4, SMALL: 8})
+    monkeypatch.setattr(settings, "model_stats_window_seconds", 60.0)
+    monkeypatch.setattr(settings, "model_stats_min_samples", 5)
+    monkeypatch.setattr(settings, "model_max_error_rate", 0.2)
+    clock = FakeClock()
+    return ModelRouter(clock=clock), clock
+
+
+async def _simulate(router, backends, intent: str, requests: int) -> list[tuple[str, str]]:
+    decisions = []
+    for _ in range(requests):
+        model, reason = router.choose(intent)
+        decisions.append((model, reason))
+        await backends[model].generate(router, model)
+    return decisions
+
+
+async def test_7b가_SLO를_넘으면_3b로_강등하고_회복하면_복귀(routing):
+    router, clock = routing
+    backends = {LARGE: StubBackend(clock, base_ms=2000), SMALL: StubBackend(clock, base_ms=500)}
+
+    # 7b가 빠를 때는 기본 모델 유지
+    decisions = await _simulate(router, backends, "creative", 5)
+    assert decisions == [(LARGE, "preferred")] * 5
+
+    # 7b 대기열이 길어짐 (호출당 8초) → p95 > 5초 → 3b로 강등
+    backends[LARGE].base_ms = 8000
+    await _simulate(router, backends, "creative", 1)
+    decisions = await _simulate(router, backends, "creative", 5)
+    assert decisions == [(SMALL, "degraded_slo")] * 5
+    assert metrics_store.model_health[LARGE]["p95_ms"] == 8000.0
+
+    # 느린 표본이 창(60초) 밖으로 밀려나면 다시 7b
+    backends[LARGE].base_ms = 2000
+    clock.now += 61
+    assert router.choose("creative") == (LARGE, "preferred")
+
+
+async def test_동시_실행_포화와_오류율(routing):
+    router, clock = routing
+    stuck = [object() for _ in range(4)]
+    for key in stuck:
+        router.started(key, LARGE)
+    assert router.choose("creative") == (SMALL, "degraded_saturated")
+    for key in stuck:
+        router.abandoned(key, LARGE)        # 취소된 호출은 표본에 남지 않음
+    assert router.stats(LARGE).snapshot(clock())["samples"] == 0
+
+    failing = StubBackend(clock, base_ms=100, fail=True)
+    for _ in range(5):
+        with pytest.raises(ConnectionError):
+            await failing.generate(router, LARGE)
+    assert router.choose("creative") == (SMALL, "degraded_errors")
+
+
+async def test_모든_후보가_나쁘면_예상_대기가_짧은_모델(routing):
+    router, clock = routing
+    backends = {LARGE: StubBackend(clock, base_ms=9000), SMALL: StubBackend(clock, base_ms=4000)}
+    for model in (LARGE, SMALL):
+        for _ in range(5):
+            await backends[model].generate(router, model)
+    assert router.choose("creative") == (SMALL, "least_loaded")
+    # 대체 모델이 없는 의도는 기본 모델 그대로
+    assert router.choose("general")[0] == SMALL
+
+
+async def test_콜백이_LLM_호출을_기록(routing):
+    router, clock = routing
+    callback = ModelStatsCallback(router)
+
+    class FakeOllama(GenericFakeChatModel):
+        model: str = LARGE
+
+    llm = FakeOllama(messages=iter([AIMessage(content="안녕하세요")]))
+    await llm.ainvoke("hi", config={"callbacks": [callback]})
+    snapshot = router.stats(LARGE).snapshot(clock())
+    assert snapshot["samples"] == 1 and snapshot["in_flight"] == 0 and snapshot["error_rate"] == 0.0
+
+
+def test_라우팅_결정_메트릭():
+    store = MetricsStore()
+    store.record_model_route("creative", SMALL, "degraded_slo")
+    store.record_model_route("creative", SMALL, "degraded_slo")
+    store.model_health = {LARGE: {"samples": 5, "p95_ms": 8000.0, "error_rate": 0.0, "in_flight": 2}}
+
+    merged = MetricsStore.from_counters(store.to_counters())
+    assert merged.model_routes == store.model_routes
+    text = store.render_prometheus()
+    assert 'gateway_model_route_total{intent="creative",model="llama3.2:3b",reason="degraded_slo"} 2' in text
+    assert 'gateway_model_latency_p95_seconds{model="qwen2.5:7b"} 8.0' in text
@@ -0,0 +1,113 @@
+"""
+요청 전처리 테스트 (인증 캐시 + 쿼터 + 응답 캐시를 Redis 왕복 1번으로)
+
+로컬 Redis가 없으면 skip
+"""
+import uuid
+
+import pytest
+import redis.asyncio as airedis
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from core.config import settings
+from core.metrics import metrics_store
+from core.security import create_access_token
+from models.users import User
+from service import preflight_service
+from service.cache_service import set_cached_response
+from service.preflight_service import invalidate_api_key, run_preflight
+from service.quota_service import MAX_REQUESTS_PER_MINUTE, make_quota_key
+
+
+@pytest.fixture
+async def redis_bin():
+    client = airedis.from_url(settings.redis_url, socket_connect_timeout=1)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis에 연결할 수 없음")
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+def user_id():
+    return str(uuid.uuid4())
+
+
+def _bearer(user_id: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token(user_id))
+
+
+async def _seed_principal(redis, key: str, user_id: str, is_active: int = 1):
+    await redis.hset(key, mapping={"id": user_id, "username": "preflight", "role": "user", "is_active": is_active})
+    await redis.expire(key, 60)
+
+
+async def test_인증_캐시_히트면_DB_없이_쿼터와_응답_캐시까지_한번에(redis_bin, user_id):
+    await _seed_principal(redis_bin, f"auth:user:{user_id}", user_id)
+    query = f"preflight {uuid.uuid4()}"
+    await set_cached_response(redis_bin, query, {"query": query, "response": "캐시됨"})
+
+    result = await run_preflight(redis_bin, None, "/test", _bearer(user_id), None, query=query)
+
+    assert result.user.id == user_id
+    assert result.quota_used == 1
+    assert result.cached == {"query": query, "response": "캐시됨"}
+    assert set(result.timings) == {"auth", "redis"}
+    assert result.server_timing().startswith("pre_auth;dur=")
+    assert await redis_bin.ttl(make_quota_key(user_id)) > 0
+    assert metrics_store.preflight_outcomes["/test|response_cache_hit"] >= 1
+
+
+async def test_API_Key는_인증_캐시의_id로_쿼터_집계(redis_bin, user_id):
+    api_key = f"sk-{uuid.uuid4().hex}"
+    await _seed_principal(redis_bin, preflight_service._auth_key(None, api_key), user_id)
+
+    first = await run_preflight(redis_bin, None, "/test", None, api_key)
+    second = await run_preflight(redis_bin, None, "/test", None, api_key)
+    assert (first.quota_used, second.quota_used) == (1, 2)
+    assert second.cached is None
+
+    # 폐기하면 캐시가 지워져 다음 요청은 DB 조회
+    await invalidate_api_key(redis_bin, api_key)
+    assert not await redis_bin.exists(preflight_service._auth_key(None, api_key))
+
+
+async def test_인증_캐시_미스면_DB_조회_후_캐시_채움(redis_bin, user_id, monkeypatch):
+    loaded = []
+
+    async def fake_load_user(db, uid):
+        loaded.append(uid)
+        return User(id=uid, username="preflight", role="admin", is_active=True)
+
+    monkeypatch.setattr(preflight_service, "load_user", fake_load_user)
+
+    first = await run_preflight(redis_bin, None, "/test", _bearer(user_id), None)
+    second = await run_preflight(redis_bin, None, "/test", _bearer(user_id), None)
+
+    assert loaded == [user_id]                     # 두 번째는 캐시 히트
+    assert "auth_db" in first.timings and "auth_db" not in second.timings
+    assert second.user.role == "admin"
+    assert (first.quota_used, second.quota_used) == (1, 2)
+    assert await redis_bin.ttl(f"auth:user:{user_id}") <= settings.auth_cache_ttl_seconds
+
+
+async def test_쿼터_초과와_비활성_계정(redis_bin, user_id):
+    await _seed_principal(redis_bin, f"auth:user:{user_id}", user_id)
+    await redis_bin.set(make_quota_key(user_id), MAX_REQUESTS_PER_MINUTE, ex=60)
+    with pytest.raises(HTTPException) as exc:
+        await run_preflight(redis_bin, None, "/test", _bearer(user_id), None)
+    assert exc.value.status_code == 429
+
+    inactive = str(uuid.uuid4())
+    await _seed_principal(redis_bin, f"auth:user:{inactive}", inactive, is_active=0)
+    with pytest.raises(HTTPException) as exc:
+        await run_preflight(redis_bin, None, "/test", _bearer(inactive), None)
+    assert exc.value.status_code == 403
+
+    with pytest.raises(HTTPException) as exc:
+        await run_preflight(redis_bin, None, "/test", None, None)
+    assert exc.value.status_code == 401
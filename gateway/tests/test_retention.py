@@ -0,0 +1,105 @@
+"""
+대화 보존 정책 테스트 (정책 계산 / 대화 단위 정리 / 워커 락)
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import redis.asyncio as airedis
+from sqlalchemy import delete, select
+
+from core.config import settings
+from models.conversation import Conversation, Message
+from models.users import User
+from service import retention_service
+from service.retention_service import get_retention_policies, purge_expired, purge_if_leader
+
+
+def test_역할별_보존_정책(monkeypatch):
+    monkeypatch.setattr(settings, "retention_days_by_role", {"user": 30, "admin": 0})
+    monkeypatch.setattr(settings, "retention_default_days", 90)
+
+    policies = {p["name"]: p for p in get_retention_policies()}
+
+    # 보존 기간 0(무기한)인 admin은 정리 대상 아님
+    assert "admin" not in policies
+    assert policies["user"] == {"name": "user", "roles": ["user"], "exclude": False, "days": 30}
+    # 매핑에 없는 역할은 default 정책 (매핑된 역할 제외 조건)
+    assert policies["default"]["exclude"] is True
+    assert set(policies["default"]["roles"]) == {"user", "admin"}
+
+
+def test_기본_보존_비활성(monkeypatch):
+    monkeypatch.setattr(settings, "retention_days_by_role", {})
+    monkeypatch.setattr(settings, "retention_default_days", 0)
+
+    assert get_retention_policies() == []
+
+
+async def test_마지막_활동_기준으로_대화_단위_정리(db, monkeypatch):
+    monkeypatch.setattr(settings, "retention_days_by_role", {"user": 30})
+    monkeypatch.setattr(settings, "retention_default_days", 0)
+    monkeypatch.setattr(settings, "retention_batch_size", 1)      # 여러 배치에 걸쳐 정리
+    old = datetime.now(timezone.utc) - timedelta(days=60)
+    recent = datetime.now(timezone.utc) - timedelta(days=1)
+    unique = uuid.uuid4().hex[:6]
+    user = User(username=f"retention_{unique}", email=f"retention_{unique}@example.com",
+                hashed_password="x", role="user")
+    db.add(user)
+    await db.flush()
+    expired = Conversation(user_id=user.id, title="끝난 대화", created_at=old)
+    active = Conversation(user_id=user.id, title="이어지는 대화", created_at=old)
+    db.add_all([expired, active])
+    await db.flush()
+    db.add_all([
+        Message(conversation_id=expired.id, role="user", content="질문", created_at=old),
+        Message(conversation_id=expired.id, role="assistant", content="답변", created_at=old),
+        Message(conversation_id=active.id, role="user", content="옛 질문", created_at=old),
+        Message(conversation_id=active.id, role="user", content="새 질문", created_at=recent),
+    ])
+    await db.commit()
+    expired_id, active_id = expired.id, active.id
+
+    report = await purge_expired(db)
+    assert report["messages_deleted"] >= 2 and report["conversations_deleted"] >= 1
+
+    remaining = (await db.execute(
+        select(Message.conversation_id, Message.content)
+        .where(Message.conversation_id.in_([expired_id, active_id]))
+    )).all()
+    # 끝난 대화는 통째로 삭제, 이어지는 대화는 오래된 메시지까지 그대로
+    assert sorted(content for _, content in remaining) == ["새 질문", "옛 질문"]
+    conversations = (await db.execute(
+        select(Conversation.id).where(Conversation.id.in_([expired_id, active_id]))
+    )).scalars().all()
+    assert conversations == [active_id]
+
+    await db.execute(delete(User).where(User.id == user.id))
+    await db.commit()
+
+
+async def test_락을_잡은_워커_하나만_정리(monkeypatch):
+    client = airedis.from_url(settings.redis_url, decode_responses=True, socket_connect_timeout=1)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis에 연결할 수 없음")
+
+    runs = []
+
+    async def fake_purge(db):
+        runs.append(db)
+        return {"messages_deleted": 0}
+
+    monkeypatch.setattr(retention_service, "RETENTION_LOCK_KEY", f"test-retention:{uuid.uuid4().hex[:8]}")
+    monkeypatch.setattr(retention_service, "purge_expired", fake_purge)
+    try:
+        # 워커 3개가 같은 주기에 깨어나도 정리는 1번
+        results = [await purge_if_leader(client) for _ in range(3)]
+        assert results == [{"messages_deleted": 0}, None, None]
+        assert len(runs) == 1
+        assert 0 < await client.ttl(retention_service.RETENTION_LOCK_KEY) <= settings.retention_interval_seconds
+    finally:
+        await client.delete(retention_service.RETENTION_LOCK_KEY)
+        await client.aclose()
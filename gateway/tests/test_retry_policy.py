@@ -0,0 +1,113 @@
+"""
+재시도 정책 테스트 (실패 유형별 재시도 방식 / 모델 상향 / 토큰 예산)
+"""
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agent.graph import output_quality_router
+from agent.retry_policy import (
+    estimate_tokens, ledger_entry, retry_policy_node, retry_router, retry_tokens_spent, with_retry_hint,
+)
+from core.config import settings
+from core.metrics import metrics_store
+
+
+def _entry(step: str, attempt: int, tokens: int) -> dict:
+    return {"step": step, "model": "m", "attempt": attempt, "prompt_tokens": tokens, "completion_tokens": 0}
+
+
+def _state(intent: str, **extra) -> dict:
+    state = {
+        "query": "오늘 환율", "intent": intent, "model": settings.model_simple,
+        "retry_count": 1, "failure_reason": "empty", "search_results": [], "cost_ledger": [],
+        "response": "짧",
+    }
+    state.update(extra)
+    return state
+
+
+async def test_수집_결과가_있으면_종합만_다시_실행():
+    state = _state("search", search_results=["[검색어: 환율]\n- 원달러 1,380원"])
+    update = await retry_policy_node(state)
+
+    assert update["retry_action"] == "resynthesize"
+    assert update["response"] == ""
+    assert retry_router({**state, **update}) == "resynthesize"
+    # retry는 더 이상 classifier로 돌아가지 않음
+    assert output_quality_router({"output_quality": "retry"}) == "retry_policy"
+
+
+async def test_실패_유형별_재시도_방식():
+    no_results = _state("analysis", search_results=["검색 결과를 찾지 못했습니다."])
+    update = await retry_policy_node(no_results)
+    assert update["retry_action"] == "rerun_agent"
+    assert retry_router({**no_results, **update}) == "analysis_agent"
+
+    for intent, node in (("creative", "creative_agent"), ("general", "general_agent")):
+        state = _state(intent)
+        update = await retry_policy_node(state)
+        assert update["retry_action"] == "respond"
+        assert retry_router({**state, **update}) == node
+
+
+async def test_실패한_시도의_메시지_삭제():
+    messages = [
+        HumanMessage(content="이전 질문", id="h1"), AIMessage(content="이전 답변", id="a1"),
+        HumanMessage(content="시를 써줘", id="h2"),
+        AIMessage(content="", id="a2", tool_calls=[{"name": "web_search", "args": {"query": "시"}, "id": "c1"}]),
+        ToolMessage(content="검색 결과", tool_call_id="c1", id="t1"),
+        AIMessage(content="모르겠습니다", id="a3"),
+    ]
+    update = await retry_policy_node(_state("creative", messages=messages))
+    assert update["retry_action"] == "respond"
+    assert [m.id for m in update["messages"]] == ["a2", "t1", "a3"]
+
+
+async def test_두_번째_재시도부터_모델_상향과_프롬프트_보정():
+    first = await retry_policy_node(_state("general"))
+    assert "model" not in first
+
+    second = await retry_policy_node(_state("general", retry_count=2, failure_reason="low_quality"))
+    assert second["model"] == settings.model_complex
+
+    prompt = with_retry_hint({"retry_count": 2, "retry_hint": second["retry_hint"]}, "시스템")
+    assert prompt.startswith("시스템") and "[재시도]" in prompt and "모른다" in prompt
+    assert with_retry_hint({"retry_count": 0, "retry_hint": "x"}, "시스템") == "시스템"
+
+
+async def test_토큰_예산을_넘는_재시도는_fallback(monkeypatch):
+    monkeypatch.setattr(settings, "retry_token_budget", 3000)
+    ledger = [
+        _entry("classifier", 0, 200),
+        _entry("result_synthesizer", 0, 1000),
+        _entry("result_synthesizer", 1, 1500),
+    ]
+    assert retry_tokens_spent(ledger) == 1500
+    assert estimate_tokens(ledger, ("result_synthesizer",)) == 1500    # 가장 최근 시도 기준
+    assert estimate_tokens([], ("llm_node",)) == settings.retry_default_estimate_tokens
+
+    before = metrics_store.retry_actions["search|fallback"]
+    state = _state("search", retry_count=2, search_results=["결과"], cost_ledger=ledger)
+    update = await retry_policy_node(state)    # 1500 + 1500 ≤ 3000 → 허용
+    assert update["retry_action"] == "resynthesize"
+
+    state["cost_ledger"] = ledger + [_entry("result_synthesizer", 2, 100)]
+    update = await retry_policy_node(state)    # 1600 + 100 ≤ 3000 → 허용 (최근 시도 비용 100)
+    assert update["retry_action"] == "resynthesize"
+
+    state["cost_ledger"] = ledger + [_entry("result_synthesizer", 2, 1400)]
+    update = await retry_policy_node(state)    # 2900 + 1400 > 3000 → fallback
+    assert update["retry_action"] == "fallback"
+    assert retry_router({**state, **update}) == "fallback"
+    assert metrics_store.retry_actions["search|fallback"] == before + 1
+    assert 'gateway_agent_retries_total{intent="search",action="fallback"}' in metrics_store.render_prometheus()
+
+
+def test_비용_장부_항목():
+    class _Response:
+        usage_metadata = {"input_tokens": 120, "output_tokens": 30}
+        response_metadata = {"total_duration": 850_000_000}
+
+    assert ledger_entry({"retry_count": 1}, "llm_node", "qwen", _Response()) == [{
+        "step": "llm_node", "model": "qwen", "attempt": 1,
+        "prompt_tokens": 120, "completion_tokens": 30, "duration_ms": 850.0,
+    }]
@@ -0,0 +1,27 @@
+"""
+직렬화 모듈 테스트 (SSE 프레임 / msgpack 캐시 값)
+"""
+import json
+
+from core.serialization import dumps, loads, pack, unpack, sse_data, sse_token, sse_status_frames
+
+
+def test_SSE_토큰_프레임은_stdlib_json과_동일한_값():
+    for token in ["안녕", "하세요", ' "quote"', "줄\n바꿈", "\\", "😀"]:
+        frame = sse_token(token)
+        assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+        assert json.loads(frame[6:-2]) == {"token": token}
+
+
+def test_SSE_상태_프레임_미리_인코딩():
+    frames = sse_status_frames({"classifier": " 의도 분석 중..."})
+    assert frames["classifier"] == "data: {\"status\":\" 의도 분석 중...\"}\n\n".encode("utf-8")
+    assert sse_data({"token": "[DONE]", "conversation_id": "c1"}).endswith(b"}\n\n")
+
+
+def test_msgpack_캐시값_왕복():
+    data = {"query": "서울 날씨", "response": "맑음 " * 100, "confidence": 0.93, "is_blocked": False}
+    encoded = pack(data)
+    assert unpack(encoded) == data
+    assert len(encoded) < len(dumps(data))
+    assert loads(dumps(data)) == data
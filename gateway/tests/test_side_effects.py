@@ -0,0 +1,90 @@
+"""
+응답 후처리 실행기 테스트 (큐 / 재시도 / drain / 큐 가득 참)
+"""
+import asyncio
+import uuid
+
+from core.metrics import metrics_store
+from core.side_effects import SideEffectExecutor
+
+
+def _executor(**overrides) -> SideEffectExecutor:
+    options = {"queue_size": 100, "workers": 2, "max_retries": 2, "retry_base_seconds": 0.001}
+    options.update(overrides)
+    return SideEffectExecutor(**options)
+
+
+async def test_등록_즉시_반환_drain에서_모두_처리():
+    executor = _executor()
+    executor.start()
+    done = []
+    release = asyncio.Event()
+
+    async def job(i):
+        await release.wait()
+        done.append(i)
+
+    for i in range(10):
+        await executor.submit("test_job", job, i)
+    assert done == []                          # 응답 경로는 기다리지 않음
+
+    release.set()
+    await executor.drain(timeout=1)
+    assert sorted(done) == list(range(10))
+    assert not executor.running
+
+
+async def test_일시적_실패는_재시도():
+    name = f"flaky_{uuid.uuid4().hex[:6]}"
+    executor = _executor()
+    executor.start()
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("일시적 오류")
+
+    await executor.submit(name, flaky)
+    await executor.drain(timeout=1)
+
+    assert len(calls) == 3
+    assert metrics_store.side_effect_outcomes[f"{name}|retry"] == 2
+    assert metrics_store.side_effect_outcomes[f"{name}|ok"] == 1
+    assert metrics_store.side_effect_latency[(name, "lag")].count == 1
+
+
+async def test_최대_재시도_초과시_실패_기록():
+    name = f"broken_{uuid.uuid4().hex[:6]}"
+    executor = _executor(max_retries=1)
+    executor.start()
+
+    async def broken():
+        raise RuntimeError("항상 실패")
+
+    await executor.submit(name, broken)
+    await executor.drain(timeout=1)
+    assert metrics_store.side_effect_outcomes[f"{name}|failed"] == 1
+
+
+async def test_큐가_가득_차거나_시작_전이면_직접_실행():
+    name = f"inline_{uuid.uuid4().hex[:6]}"
+    done = []
+
+    async def job(i):
+        done.append(i)
+
+    # 시작 전 (테스트 앱 등 lifespan 없음)
+    await _executor().submit(name, job, 0)
+    assert done == [0]
+
+    # 큐 가득 참 → 유실 대신 호출한 쪽에서 실행
+    executor = _executor(queue_size=1, workers=0)
+    executor._workers = [asyncio.create_task(asyncio.sleep(10))]    # 처리하지 않는 워커
+    executor._queue = asyncio.Queue(maxsize=1)
+    await executor.submit(name, job, 1)        # 큐에 들어감
+    await executor.submit(name, job, 2)        # 직접 실행
+    assert done == [0, 2]
+    assert metrics_store.side_effect_outcomes[f"{name}|inline"] == 1
+    for task in executor._workers:
+        task.cancel()
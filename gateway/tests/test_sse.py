@@ -0,0 +1,153 @@
+"""
+SSE writer 테스트 (토큰 병합 / heartbeat / id 필드)
+"""
+import asyncio
+import json
+
+from core.serialization import sse_data
+from core.sse import SSEWriter, HEARTBEAT_FRAME
+
+
+def _parse(chunks: list[bytes]) -> list[tuple[int | None, dict | None]]:
+    """SSE 바이트 → [(id, data)] (heartbeat 주석은 (None, None))"""
+    events = []
+    for block in b"".join(chunks).split(b"\n\n"):
+        if not block:
+            continue
+        if block.startswith(b":"):
+            events.append((None, None))
+            continue
+        fields = dict(line.split(b": ", 1) for line in block.split(b"\n"))
+        events.append((int(fields[b"id"]), json.loads(fields[b"data"])))
+    return events
+
+
+async def _collect(writer: SSEWriter, source) -> list[bytes]:
+    return [chunk async for chunk in writer.stream(source)]
+
+
+async def test_토큰_병합_및_순서_유지():
+    async def source():
+        yield sse_data({"status": "시작"})
+        for token in ["안", "녕", "하", "세", "요"]:
+            yield token
+        yield sse_data({"token": "[DONE]"})
+
+    writer = SSEWriter("/test", window_ms=1000, max_bytes=1024, heartbeat_seconds=60)
+    events = _parse(await _collect(writer, source()))
+
+    # 토큰 5개가 프레임 1개로 병합되고, 상태 → 토큰 → 종료 순서 유지
+    assert [data for _, data in events] == [
+        {"status": "시작"}, {"token": "안녕하세요"}, {"token": "[DONE]"},
+    ]
+    assert [event_id for event_id, _ in events] == [1, 2, 3]
+    assert writer.stats()["frames"] == 3
+    assert writer.stats()["tokens"] == 5
+
+
+async def test_바이트_한도와_시간_창으로_분할():
+    async def source():
+        for token in ["가나다", "라마바", "사아자"]:       # 한글 3글자 = 9B
+            yield token
+        await asyncio.sleep(0.05)                             # 창(10ms)보다 긴 공백
+        yield "끝"
+
+    writer = SSEWriter("/test", window_ms=10, max_bytes=18, heartbeat_seconds=60)
+    events = _parse(await _collect(writer, source()))
+
+    assert [data["token"] for _, data in events] == ["가나다라마바", "사아자", "끝"]
+
+
+async def test_무응답_구간_heartbeat():
+    async def source():
+        yield "a"
+        await asyncio.sleep(0.12)
+        yield "b"
+
+    writer = SSEWriter("/test", window_ms=1, max_bytes=1024, heartbeat_seconds=0.05)
+    chunks = await _collect(writer, source())
+
+    assert HEARTBEAT_FRAME in chunks
+    assert writer.heartbeats >= 1
+    assert [data["token"] for _, data in _parse(chunks) if data] == ["a", "b"]
+
+
+async def test_중단시_소스_정리():
+    closed = asyncio.Event()
+
+    async def source():
+        try:
+            yield "a"
+            await asyncio.sleep(10)
+            yield "b"
+        finally:
+            closed.set()
+
+    writer = SSEWriter("/test", window_ms=1, max_bytes=1024, heartbeat_seconds=60)
+    stream = writer.stream(source())
+    assert b'"a"' in await stream.__anext__()
+    await stream.aclose()          # 클라이언트 연결 끊김
+
+    await asyncio.wait_for(closed.wait(), timeout=1)
+
+
+async def test_클라이언트_연결_끊김시_그래프_노드까지_취소():
+    """StreamingResponse 연결 끊김 → SSEWriter → astream_events → LangGraph 노드 태스크 취소"""
+    from contextlib import aclosing
+    from typing import TypedDict
+    from fastapi.responses import StreamingResponse
+    from langgraph.graph import StateGraph, END
+
+    class State(TypedDict):
+        text: str
+
+    node_cancelled = asyncio.Event()
+    source_cancelled = asyncio.Event()
+
+    async def slow_llm(state: State) -> dict:
+        try:
+            await asyncio.sleep(10)          # 진행 중인 LLM 호출 대신
+        except asyncio.CancelledError:
+            node_cancelled.set()
+            raise
+        return {"text": "done"}
+
+    builder = StateGraph(State)
+    builder.add_node("slow_llm", slow_llm)
+    builder.set_entry_point("slow_llm")
+    builder.add_edge("slow_llm", END)
+    graph = builder.compile()
+
+    async def source():
+        try:
+            events = graph.astream_events({"text": ""}, version="v2")
+            async with aclosing(events):
+                async for event in events:
+                    if event["event"] == "on_chain_start" and event["name"] == "slow_llm":
+                        yield sse_data({"status": "생성 중"})
+        except (asyncio.CancelledError, GeneratorExit):
+            source_cancelled.set()
+            raise
+
+    response = StreamingResponse(
+        SSEWriter("/test", heartbeat_seconds=60).stream(source()),
+        media_type="text/event-stream",
+    )
+
+    first_chunk = asyncio.Event()
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await first_chunk.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            first_chunk.set()
+
+    await asyncio.wait_for(response({"type": "http"}, receive, send), timeout=2)
+
+    await asyncio.wait_for(node_cancelled.wait(), timeout=1)
+    await asyncio.wait_for(source_cancelled.wait(), timeout=1)
@@ -0,0 +1,102 @@
+"""
+점진적 출력 검증 테스트 (앞부분 판정 / 생성 조기 중단 / 스트리밍 보류)
+"""
+from langchain_core.messages import AIMessageChunk
+
+from agent.nodes.output_guard import output_guard_node
+from agent.stream_guard import PASS, REJECT, StreamGuard, StreamHoldback, generate_guarded
+from core.metrics import metrics_store
+
+
+class _FakeStreamingLLM:
+    """astream만 흉내 — 몇 번째 청크까지 소비됐는지 기록"""
+
+    def __init__(self, tokens: list[str]):
+        self.tokens = tokens
+        self.consumed = 0
+
+    async def astream(self, messages):
+        for i, token in enumerate(self.tokens):
+            self.consumed = i + 1
+            chunk = AIMessageChunk(content=token)
+            if i == len(self.tokens) - 1:
+                chunk = AIMessageChunk(
+                    content=token, usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+                )
+            yield chunk
+
+
+def _feed(guard: StreamGuard, tokens: list[str]) -> str | None:
+    for token in tokens:
+        guard.feed(token)
+    return guard.verdict
+
+
+def test_거절로_시작하면_조기_판정():
+    assert _feed(StreamGuard(), ["죄송", "합니다", ", 해당 ", "정보가 ", "없습니다"]) == REJECT
+    assert _feed(StreamGuard(), ["I'm ", "sorry"]) == REJECT
+    assert _feed(StreamGuard(), ["정보가 ", "없습니다."]) == REJECT
+
+
+def test_정상_시작은_바로_통과():
+    guard = StreamGuard()
+    assert guard.feed("오늘 ") is None       # 아직 판단할 글자 수 부족
+    assert guard.feed("원달러 환율은") == PASS   # 거절 후보로 시작하지 않음 → window 전에 통과
+
+    # 거절 후보로 시작하지만 거절이 아닌 문장 → window까지 보류 후 통과
+    guard = StreamGuard(window=20)
+    assert _feed(guard, ["정보가 ", "부족하지만 ", "현재까지 알려진 ", "내용은 다음과 같습니다"]) == PASS
+
+    # window보다 짧게 끝난 응답
+    assert StreamGuard().finish() == PASS
+    short = StreamGuard()
+    short.feed("죄송합니다.")
+    assert short.verdict is None and short.finish() == PASS
+
+
+async def test_거절_시작이면_생성을_중단():
+    llm = _FakeStreamingLLM(["죄송합니다, ", "해당 정보를 ", "찾을 수 없습니다", " 더 ", "긴 ", "설명"])
+    before = metrics_store.stream_guard_verdicts["result_synthesizer|reject"]
+
+    assert await generate_guarded({"intent": "search"}, llm, [], "result_synthesizer") is None
+    assert llm.consumed == 3                  # 나머지 토큰은 생성되지 않음
+    assert metrics_store.stream_guard_verdicts["result_synthesizer|reject"] == before + 1
+
+    # 검증 대상이 아닌 의도는 그대로 생성
+    llm = _FakeStreamingLLM(["죄송합니다, ", "정보가 없습니다"])
+    message = await generate_guarded({"intent": "general"}, llm, [], "llm_node")
+    assert message.content == "죄송합니다, 정보가 없습니다"
+
+
+async def test_통과한_응답은_청크를_합친_메시지():
+    llm = _FakeStreamingLLM(["검색 결과에 ", "따르면 ", "환율은 1,380원입니다."])
+    message = await generate_guarded({"intent": "search"}, llm, [], "result_synthesizer")
+
+    assert message.content == "검색 결과에 따르면 환율은 1,380원입니다."
+    assert message.usage_metadata["output_tokens"] == 5
+    assert llm.consumed == 3
+
+
+async def test_거절_판정은_output_guard에서_재시도():
+    result = await output_guard_node({"intent": "search", "response": "", "retry_count": 0, "guard_rejected": True})
+    assert result == {"output_quality": "retry", "retry_count": 1, "failure_reason": "low_quality"}
+
+
+def test_스트리밍_보류():
+    holdback = StreamHoldback()
+    # 거절 시작 — 한 글자도 전송하지 않음
+    sent = [holdback.token("r1", "result_synthesizer", "search", t) for t in ["죄송", "합니다. ", "정보가 없습니다"]]
+    assert "".join(sent) == ""
+
+    # 정상 시작 — 판정 순간 보류분 전송, 이후는 그대로
+    sent = [holdback.token("r2", "result_synthesizer", "search", t) for t in ["오늘", " 환율은", " 1,380원"]]
+    assert sent == ["", "오늘 환율은", " 1,380원"]
+
+    # 응답 노드가 아니거나 검증 대상 의도가 아니면 보류 없음
+    assert holdback.token("r3", "query_refiner", "search", "죄송") == "죄송"
+    assert holdback.token("r4", "general_agent", "general", "죄송") == "죄송"
+
+    # 판정 전에 끝난 짧은 응답은 종료 시 전송
+    assert holdback.token("r5", "synthesizer", "analysis", "네.") == ""
+    assert holdback.end("r5") == "네."
+    assert holdback.end("r1") == ""
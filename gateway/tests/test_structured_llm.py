@@ -0,0 +1,149 @@
+"""
+내부 LLM 호출 스키마 제약 출력 테스트 (Ollama /api/chat 요청 형식 / 생성 상한 / 파싱 실패 집계)
+
+네트워크 대신 httpx.MockTransport 사용
+"""
+import json
+
+import httpx
+import pytest
+
+from agent.callbacks import GraphTimingCallback
+from agent.model_router import ModelRouter, ModelStatsCallback
+from agent.nodes.classifier import classifier_node
+from agent.structured_llm import batch_classification_schema, classification_schema, internal_llm, ollama_json
+from agent.subgraphs.analysis_subgraph import decomposer_node
+from core.config import settings
+from core.metrics import MetricsStore, metrics_store
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    """요청 본문을 기록하고 content_fn(payload)를 답하는 가짜 Ollama"""
+    requests = []
+    state = {"content": lambda payload: "{}", "done_reason": "stop"}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        requests.append(payload)
+        return httpx.Response(200, json={
+            "model": payload["model"],
+            "message": {"role": "assistant", "content": state["content"](payload)},
+            "done_reason": state["done_reason"],
+            "prompt_eval_count": 120,
+            "eval_count": 18,
+            "eval_duration": 90_000_000,
+            "total_duration": 150_000_000,
+        })
+
+    monkeypatch.setattr(ollama_json, "_client", httpx.AsyncClient(
+        base_url="http://ollama", transport=httpx.MockTransport(handler),
+    ))
+    monkeypatch.setattr(ollama_json, "_sync_client", httpx.Client(
+        base_url="http://ollama", transport=httpx.MockTransport(handler),
+    ))
+    monkeypatch.setattr(settings, "structured_output_enabled", True)
+    monkeypatch.setattr(settings, "classifier_batch_enabled", False)
+    state["requests"] = requests
+    return state
+
+
+def test_reasoning_제외_스키마():
+    schema = classification_schema(include_reasoning=False)
+    assert set(schema["properties"]) == {"intent", "confidence"}
+    assert schema["required"] == ["intent", "confidence"]
+    assert "reasoning" in classification_schema(include_reasoning=True)["required"]
+
+    item = batch_classification_schema(include_reasoning=False)["properties"]["results"]["items"]
+    assert item["required"] == ["id", "intent", "confidence"]
+
+
+async def test_분류기가_스키마와_생성_상한으로_호출(ollama):
+    ollama["content"] = lambda payload: '{"intent": "search", "confidence": 0.92}'
+    before = dict(metrics_store.internal_llm["classifier"])
+
+    result = await classifier_node({"query": "오늘 서울 날씨", "deadline": 0, "retry_count": 0})
+
+    payload = ollama["requests"][-1]
+    assert payload["format"] == classification_schema(include_reasoning=False)
+    assert payload["options"]["num_predict"] == settings.internal_num_predict["classifier"]
+    assert payload["stream"] is False
+    assert "reasoning" not in payload["messages"][0]["content"]
+    assert result["intent"] == "search"
+    assert result["cost_ledger"][0]["completion_tokens"] == 18
+
+    stats = metrics_store.internal_llm["classifier"]
+    assert stats["calls"] == before.get("calls", 0) + 1
+    assert stats["eval_tokens"] == before.get("eval_tokens", 0) + 18
+    assert stats["parse_failures"] == before.get("parse_failures", 0)
+
+
+async def test_상한에서_잘린_출력은_파싱_실패로_집계(ollama, monkeypatch):
+    monkeypatch.setattr(settings, "classifier_reasoning", True)
+    ollama["content"] = lambda payload: '{"intent": "analysis", "confidence": 0.9, "reasoning": "비교'
+    ollama["done_reason"] = "length"
+    before = dict(metrics_store.internal_llm["classifier"])
+
+    result = await classifier_node({"query": "A와 B 비교", "deadline": 0, "retry_count": 0})
+
+    payload = ollama["requests"][-1]
+    assert payload["options"]["num_predict"] == (
+        settings.internal_num_predict["classifier"] + settings.classifier_reasoning_tokens
+    )
+    assert '"reasoning"' in payload["messages"][0]["content"]
+    assert result["intent"] == "general"
+    stats = metrics_store.internal_llm["classifier"]
+    assert stats["parse_failures"] == before.get("parse_failures", 0) + 1
+    assert stats["truncated"] == before.get("truncated", 0) + 1
+
+
+async def test_콜백이_구조화_호출을_기록(ollama):
+    ollama["content"] = lambda payload: '{"intent": "general", "confidence": 0.9}'
+    timing, router = GraphTimingCallback(), ModelRouter()
+    llm = internal_llm(classification_schema(include_reasoning=False), 40)
+
+    await llm.ainvoke("안녕", config={"callbacks": [timing, ModelStatsCallback(router)]})
+
+    [call] = timing.llm_calls
+    assert call["model"] == settings.model_simple
+    assert call["prompt_tokens"] == 120 and call["eval_tokens"] == 18 and call["eval_ms"] == 90.0
+    snapshot = router.stats(settings.model_simple).snapshot(router.clock())
+    assert snapshot["samples"] == 1 and snapshot["in_flight"] == 0     # 한 번만 기록
+
+
+def test_동기_호출도_같은_요청(ollama):
+    ollama["content"] = lambda payload: '{"intent": "search", "confidence": 0.8}'
+    schema = classification_schema(include_reasoning=False)
+    response = internal_llm(schema, 40).invoke("환율 알려줘")
+
+    assert json.loads(response.content) == {"intent": "search", "confidence": 0.8}
+    assert response.usage_metadata["total_tokens"] == 138
+    payload = ollama["requests"][-1]
+    assert payload["format"] == schema and payload["options"]["num_predict"] == 40 and payload["stream"] is False
+
+
+async def test_질문_분해기(ollama):
+    ollama["content"] = lambda payload: json.dumps(
+        {"sub_queries": ["A의 장점은?", " ", "B의 장점은?"]}, ensure_ascii=False,
+    )
+    result = await decomposer_node({"query": "A와 B의 장점 비교", "deadline": 0, "retry_count": 0})
+    assert result["sub_queries"] == ["A의 장점은?", "B의 장점은?"]
+    assert ollama["requests"][-1]["format"]["required"] == ["sub_queries"]
+
+    ollama["content"] = lambda payload: '{"sub_queries": []}'
+    result = await decomposer_node({"query": "A와 B의 장점 비교", "deadline": 0, "retry_count": 0})
+    assert result["sub_queries"] == ["A와 B의 장점 비교"]
+
+
+def test_내부_호출_메트릭_집계와_병합():
+    store = MetricsStore()
+    store.record_internal_llm("classifier", parsed=True, truncated=False, prompt_tokens=120, eval_tokens=12, eval_ms=60.0)
+    store.record_internal_llm("classifier", parsed=False, truncated=True, prompt_tokens=120, eval_tokens=40, eval_ms=200.0)
+
+    summary = store.summary()["internal_llm"]["classifier"]
+    assert summary["parse_failure_rate"] == 0.5
+    assert summary["avg_eval_tokens"] == 26.0 and summary["truncated"] == 1
+    assert MetricsStore.from_counters(store.to_counters()).summary()["internal_llm"] == store.summary()["internal_llm"]
+    text = store.render_prometheus()
+    assert 'gateway_internal_llm_calls_total{step="classifier",outcome="parse_error"} 1' in text
+    assert 'gateway_internal_llm_tokens_total{step="classifier",kind="generated"} 52' in text
@@ -0,0 +1,120 @@
+"""
+도구 실행기 테스트 (동시 실행 / 도구별 시간 제한 / 요청 도구 예산)
+
+실제 검색/URL 도구 대신 asyncio.sleep으로 지연을 흉내 내는 도구 사용
+"""
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.graph import END, START, StateGraph
+
+from agent import tool_executor
+from agent.state import AgentState
+from agent.tool_executor import budget_exhausted, tool_executor_node
+from core.config import settings
+from core.metrics import metrics_store
+
+
+@tool
+async def slow_search(query: str) -> str:
+    """검색 흉내 (0.2초)"""
+    await asyncio.sleep(0.2)
+    return f"검색: {query}"
+
+
+@tool
+async def slow_fetch(url: str) -> str:
+    """URL 가져오기 흉내 (0.2초)"""
+    await asyncio.sleep(0.2)
+    return f"본문: {url}"
+
+
+@tool
+async def hanging(query: str) -> str:
+    """응답하지 않는 도구"""
+    await asyncio.sleep(10)
+    return "도달하지 않음"
+
+
+@pytest.fixture(autouse=True)
+def fake_tools(monkeypatch):
+    monkeypatch.setattr(tool_executor, "TOOLS_BY_NAME", {t.name: t for t in (slow_search, slow_fetch, hanging)})
+    monkeypatch.setattr(settings, "tool_timeout_seconds", {"hanging": 0.1})
+    monkeypatch.setattr(settings, "tool_budget_seconds", 5.0)
+    monkeypatch.setattr(settings, "tool_max_calls", 8)
+
+
+def _state(*calls, **extra) -> dict:
+    tool_calls = [{"name": name, "args": args, "id": f"call_{i}"} for i, (name, args) in enumerate(calls)]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)], **extra}
+
+
+async def test_한_턴의_도구_호출은_동시에_실행():
+    start = time.perf_counter()
+    result = await tool_executor_node(
+        _state(("slow_search", {"query": "뉴스"}), ("slow_fetch", {"url": "https://a.example"})), {},
+    )
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.35                       # 합계(0.4초)가 아니라 최댓값(0.2초)
+    assert [m.content for m in result["messages"]] == ["검색: 뉴스", "본문: https://a.example"]
+    assert [m.tool_call_id for m in result["messages"]] == ["call_0", "call_1"]
+    assert result["tool_calls"] == 2
+    assert 150 < result["tool_time_ms"] < 350
+
+
+async def test_시간_초과_도구는_오류_메시지로_응답하고_나머지는_진행():
+    before = metrics_store.tool_latency[("hanging", "timeout")].count
+    result = await tool_executor_node(_state(("hanging", {"query": "x"}), ("slow_search", {"query": "y"})), {})
+
+    timed_out, ok = result["messages"]
+    assert timed_out.status == "error" and "시간이 초과" in timed_out.content
+    assert ok.status == "success" and ok.content == "검색: y"
+    assert metrics_store.tool_latency[("hanging", "timeout")].count == before + 1
+    assert "gateway_tool_call_duration_seconds_count" in metrics_store.render_prometheus()
+
+
+async def test_도구_예산을_넘는_호출은_실행하지_않음(monkeypatch):
+    monkeypatch.setattr(settings, "tool_max_calls", 3)
+    state = _state(("slow_search", {"query": "a"}), ("slow_search", {"query": "b"}), tool_calls=2)
+
+    result = await tool_executor_node(state, {})
+
+    assert result["messages"][0].content == "검색: a"
+    assert "예산" in result["messages"][1].content
+    assert result["tool_calls"] == 3
+    assert budget_exhausted(result)
+    assert not budget_exhausted({"tool_calls": 0, "tool_time_ms": 0.0})
+    assert budget_exhausted({"tool_calls": 0, "tool_time_ms": 5000.0})
+
+
+async def test_알_수_없는_도구():
+    result = await tool_executor_node(_state(("rm_rf", {})), {})
+    assert result["messages"][0].status == "error"
+    assert "알 수 없는 도구" in result["messages"][0].content
+
+
+async def test_카운터를_초기화하지_않은_그래프에서도_동작():
+    """LangGraph는 초기 state에 없는 키를 None으로 채움 — 라우터 밖(스크립트/테스트)에서 실행하는 경우"""
+    checked = []
+
+    async def check_budget(state: AgentState) -> dict:
+        assert state.get("tool_calls") is None
+        checked.append(budget_exhausted(state))
+        return {"response": ""}
+
+    graph = StateGraph(AgentState)
+    graph.add_node("check", check_budget)
+    graph.add_node("tools", tool_executor_node)
+    graph.add_edge(START, "check")
+    graph.add_edge("check", "tools")
+    graph.add_edge("tools", END)
+
+    result = await graph.compile().ainvoke(_state(("slow_search", {"query": "뉴스"})))
+
+    assert checked == [False]
+    assert result["tool_calls"] == 1
+    assert result["messages"][-1].content == "검색: 뉴스"
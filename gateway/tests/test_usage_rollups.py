@@ -0,0 +1,73 @@
+"""
+사용량 시간 버킷 집계 / 리더보드 테스트
+
+로컬 Redis가 없으면 skip
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import redis.asyncio as airedis
+
+from core.config import settings
+from service.log_service import get_usage_leaderboard, get_usage_series, log_usage
+
+
+@pytest.fixture
+async def redis_str():
+    client = airedis.from_url(settings.redis_url, decode_responses=True, socket_connect_timeout=1)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis에 연결할 수 없음")
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def now(redis_str):
+    """다른 테스트와 겹치지 않는 과거 시각 (끝나면 해당 버킷 키 정리)"""
+    at = datetime(2001, 1, 1, tzinfo=timezone.utc) + timedelta(days=random.randrange(3000))
+    yield at
+    for pattern in (f"usage:*:{at:%Y%m%d}*", "log:rollup-*"):
+        keys = [key async for key in redis_str.scan_iter(pattern)]
+        if keys:
+            await redis_str.delete(*keys)
+
+
+async def test_분_시간_일_버킷과_리더보드_기록(redis_str, now):
+    await log_usage(redis_str, "rollup-a", "q", "llama3.2:3b", 10, 20, now=now)
+    await log_usage(redis_str, "rollup-a", "q", "qwen2.5:7b", 100, 200, now=now)
+    await log_usage(redis_str, "rollup-b", "q", "llama3.2:3b", 5, 5, now=now)
+
+    for resolution, fmt in (("minute", "%Y%m%d%H%M"), ("hour", "%Y%m%d%H"), ("day", "%Y%m%d")):
+        user = await redis_str.hgetall(f"usage:{resolution}:{now.strftime(fmt)}:user:rollup-a")
+        assert user == {"requests": "2", "prompt_tokens": "110", "completion_tokens": "220", "total_tokens": "330"}
+
+    ttl = await redis_str.ttl(f"usage:minute:{now:%Y%m%d%H%M}:user:rollup-a")
+    assert 0 < ttl <= settings.usage_rollup_ttl_seconds["minute"]
+
+    board = await get_usage_leaderboard(redis_str, "day", f"{now:%Y%m%d}", "user", limit=1)
+    assert board["total"] == 2
+    assert board["has_more"] is True
+    assert board["results"] == [{
+        "rank": 1, "member": "rollup-a",
+        "requests": 2, "prompt_tokens": 110, "completion_tokens": 220, "total_tokens": 330,
+    }]
+
+    page2 = await get_usage_leaderboard(redis_str, "day", f"{now:%Y%m%d}", "user", limit=1, offset=1)
+    assert [(r["rank"], r["member"], r["total_tokens"]) for r in page2["results"]] == [(2, "rollup-b", 10)]
+    assert page2["has_more"] is False
+
+    models = await get_usage_leaderboard(redis_str, "hour", f"{now:%Y%m%d%H}", "model")
+    assert [(r["member"], r["requests"]) for r in models["results"]] == [("qwen2.5:7b", 1), ("llama3.2:3b", 2)]
+
+
+async def test_시계열은_빈_버킷을_0으로_채움(redis_str, now):
+    await log_usage(redis_str, "rollup-a", "q", "llama3.2:3b", 1, 2, now=now - timedelta(hours=2))
+    await log_usage(redis_str, "rollup-a", "q", "llama3.2:3b", 3, 4, now=now)
+
+    series = await get_usage_series(redis_str, "user", "rollup-a", "hour", count=3, now=now)
+    assert [point["total_tokens"] for point in series["series"]] == [3, 0, 7]
+    assert series["series"][-1]["bucket"] == f"{now:%Y%m%d%H}"
@@ -0,0 +1,94 @@
+"""
+URL fetcher 테스트 (스트리밍 추출 / 바이트 제한 / ETag 조건부 재요청)
+
+네트워크 대신 httpx.MockTransport 사용
+"""
+import httpx
+
+from agent.web_fetch import TextExtractor, UrlFetcher
+
+
+def _fetcher(handler, **overrides) -> UrlFetcher:
+    options = {"max_bytes": 1024 * 1024, "max_chars": 100, "cache_size": 10, "fresh_seconds": 0, "timeout": 5}
+    options.update(overrides)
+    fetcher = UrlFetcher(**options)
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return fetcher
+
+
+def test_스크립트_스타일_제외하고_텍스트_추출():
+    extractor = TextExtractor(limit=1000)
+    for chunk in ["<html><head><title>제목</title><style>p{}</style></he", "ad><body><p>첫 문단",
+                  "</p><script>var x = '<p>무시</p>';</script><div>둘째&amp;문단</div></body></html>"]:
+        extractor.feed(chunk)
+    extractor.close()
+    assert extractor.text() == "제목 첫 문단 둘째&문단"
+
+
+async def test_필요한_글자_수가_모이면_다운로드_중단():
+    sent = []
+
+    async def body():
+        yield b"<html><body>"
+        for i in range(1000):
+            sent.append(i)
+            yield f"<p>{'가' * 50} {i}</p>".encode()
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, content=body())
+
+    fetcher = _fetcher(handler)
+    text = await fetcher.fetch_text("https://example.com/big")
+    assert len(text) == 100
+    assert len(sent) < 10                         # 1000개 중 앞부분만 읽음
+
+
+async def test_바이트_제한():
+    async def body():
+        while True:
+            yield b"<script>" + b"x" * 4096 + b"</script>"
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=body())
+
+    fetcher = _fetcher(handler, max_bytes=64 * 1024)
+    assert await fetcher.fetch_text("https://example.com/scripts") == ""
+    assert fetcher.stats["truncated"] == 1
+
+
+async def test_JSON_응답은_텍스트로_읽고_바이너리는_무시():
+    bodies = {
+        "/data": ("application/json; charset=utf-8", '{"title": "서울 날씨",\n  "temp": 21}' + " " * 50 + "x" * 200),
+        "/ld": ("application/ld+json", '{"@type": "Article", "headline": "제목"}'),
+        "/image": ("image/png", "\x89PNG"),
+    }
+
+    def handler(request):
+        content_type, body = bodies[request.url.path]
+        return httpx.Response(200, headers={"content-type": content_type}, content=body.encode())
+
+    fetcher = _fetcher(handler)
+    text = await fetcher.fetch_text("https://example.com/data")
+    assert text.startswith('{"title": "서울 날씨", "temp": 21} x') and len(text) == 100
+    assert await fetcher.fetch_text("https://example.com/ld") == '{"@type": "Article", "headline": "제목"}'
+    assert await fetcher.fetch_text("https://example.com/image") == ""
+
+
+async def test_ETag_조건부_재요청과_신선_기간():
+    requests = []
+
+    def handler(request):
+        requests.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"content-type": "text/html", "etag": '"v1"'}, content=b"<p>hello</p>")
+
+    fetcher = _fetcher(handler)
+    assert await fetcher.fetch_text("https://example.com/") == "hello"
+    assert await fetcher.fetch_text("https://example.com/") == "hello"     # 304 → 캐시 재사용
+    assert requests == [None, '"v1"']
+    assert fetcher.stats["revalidated"] == 1
+
+    fetcher.fresh_seconds = 60
+    assert await fetcher.fetch_text("https://example.com/") == "hello"     # 신선 기간 → 요청 없음
+    assert len(requests) == 2